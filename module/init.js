@@ -1,7 +1,105 @@
 /* Dark Sun PF2E module bootstrap */
 
+const MODULE_ID = "darksun-pf2e";
+
+/*
+ * Full-text search over the prebuilt index in packs/search (see
+ * tools/pdf_pipeline/search_index.py). Shards are fetched on first use and
+ * cached, so a query only loads the shards for its own term prefixes.
+ */
+const DarkSunSearch = {
+  _index: null,
+  _shards: new Map(),
+  _stopwords: new Set(
+    ("a an and are as at be but by for from has have he his in is it its of on or that the their they this to was " +
+      "were which will with").split(" ")
+  ),
+
+  _url(name) {
+    return `modules/${MODULE_ID}/packs/search/${name}.json`;
+  },
+
+  async _fetch(name) {
+    const response = await fetch(this._url(name));
+    if (!response.ok) throw new Error(`Dark Sun PF2E | Missing search shard ${name}`);
+    return response.json();
+  },
+
+  index() {
+    this._index ??= this._fetch("index");
+    return this._index;
+  },
+
+  async _shard(term, prefixLength) {
+    const name = [...term.slice(0, prefixLength)]
+      .map((ch) => (/[a-z0-9]/.test(ch) ? ch : "_"))
+      .join("")
+      .padEnd(prefixLength, "_");
+    const index = await this.index();
+    if (!index.shards.includes(name)) return {};
+    if (!this._shards.has(name)) this._shards.set(name, this._fetch(name));
+    return this._shards.get(name);
+  },
+
+  tokenize(query) {
+    const terms = [];
+    for (let term of query.toLowerCase().match(/[a-z0-9]+(?:'[a-z]+)?/g) ?? []) {
+      if (term.endsWith("'s")) term = term.slice(0, -2);
+      if (term.length >= 2 && !this._stopwords.has(term)) terms.push(term);
+    }
+    return terms;
+  },
+
+  /**
+   * Find index documents containing every term of the query; the last term also
+   * matches as a prefix. Results are ordered by total occurrences and carry the
+   * document's compendium UUID and the character offsets of each match.
+   */
+  async search(query, { limit = 20 } = {}) {
+    const terms = this.tokenize(query);
+    if (!terms.length) return [];
+    const index = await this.index();
+
+    let matches = null;
+    for (const [position, term] of terms.entries()) {
+      const shard = await this._shard(term, index.prefix_length);
+      const isPrefix = position === terms.length - 1;
+      const found = new Map();
+      for (const [candidate, postings] of Object.entries(shard)) {
+        if (candidate !== term && !(isPrefix && candidate.startsWith(term))) continue;
+        for (const [slot, ...deltas] of postings) {
+          let offset = 0;
+          const offsets = deltas.map((delta) => (offset += delta));
+          found.set(slot, (found.get(slot) ?? []).concat(offsets));
+        }
+      }
+      if (matches === null) {
+        matches = found;
+      } else {
+        for (const [slot, offsets] of matches) {
+          if (found.has(slot)) matches.set(slot, offsets.concat(found.get(slot)));
+          else matches.delete(slot);
+        }
+      }
+      if (!matches.size) return [];
+    }
+
+    return [...matches]
+      .map(([slot, offsets]) => {
+        const doc = index.documents[slot];
+        let uuid = `Compendium.${MODULE_ID}.${doc.pack}.${doc.type}.${doc.id}`;
+        if (doc.page) uuid += `.JournalEntryPage.${doc.page}`;
+        return { uuid, name: doc.name, pack: doc.pack, score: offsets.length, offsets: offsets.sort((a, b) => a - b) };
+      })
+      .sort((a, b) => b.score - a.score)
+      .slice(0, limit);
+  },
+};
+
 Hooks.once("init", () => {
   console.log("Dark Sun PF2E | Initialising module");
+  const module = game.modules.get(MODULE_ID);
+  if (module) module.api = { search: (query, options) => DarkSunSearch.search(query, options) };
 });
 
 Hooks.once("ready", () => {
@@ -9,4 +107,3 @@ Hooks.once("ready", () => {
     ui.notifications?.warn("Dark Sun PF2E requires the Pathfinder Second Edition system.");
   }
 });
-
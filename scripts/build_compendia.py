@@ -27,31 +27,157 @@ def parse_args() -> argparse.Namespace:
         default=Path("data/processed/journals"),
         help="Directory containing processed journal JSON files.",
     )
+    parser.add_argument(
+        "--bestiary",
+        type=Path,
+        default=Path("data/processed/bestiary.json"),
+        help="Processed monster records to convert, if present.",
+    )
+    parser.add_argument(
+        "--spells",
+        type=Path,
+        default=Path("data/processed/spells.json"),
+        help="Processed spell records to convert, if present.",
+    )
     parser.add_argument(
         "--output-dir",
         type=Path,
         default=Path("packs"),
         help="Directory to write compendium pack files.",
     )
+    parser.add_argument(
+        "--format",
+        dest="pack_format",
+        choices=("nedb", "leveldb"),
+        default="nedb",
+        help="Pack layout: legacy NeDB .db files or Foundry v13 LevelDB directories (default: nedb).",
+    )
+    parser.add_argument(
+        "--module-manifest",
+        type=Path,
+        default=Path("module.json"),
+        help="Module manifest whose pack paths are pointed at the packs written for --format.",
+    )
+    parser.add_argument(
+        "--group-chapters",
+        action="store_true",
+        help="Build one journal entry per chapter with a page per subsection.",
+    )
+    parser.add_argument(
+        "--cross-links",
+        action="store_true",
+        help="Link mentions of ancestries and journal titles in pack content with @UUID references.",
+    )
+    parser.add_argument(
+        "--mappings-dir",
+        type=Path,
+        default=Path("data/mappings"),
+        help="Mapping files whose entity names and aliases are linked with --cross-links.",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path("data/.build_state.json"),
+        help="Build-state file used to skip work whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore recorded fingerprints and redo all work.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     _add_repo_path()
 
-    from tools.pdf_pipeline import build_ancestry_pack, build_journal_pack
+    from tools.pdf_pipeline import (
+        build_ancestry_pack,
+        build_bestiary_pack,
+        build_journal_pack,
+        build_cross_linker,
+        build_search_index,
+        build_spell_pack,
+    )
+    from tools.pdf_pipeline.build_state import BuildState
+    from tools.pdf_pipeline.compendium import update_module_pack_paths
+    from tools.pdf_pipeline.profiling import profile_session, span
 
     args = parse_args()
-    args.output_dir.mkdir(parents=True, exist_ok=True)
+    with profile_session(args.profile):
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+
+        build_state = BuildState.load(args.state)
+        if args.force:
+            build_state.forget("compendia")
+
+        linker = None
+        if args.cross_links:
+            with span("build_cross_linker", "stage"):
+                linker = build_cross_linker(args.mappings_dir, args.journals_dir, group_chapters=args.group_chapters)
+
+        suffix = ".db" if args.pack_format == "nedb" else ""
+        ancestry_output = args.output_dir / f"dark-sun-ancestries{suffix}"
+        with span("build_ancestry_pack", "stage"):
+            build_ancestry_pack(
+                args.ancestries,
+                ancestry_output,
+                build_state=build_state,
+                pack_format=args.pack_format,
+                linker=linker,
+            )
+
+        if args.journals_dir.exists():
+            journal_output = args.output_dir / f"dark-sun-rules{suffix}"
+            with span("build_journal_pack", "stage"):
+                build_journal_pack(
+                    args.journals_dir,
+                    journal_output,
+                    build_state=build_state,
+                    pack_format=args.pack_format,
+                    group_chapters=args.group_chapters,
+                    linker=linker,
+                )
+        else:
+            print(f"Warning: Journal directory {args.journals_dir} does not exist; skipping journal pack.")
+
+        for label, processed_path, pack_name, builder in (
+            ("bestiary", args.bestiary, "dark-sun-bestiary", build_bestiary_pack),
+            ("spell", args.spells, "dark-sun-spells", build_spell_pack),
+        ):
+            if not processed_path.exists():
+                print(f"Warning: Processed {label} data {processed_path} does not exist; skipping {label} pack.")
+                continue
+            with span(f"build_{label}_pack", "stage"):
+                builder(
+                    processed_path,
+                    args.output_dir / f"{pack_name}{suffix}",
+                    build_state=build_state,
+                    pack_format=args.pack_format,
+                    linker=linker,
+                )
+
+        with span("build_search_index", "stage"):
+            build_search_index(
+                args.output_dir / "search",
+                ancestries_path=args.ancestries,
+                journals_dir=args.journals_dir,
+                group_chapters=args.group_chapters,
+                build_state=build_state,
+                linker=linker,
+            )
 
-    ancestry_output = args.output_dir / "dark-sun-ancestries.db"
-    build_ancestry_pack(args.ancestries, ancestry_output)
+        build_state.save()
 
-    if args.journals_dir.exists():
-        journal_output = args.output_dir / "dark-sun-rules.db"
-        build_journal_pack(args.journals_dir, journal_output)
-    else:
-        print(f"Warning: Journal directory {args.journals_dir} does not exist; skipping journal pack.")
+        if update_module_pack_paths(args.module_manifest, args.output_dir, args.pack_format):
+            print(f"Updated pack paths in {args.module_manifest} for {args.pack_format} packs.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""Export the player aid cards and map plates from the Dark Sun PDF as image assets."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def _add_repo_path() -> None:
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--pdf",
+        type=Path,
+        default=Path("tsr02400_-_ADD_Setting_-_Dark_Sun_Box_Set_Original.pdf"),
+        help="Path to the source PDF.",
+    )
+    parser.add_argument(
+        "--profiles",
+        type=Path,
+        default=Path("data/mappings/asset_profiles.json"),
+        help="Page ranges to export and how (embedded images or full-page renders).",
+    )
+    parser.add_argument(
+        "--assets-dir",
+        type=Path,
+        default=Path("assets"),
+        help="Module asset folder; images go to its images/ directory next to manifest.json.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to decode and render images (default: 1, serial).",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path("data/.build_state.json"),
+        help="Build-state file used to skip work whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore recorded fingerprints and rescan the PDF.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    _add_repo_path()
+
+    from tools.pdf_pipeline.assets import extract_assets, load_asset_profiles
+    from tools.pdf_pipeline.build_state import BuildState
+    from tools.pdf_pipeline.profiling import profile_session
+
+    args = parse_args()
+    with profile_session(args.profile):
+        build_state = BuildState.load(args.state)
+        if args.force:
+            build_state.forget("assets")
+        counts: dict = {}
+        manifest = extract_assets(
+            args.pdf,
+            profiles=load_asset_profiles(args.profiles),
+            assets_dir=args.assets_dir,
+            workers=args.workers,
+            build_state=build_state,
+            counts=counts,
+        )
+        build_state.save()
+        print(
+            f"Assets: {len(manifest.assets)} files; {counts['decoded']} sources decoded, "
+            f"{counts['reused']} reused; {counts['written']} files written, {counts['removed']} removed"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,33 @@ def parse_args() -> argparse.Namespace:
         default=2,
         help="Minimum TOC level to extract (default: 2).",
     )
+    parser.add_argument(
+        "--profiles",
+        type=Path,
+        default=Path("data/mappings/section_profiles.json"),
+        help=(
+            "Section profiles whose transformers decide which page features (text, blocks, spans) "
+            "are extracted; when the file is missing every section gets text and blocks."
+        ),
+    )
+    parser.add_argument(
+        "--page-cache-mb",
+        type=int,
+        default=64,
+        help="Memory budget for the shared page extraction cache in MiB (0 disables caching).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to extract pages (default: 1, serial).",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=("json", "sqlite"),
+        default="json",
+        help="Write one JSON file per section (default) or a single indexed SQLite store.",
+    )
     parser.add_argument(
         "--force-manifest",
         action="store_true",
@@ -49,30 +76,78 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Only generate the manifest without extracting sections.",
     )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path("data/.build_state.json"),
+        help="Build-state file used to skip work whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore recorded fingerprints and redo all work.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     _add_repo_path()
 
-    from tools.pdf_pipeline import extract_sections, generate_manifest, load_manifest
+    from tools.pdf_pipeline import PageCache, extract_sections, generate_manifest, load_manifest
+    from tools.pdf_pipeline import manifest as manifest_module
+    from tools.pdf_pipeline.build_state import BuildState, file_fingerprint, fingerprint, source_fingerprint
+    from tools.pdf_pipeline.profiling import profile_session
+    from tools.pdf_pipeline.transform import feature_resolver
 
     args = parse_args()
-
-    manifest_path = args.manifest
-    if manifest_path.exists() and not args.force_manifest:
-        manifest = load_manifest(manifest_path)
-    else:
-        manifest = generate_manifest(args.pdf, manifest_path)
-
-    if args.skip_extract:
-        return
-
-    extract_sections(
-        manifest,
-        output_dir=args.sections_dir,
-        min_level=args.min_level,
-    )
+    with profile_session(args.profile):
+        build_state = BuildState.load(args.state)
+        if args.force:
+            build_state.forget("manifest")
+            build_state.forget("extract")
+
+        manifest_path = args.manifest
+        manifest_key = str(manifest_path.resolve())
+        manifest_fingerprint = ""
+        if args.pdf.exists():
+            manifest_fingerprint = fingerprint(file_fingerprint(args.pdf), source_fingerprint(manifest_module))
+        if (
+            manifest_path.exists()
+            and not args.force_manifest
+            and (not manifest_fingerprint or build_state.is_fresh("manifest", manifest_key, manifest_fingerprint))
+        ):
+            manifest = load_manifest(manifest_path)
+        else:
+            manifest = generate_manifest(args.pdf, manifest_path)
+            build_state.record("manifest", manifest_key, manifest_fingerprint, [manifest_path.resolve()])
+            build_state.save()
+
+        if args.skip_extract:
+            return
+
+        page_cache = PageCache(max_bytes=args.page_cache_mb * 1024 * 1024)
+        features = feature_resolver(args.profiles) if args.profiles.exists() else None
+        extract_sections(
+            manifest,
+            output_dir=args.sections_dir,
+            min_level=args.min_level,
+            features=features,
+            page_cache=page_cache,
+            workers=args.workers,
+            build_state=build_state,
+            storage=args.storage,
+        )
+        build_state.save()
+        if args.workers <= 1:
+            stats = page_cache.stats()
+            print(f"Page cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+"""Run extraction, transformation, validation and pack building as one streaming pipeline."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def _add_repo_path() -> None:
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser(
+        "run",
+        help="Stream sections from the PDF through the transformers and validators into the packs.",
+        description=(
+            "Pass sections between stages in memory; raw sections, processed payloads and the "
+            "table cache are only written when --raw-dir, --processed-dir or --table-cache-dir is given."
+        ),
+    )
+    run.add_argument(
+        "--pdf",
+        type=Path,
+        default=Path("tsr02400_-_ADD_Setting_-_Dark_Sun_Box_Set_Original.pdf"),
+        help="Path to the source PDF.",
+    )
+    run.add_argument(
+        "--manifest",
+        type=Path,
+        default=Path("data/raw/pdf_manifest.json"),
+        help="Where to write/read the manifest JSON.",
+    )
+    run.add_argument(
+        "--force-manifest",
+        action="store_true",
+        help="Regenerate the manifest even if it already exists.",
+    )
+    run.add_argument(
+        "--profiles",
+        type=Path,
+        default=Path("data/mappings/section_profiles.json"),
+        help="Path to the section profile configuration JSON.",
+    )
+    run.add_argument(
+        "--raw-dir",
+        type=Path,
+        default=None,
+        help="Also write extracted section JSON files to this directory.",
+    )
+    run.add_argument(
+        "--table-cache-dir",
+        type=Path,
+        default=None,
+        help="Cache pdfplumber table results in this directory (default: table_cache under --raw-dir; "
+        "no cache without either).",
+    )
+    run.add_argument(
+        "--processed-dir",
+        type=Path,
+        default=None,
+        help="Also write processed data artifacts to this directory.",
+    )
+    run.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("packs"),
+        help="Directory to write compendium packs.",
+    )
+    run.add_argument(
+        "--format",
+        dest="pack_format",
+        choices=("nedb", "leveldb"),
+        default="nedb",
+        help="Pack layout: legacy NeDB .db files or Foundry v13 LevelDB directories (default: nedb).",
+    )
+    run.add_argument(
+        "--module-manifest",
+        type=Path,
+        default=Path("module.json"),
+        help="Module manifest whose pack paths are pointed at the packs written for --format.",
+    )
+    run.add_argument(
+        "--group-chapters",
+        action="store_true",
+        help="Build one journal entry per chapter with a page per subsection.",
+    )
+    run.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write processed JSON on a single line instead of indented (with --processed-dir).",
+    )
+    run.add_argument(
+        "--min-level",
+        type=int,
+        default=2,
+        help="Minimum TOC level to extract (default: 2).",
+    )
+    run.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to extract pages (default: 1, serial).",
+    )
+    run.add_argument(
+        "--page-cache-mb",
+        type=int,
+        default=64,
+        help="Memory budget for the shared page extraction cache in MiB (0 disables caching).",
+    )
+    run.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="Sections and payloads allowed to wait between stages (default: 8).",
+    )
+    run.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    _add_repo_path()
+
+    from tools.pdf_pipeline import PageCache, generate_manifest, load_manifest, run_pipeline
+    from tools.pdf_pipeline.compendium import update_module_pack_paths
+    from tools.pdf_pipeline.profiling import profile_session
+    from tools.pdf_pipeline.transform import TransformError
+
+    args = parse_args()
+    with profile_session(args.profile):
+        if args.manifest.exists() and not args.force_manifest:
+            manifest = load_manifest(args.manifest)
+        else:
+            manifest = generate_manifest(args.pdf, args.manifest)
+
+        issues: dict = {}
+        try:
+            counts = run_pipeline(
+                manifest,
+                section_profiles=args.profiles,
+                packs_dir=args.output_dir,
+                sections_dir=args.raw_dir,
+                processed_dir=args.processed_dir,
+                table_cache_dir=args.table_cache_dir,
+                min_level=args.min_level,
+                workers=args.workers,
+                page_cache=PageCache(max_bytes=args.page_cache_mb * 1024 * 1024),
+                pack_format=args.pack_format,
+                group_chapters=args.group_chapters,
+                compact=args.compact,
+                queue_size=args.queue_size,
+                issues=issues,
+            )
+        except TransformError as exc:
+            print("Transformation failures:")
+            for name, message in exc.failures:
+                print(f" - {name}: {message}")
+            sys.exit(1)
+
+        for pack_path, pack_counts in sorted(counts.items()):
+            summary = ", ".join(f"{count} {kind}" for kind, count in pack_counts.items())
+            print(f"{pack_path}: {summary}")
+        if update_module_pack_paths(args.module_manifest, args.output_dir, args.pack_format):
+            print(f"Updated pack paths in {args.module_manifest} for {args.pack_format} packs.")
+        if issues:
+            print("Validation issues detected:")
+            for name, section_issues in issues.items():
+                for issue in section_issues:
+                    print(f" - {name}: {issue}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Benchmark the conversion pipeline against synthetic PDFs of increasing size."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+def _add_repo_path() -> None:
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 500, 2000],
+        help="Page counts of the synthetic PDFs to benchmark.",
+    )
+    parser.add_argument(
+        "--toc-depth",
+        type=int,
+        default=4,
+        help="Depth of the synthetic table of contents (default: 4).",
+    )
+    parser.add_argument(
+        "--blocks-per-page",
+        type=int,
+        default=12,
+        help="Text blocks written on every synthetic page.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per size; the fastest run of each stage is reported.",
+    )
+    parser.add_argument(
+        "--profiles",
+        type=Path,
+        default=Path("data/mappings/section_profiles.json"),
+        help="Section profile configuration used for the transform stage.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("data/benchmarks/latest.json"),
+        help="Where to write the benchmark results JSON.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=Path("data/benchmarks/baseline.json"),
+        help="Stored baseline results to compare against.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown relative to the baseline before a stage counts as a regression.",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.05,
+        help="Ignore slowdowns smaller than this many seconds (timer noise).",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline instead of comparing.",
+    )
+    return parser.parse_args()
+
+
+def _timed(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _run_size(args: argparse.Namespace, pages: int, workdir: Path) -> Dict[str, dict]:
+    from tools.pdf_pipeline import (
+        build_ancestry_pack,
+        build_bestiary_pack,
+        build_journal_pack,
+        build_spell_pack,
+        extract_sections,
+        generate_manifest,
+    )
+    from tools.pdf_pipeline.section_store import open_section_source
+    from tools.pdf_pipeline.synthetic import generate_synthetic_pdf
+    from tools.pdf_pipeline.transform import transform_all
+    from tools.pdf_pipeline.transformers import records
+    from tools.pdf_pipeline.validators import validate_ancestries, validate_journals
+
+    mapping_path = args.profiles.parent / "ancestries.json"
+    entities = json.loads(mapping_path.read_text(encoding="utf-8")).get("entities", [])
+    headings = [entity.get("heading") or entity["name"] for entity in entities]
+
+    record_profiles = [
+        profile
+        for profile in json.loads(args.profiles.read_text(encoding="utf-8"))
+        if profile["transformer"] == "records"
+    ]
+
+    def segment_records(raw_sections: Path) -> None:
+        source = open_section_source(raw_sections)
+        for profile in record_profiles:
+            try:
+                name = source.find(profile["slug"])
+            except FileNotFoundError:
+                continue
+            records.transform(source.load(name), profile.get("config", {}))
+
+    pdf_path = generate_synthetic_pdf(
+        workdir / f"synthetic-{pages}.pdf",
+        pages=pages,
+        toc_depth=args.toc_depth,
+        blocks_per_page=args.blocks_per_page,
+        headings=headings,
+    )
+
+    best: Dict[str, float] = {}
+    for run in range(args.repeat):
+        run_dir = workdir / f"run-{pages}-{run}"
+        raw_dir = run_dir / "raw"
+        processed_dir = run_dir / "processed"
+        packs_dir = run_dir / "packs"
+        manifest_holder: List = []
+
+        timings = {
+            "generate_manifest": _timed(
+                lambda: manifest_holder.append(generate_manifest(pdf_path, raw_dir / "pdf_manifest.json"))
+            ),
+        }
+        manifest = manifest_holder[0]
+        timings["extract_sections"] = _timed(
+            lambda: extract_sections(manifest, output_dir=raw_dir / "sections")
+        )
+        timings["transform_all"] = _timed(
+            lambda: transform_all(
+                section_profiles=args.profiles,
+                raw_sections_dir=raw_dir / "sections",
+                output_dir=processed_dir,
+            )
+        )
+        timings["segment_records"] = _timed(lambda: segment_records(raw_dir / "sections"))
+        timings["build_ancestry_pack"] = _timed(
+            lambda: build_ancestry_pack(processed_dir / "ancestries.json", packs_dir / "ancestries.db")
+        )
+        timings["build_journal_pack"] = _timed(
+            lambda: build_journal_pack(processed_dir / "journals", packs_dir / "rules.db")
+        )
+        if (processed_dir / "bestiary.json").exists():
+            timings["build_bestiary_pack"] = _timed(
+                lambda: build_bestiary_pack(processed_dir / "bestiary.json", packs_dir / "bestiary.db")
+            )
+        if (processed_dir / "spells.json").exists():
+            timings["build_spell_pack"] = _timed(
+                lambda: build_spell_pack(processed_dir / "spells.json", packs_dir / "spells.db")
+            )
+        timings["validators"] = _timed(
+            lambda: (
+                validate_ancestries(processed_dir / "ancestries.json"),
+                validate_journals(processed_dir / "journals"),
+            )
+        )
+        for stage, seconds in timings.items():
+            best[stage] = min(seconds, best.get(stage, seconds))
+
+    return {
+        stage: {"seconds": round(seconds, 6), "pages_per_second": round(pages / seconds, 2) if seconds else None}
+        for stage, seconds in best.items()
+    }
+
+
+def _compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> List[str]:
+    regressions: List[str] = []
+    for size, stages in results["sizes"].items():
+        baseline_stages = baseline.get("sizes", {}).get(size)
+        if not baseline_stages:
+            continue
+        for stage, current in stages.items():
+            previous = baseline_stages.get(stage)
+            if previous is None:
+                continue
+            delta = current["seconds"] - previous["seconds"]
+            if delta > min_delta and current["seconds"] > previous["seconds"] * (1 + threshold):
+                regressions.append(
+                    f"{size} pages / {stage}: {current['seconds']:.3f}s vs baseline {previous['seconds']:.3f}s"
+                )
+    return regressions
+
+
+def main() -> None:
+    _add_repo_path()
+
+    args = parse_args()
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "toc_depth": args.toc_depth,
+        "blocks_per_page": args.blocks_per_page,
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="darksun-bench-") as tmp:
+        for pages in args.sizes:
+            stages = _run_size(args, pages, Path(tmp))
+            results["sizes"][str(pages)] = stages
+            summary = ", ".join(f"{stage} {values['seconds']:.3f}s" for stage, values in stages.items())
+            print(f"{pages} pages: {summary}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = _compare(results, baseline, args.threshold, args.min_delta)
+    if regressions:
+        print("Performance regressions detected:")
+        for regression in regressions:
+            print(f" - {regression}")
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ def parse_args() -> argparse.Namespace:
         "--raw-dir",
         type=Path,
         default=Path("data/raw/sections"),
-        help="Directory containing raw section JSON files.",
+        help="Directory containing raw section JSON files or a sections.sqlite store.",
     )
     parser.add_argument(
         "--output-dir",
@@ -33,20 +33,73 @@ def parse_args() -> argparse.Namespace:
         default=Path("data/processed"),
         help="Directory to write processed data artifacts.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to transform sections (default: 1, serial).",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path("data/.build_state.json"),
+        help="Build-state file used to skip work whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore recorded fingerprints and redo all work.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write processed JSON on a single line (for production builds) instead of indented.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     _add_repo_path()
 
-    from tools.pdf_pipeline.transform import transform_all
+    from tools.pdf_pipeline.build_state import BuildState
+    from tools.pdf_pipeline.profiling import profile_session
+    from tools.pdf_pipeline.transform import TransformError, transform_all
 
     args = parse_args()
-    transform_all(
-        section_profiles=args.profiles,
-        raw_sections_dir=args.raw_dir,
-        output_dir=args.output_dir,
-    )
+    with profile_session(args.profile):
+        build_state = BuildState.load(args.state)
+        if args.force:
+            build_state.forget("transform")
+        issues: dict = {}
+        try:
+            transform_all(
+                section_profiles=args.profiles,
+                raw_sections_dir=args.raw_dir,
+                output_dir=args.output_dir,
+                build_state=build_state,
+                workers=args.workers,
+                issues=issues,
+                compact=args.compact,
+            )
+        except TransformError as exc:
+            build_state.save()
+            print("Transformation failures:")
+            for name, message in exc.failures:
+                print(f" - {name}: {message}")
+            sys.exit(1)
+        build_state.save()
+        if issues:
+            print("Validation issues detected:")
+            for name, section_issues in issues.items():
+                for issue in section_issues:
+                    print(f" - {name}: {issue}")
 
 
 if __name__ == "__main__":
@@ -27,24 +27,72 @@ def parse_args() -> argparse.Namespace:
         default=Path("data/processed/journals"),
         help="Directory containing processed journal entries.",
     )
+    parser.add_argument(
+        "--records",
+        type=Path,
+        nargs="*",
+        default=[Path("data/processed/bestiary.json"), Path("data/processed/spells.json")],
+        help="Processed record datasets to check when present.",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path("data/.build_state.json"),
+        help="Build-state file used to skip files that passed unchanged.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-check every file, ignoring earlier passing results.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     _add_repo_path()
 
-    from tools.pdf_pipeline.validators import validate_ancestries, validate_journals
+    from tools.pdf_pipeline.build_state import BuildState
+    from tools.pdf_pipeline.profiling import profile_session, span
+    from tools.pdf_pipeline.validators import validate_files
 
     args = parse_args()
-    issues = []
-    issues.extend(validate_ancestries(args.ancestries))
-    issues.extend(validate_journals(args.journals_dir))
-    if issues:
-        print("Validation issues detected:")
-        for issue in issues:
-            print(f" - {issue}")
-        sys.exit(1)
-    print("All datasets passed validation.")
+    with profile_session(args.profile):
+        build_state = BuildState.load(args.state)
+        if args.force:
+            build_state.forget("validate")
+
+        issues = []
+        paths = [path for path in args.records if path.exists()]
+        if args.ancestries.exists():
+            paths.insert(0, args.ancestries)
+        else:
+            issues.append(f"ancestry dataset missing: {args.ancestries}")
+        if not args.journals_dir.exists():
+            issues.append(f"journal directory missing: {args.journals_dir}")
+        else:
+            journal_files = sorted(args.journals_dir.glob("*.json"))
+            if not journal_files:
+                issues.append("no journal entries generated")
+            paths.extend(journal_files)
+
+        with span("validate_files", "stage", files=len(paths)):
+            for path, file_issues in validate_files(paths, build_state).items():
+                issues.extend(f"{path.name}: {issue}" for issue in file_issues)
+        build_state.save()
+
+        if issues:
+            print("Validation issues detected:")
+            for issue in issues:
+                print(f" - {issue}")
+            sys.exit(1)
+        print("All datasets passed validation.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""Rebuild processed data and packs whenever mappings, transformers or the PDF change."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def _add_repo_path() -> None:
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--pdf",
+        type=Path,
+        default=Path("tsr02400_-_ADD_Setting_-_Dark_Sun_Box_Set_Original.pdf"),
+        help="Path to the source PDF; when missing, the existing raw sections are used.",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=Path("data/raw/pdf_manifest.json"),
+        help="Where to write/read the manifest JSON.",
+    )
+    parser.add_argument(
+        "--sections-dir",
+        type=Path,
+        default=Path("data/raw/sections"),
+        help="Directory of extracted raw sections.",
+    )
+    parser.add_argument(
+        "--profiles",
+        type=Path,
+        default=Path("data/mappings/section_profiles.json"),
+        help="Path to the section profile configuration JSON.",
+    )
+    parser.add_argument(
+        "--mappings-dir",
+        type=Path,
+        default=Path("data/mappings"),
+        help="Directory of mapping files to watch (also the source of cross-link names).",
+    )
+    parser.add_argument(
+        "--processed-dir",
+        type=Path,
+        default=Path("data/processed"),
+        help="Directory to write processed data artifacts.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("packs"),
+        help="Directory to write compendium packs.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="pack_format",
+        choices=("nedb", "leveldb"),
+        default="nedb",
+        help="Pack layout: legacy NeDB .db files or Foundry v13 LevelDB directories (default: nedb).",
+    )
+    parser.add_argument(
+        "--group-chapters",
+        action="store_true",
+        help="Build one journal entry per chapter with a page per subsection.",
+    )
+    parser.add_argument(
+        "--cross-links",
+        action="store_true",
+        help="Link mentions of ancestries and journal titles with @UUID references.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="Seconds between polls for changed files (default: 0.5).",
+    )
+    parser.add_argument(
+        "--min-level",
+        type=int,
+        default=2,
+        help="Minimum TOC level to extract (default: 2).",
+    )
+    parser.add_argument(
+        "--page-cache-mb",
+        type=int,
+        default=64,
+        help="Memory budget for the page extraction cache kept between rebuilds, in MiB.",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path("data/.build_state.json"),
+        help="Build-state file shared with the one-shot scripts.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="Write a Chrome-trace/Perfetto JSON profile to TRACE and print a summary on exit.",
+    )
+    return parser.parse_args()
+
+
+def _print_report(report) -> None:
+    names = ", ".join(path.name for path in report.changed[:5])
+    if len(report.changed) > 5:
+        names += f" and {len(report.changed) - 5} more"
+    print(f"Rebuilt in {report.seconds * 1000:.0f} ms after changes to {names}")
+    if report.reloaded:
+        print(f"  reloaded: {', '.join(report.reloaded)}")
+    if report.processed:
+        print(f"  processed: {', '.join(path.name for path in report.processed)}")
+    if report.packs:
+        print(f"  packs: {', '.join(sorted({path.name for path in report.packs}))}")
+    for name, section_issues in report.issues.items():
+        for issue in section_issues:
+            print(f"  issue: {name}: {issue}")
+    if report.error:
+        print(f"  failed: {report.error}")
+
+
+def main() -> None:
+    _add_repo_path()
+
+    from tools.pdf_pipeline.build_state import BuildState
+    from tools.pdf_pipeline.profiling import profile_session
+    from tools.pdf_pipeline.watch import WatchSession, watch
+
+    args = parse_args()
+    with profile_session(args.profile):
+        session = WatchSession(
+            pdf_path=args.pdf,
+            manifest_path=args.manifest,
+            sections_dir=args.sections_dir,
+            profiles=args.profiles,
+            processed_dir=args.processed_dir,
+            packs_dir=args.output_dir,
+            mappings_dir=args.mappings_dir,
+            build_state=BuildState.load(args.state),
+            min_level=args.min_level,
+            page_cache_mb=args.page_cache_mb,
+            pack_format=args.pack_format,
+            group_chapters=args.group_chapters,
+            cross_links=args.cross_links,
+        )
+        print(f"Watching {', '.join(str(root) for root in session.roots)} (Ctrl+C to stop)")
+        try:
+            watch(session, _print_report, interval=args.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            session.close()
+
+
+if __name__ == "__main__":
+    main()
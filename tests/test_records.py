@@ -0,0 +1,224 @@
+"""Record segmentation against stat-block excerpts from the Dark Sun rulebook text."""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from tools.pdf_pipeline.models import ProcessedPayload, RecordsData, load_payload, payload_issues
+from tools.pdf_pipeline.records import RecordSegmenter, collapse_letter_spacing, label_pattern, records_to_payload
+from tools.pdf_pipeline.validators import validate_payload
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Chapter Five: the Belgoi stat block, with OCR letter spacing in two labels.
+MONSTER_EXCERPT = """\
+layer of flexible scales.
+DS1
+8 6
+
+
+Belgoi
+CLIMATE/TERRAIN: Tablelands
+FREQUENCY:
+Uncommon
+ORGANIZATION:
+Tribe
+ACTIVITY CYCLE:
+DIET:
+Any
+Omnivore
+ARMOR CLASS:
+7
+MOVEMENT:
+12
+HIT DICE:
+5
+SPECIAL ATTACKS:
+Constitution drain
+S P E C I A L  D E F E N S E S :  N i l
+MAGIC RESISTANCE: Nil
+SIZE:
+M (6\x92 tell)
+MOR A L E :
+Average (8-10)
+XP VALUE:
+650
+At first sight, the belgoi appear human.
+"""
+
+# Chapter Fifteen, page 90: a spell under a level heading, with a sidebar word
+# ("M a s s m o r p h") dropped between its fields by the column layout.
+SPELL_EXCERPT = """\
+Third Level Spells
+Fleet Feet (Alteration)
+(Reversible)
+Range: Touch
+Components: V, S, M
+M a s s m o r p h
+Duration: 1 day/5 levels
+Casting Time: 3
+Area of Effect: one individual
+Saving Throw: Neg.
+This spell allows an individual to move more
+quickly.
+"""
+
+# Chapter Fifteen, page 93: an OCR letter-spaced title above the spell's fields.
+SPACED_SPELL_EXCERPT = """\
+Priest Spells
+First-Level Spells
+Create Water
+M e r c i f u l  S h a d o w s  ( A b j u r a t i o n )
+( R e v e r s i b l e )
+By means of this spell, a wizard can enchant a
+living sapling to become a magical tree of life.
+Range: 0
+Components: V, S, M
+Duration: Permanent
+Casting Time: 1 turn
+Area of Effect: One tree
+Saving Throw: None
+The reverse of this spell, blistering rays, intensifies
+the light and heat of the sun on the victim.
+"""
+
+# Chapter Five: two creatures printed side by side over one stat block, then a
+# record whose title the column layout moved away from its anchor.
+SHARED_MONSTER_EXCERPT = """\
+Swallow or crush
+Crush
+Nil
+Nil
+Erdlu
+Kank
+CLIMATE/TERRAIN: Tablelands
+Tablelands
+or Hinterlands
+F R E Q U E N C Y
+Common
+Common
+ORGANIZATION:
+Flock
+Hive
+XP VALUE:
+175
+NO. APPEARING:
+10-100
+A R M O R  C L A S S :
+8
+MOVEMENT:
+10
+HIT DICE:
+3
+THAC0:
+17
+NO. OF ATTACKS:
+1 or 2
+CLIMATE/TERRAIN:
+Tablelands, Mountains
+FREQUENCY:
+Uncommon
+ORGANIZATION:
+Tribal
+"""
+
+
+def _segmenter(slug: str) -> RecordSegmenter:
+    profiles = json.loads((REPO_ROOT / "data" / "mappings" / "section_profiles.json").read_text(encoding="utf-8"))
+    profile = next(profile for profile in profiles if profile.get("slug") == slug)
+    return RecordSegmenter.from_config(profile["config"]["records"])
+
+
+def _payload(records: list) -> ProcessedPayload:
+    return ProcessedPayload(
+        slug="excerpt",
+        transformer="records",
+        data=RecordsData(entity_type="monster", records=records_to_payload(records)),
+    )
+
+
+def test_label_pattern_tolerates_letter_spacing() -> None:
+    pattern = re.compile(label_pattern("MORALE:"))
+    assert pattern.fullmatch("MORALE:")
+    assert pattern.fullmatch("M O R A L E :")
+    assert pattern.fullmatch("MOR A L E :")
+    assert re.compile(label_pattern("FREQUENCY")).fullmatch("F R E Q U E N C Y")
+
+
+def test_monster_stat_block() -> None:
+    (record,) = _segmenter("chapter-five-monsters-of-athas").segment(MONSTER_EXCERPT)
+
+    assert record.title == "Belgoi"
+    assert record.slug == "belgoi"
+    assert record.text.startswith("Belgoi\nCLIMATE/TERRAIN")
+    assert record.fields["frequency"] == "Uncommon"
+    assert record.fields["armor_class"] == "7"
+    assert record.fields["special_attacks"] == "Constitution drain"
+    assert record.fields["morale"] == "Average (8-10)"
+
+
+def test_spell_record_takes_level_from_heading() -> None:
+    (record,) = _segmenter("chapter-fifteen-new-spells").segment(SPELL_EXCERPT)
+
+    assert record.title == "Fleet Feet (Alteration)"
+    assert record.fields == {
+        "level": "Third Level Spells",
+        "range": "Touch",
+        "components": "V, S, M",
+        "duration": "1 day/5 levels",
+        "casting_time": "3",
+        "area": "one individual",
+        "saving_throw": "Neg.",
+    }
+
+
+def test_collapse_letter_spacing() -> None:
+    assert collapse_letter_spacing("T r a n s m u t e  S a n d  t o  S t o n e") == "Transmute Sand to Stone"
+    assert collapse_letter_spacing("Create Tree of Life") == "Create Tree of Life"
+    assert collapse_letter_spacing("dur a t i o n  o f") == "dur a t i o n of"
+
+
+def test_letter_spaced_spell_title() -> None:
+    (record,) = _segmenter("chapter-fifteen-new-spells").segment(SPACED_SPELL_EXCERPT)
+
+    assert record.title == "Merciful Shadows (Abjuration)"
+    assert record.slug == "merciful-shadows-abjuration"
+    assert record.fields["level"] == "First-Level Spells"
+    assert record.fields["range"] == "0"
+    assert record.fields["saving_throw"] == "None"
+
+
+def test_shared_and_untitled_monster_records_are_reported() -> None:
+    records = _segmenter("chapter-five-monsters-of-athas").segment(SHARED_MONSTER_EXCERPT)
+    assert [record.title for record in records] == ["Kank", ""]
+    assert records[0].shared_titles == ("Erdlu",)
+    assert records[0].text.startswith("Erdlu\nKank\n")
+
+    payload = _payload(records)
+    assert [record.slug for record in payload.data.records] == ["kank", "record-2"]
+    assert validate_payload(payload) == [
+        "Kank: stat block shared with Erdlu",
+        "record 2: no title found",
+    ]
+
+
+def test_duplicate_titles_keep_distinct_slugs() -> None:
+    segmenter = _segmenter("chapter-five-monsters-of-athas")
+    text = "Kank\nCLIMATE/TERRAIN: Tablelands\nDIET: Omnivore\nKank\nCLIMATE/TERRAIN: Hinterlands\nDIET: Omnivore\n"
+    payload = _payload(segmenter.segment(text))
+
+    assert [record.slug for record in payload.data.records] == ["kank", "kank-2"]
+    assert validate_payload(payload) == ["Kank: duplicate title (also record 1)"]
+
+
+def test_payload_model_follows_transformer() -> None:
+    raw = json.dumps({"slug": "excerpt", "transformer": "records", "data": {"title": "Monsters"}})
+    with pytest.raises(ValidationError) as excinfo:
+        load_payload(raw)
+
+    assert payload_issues(excinfo.value) == ["data.records: Field required"]
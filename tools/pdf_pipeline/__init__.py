@@ -1,14 +1,32 @@
 """PDF parsing and extraction utilities for the Dark Sun PF2E conversion pipeline."""
 
 from .manifest import generate_manifest, load_manifest
+from .assets import extract_assets, load_asset_manifest
 from .extract import extract_sections
-from .compendium import build_ancestry_pack, build_journal_pack
+from .page_cache import PageCache
+from .compendium import (
+    build_ancestry_pack,
+    build_bestiary_pack,
+    build_cross_linker,
+    build_journal_pack,
+    build_search_index,
+    build_spell_pack,
+)
+from .pipeline import run_pipeline
 
 __all__ = [
     "generate_manifest",
     "load_manifest",
     "extract_sections",
+    "extract_assets",
+    "load_asset_manifest",
+    "PageCache",
     "build_ancestry_pack",
     "build_journal_pack",
+    "build_bestiary_pack",
+    "build_spell_pack",
+    "build_search_index",
+    "build_cross_linker",
+    "run_pipeline",
 ]
 
@@ -0,0 +1,325 @@
+"""Image asset export for the graphical pages (player aid cards, map plates).
+
+:func:`extract_assets` scans the page ranges in ``asset_profiles.json``, then
+decodes embedded images or renders whole pages across a process pool. Images
+are deduplicated twice: by xref before decoding, so an image placed on many
+pages is decoded once, and by content hash afterwards, since files are named
+after their SHA-256 and identical images stored under different xrefs share
+one file. The result is recorded in ``manifest.json`` next to the files, for
+journals to look up the assets of a page.
+
+Each asset remembers the fingerprints of the xrefs or pages it came from, so a
+rebuild only decodes what changed and never rewrites an existing file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import fitz
+
+from . import profiling
+from .build_state import BuildState, file_fingerprint, fingerprint, json_fingerprint, source_fingerprint
+from .compendium import MODULE_ID
+from .models import Asset, AssetManifest, AssetProfile
+
+ASSETS_DIR = Path("assets")
+ASSET_MANIFEST_NAME = "manifest.json"
+IMAGES_DIR_NAME = "images"
+
+# Formats browsers display as extracted; anything else is converted to PNG.
+_WEB_FORMATS = {"png": "png", "jpeg": "jpg", "jpg": "jpg"}
+
+# Colour components of a DeviceCMYK image.
+_CMYK = 4
+
+
+class _Task(NamedTuple):
+    """An xref to decode or a page to render, identified by its input fingerprint."""
+
+    kind: str  # "image" or "render"
+    key: int  # xref or page number
+    smask: int
+    dpi: int
+    fingerprint: str
+
+
+class _Result(NamedTuple):
+    fingerprint: str
+    sha256: str
+    format: str
+    width: int
+    height: int
+    written: bool
+
+
+def load_asset_profiles(path: Path) -> List[AssetProfile]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return [AssetProfile.model_validate(entry) for entry in data]
+
+
+def load_asset_manifest(path: Path) -> AssetManifest:
+    return AssetManifest.model_validate_json(path.read_bytes())
+
+
+def asset_src(asset: Asset) -> str:
+    """Return the path Foundry serves ``asset`` from, for ``<img src>`` in journals."""
+
+    return f"modules/{MODULE_ID}/{ASSETS_DIR.as_posix()}/{asset.path}"
+
+
+def _image_bytes(doc: fitz.Document, xref: int, smask: int) -> Tuple[bytes, str, int, int]:
+    image = doc.extract_image(xref)
+    fmt = _WEB_FORMATS.get(image["ext"])
+    if fmt is not None and not smask and image.get("colorspace") != _CMYK:
+        return image["image"], fmt, image["width"], image["height"]
+
+    pixmap = fitz.Pixmap(doc, xref)
+    if pixmap.colorspace is not None and pixmap.colorspace.n == _CMYK:
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    if smask:
+        pixmap = fitz.Pixmap(pixmap, fitz.Pixmap(doc, smask))
+    return pixmap.tobytes("png"), "png", pixmap.width, pixmap.height
+
+
+def _render_bytes(doc: fitz.Document, page_number: int, dpi: int) -> Tuple[bytes, str, int, int]:
+    pixmap = doc[page_number - 1].get_pixmap(dpi=dpi)
+    return pixmap.tobytes("png"), "png", pixmap.width, pixmap.height
+
+
+def _run_task(doc: fitz.Document, task: _Task, images_dir: Path) -> _Result:
+    with profiling.span(f"assets.{task.kind}", "assets", key=task.key) as metrics:
+        if task.kind == "image":
+            data, fmt, width, height = _image_bytes(doc, task.key, task.smask)
+        else:
+            data, fmt, width, height = _render_bytes(doc, task.key, task.dpi)
+        sha256 = hashlib.sha256(data).hexdigest()
+        # Content-addressed, so an existing file already holds these bytes.
+        path = images_dir / f"{sha256[:20]}.{fmt}"
+        written = not path.exists()
+        if written:
+            staging = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            staging.write_bytes(data)
+            os.replace(staging, path)
+            metrics["bytes_written"] = len(data)
+    return _Result(task.fingerprint, sha256, fmt, width, height, written)
+
+
+# Each pool worker keeps its own document handle, as in :mod:`.extract`.
+_WORKER_DOC: fitz.Document | None = None
+_WORKER_IMAGES_DIR: Path | None = None
+
+
+def _init_worker(pdf_path: str, images_dir: Path) -> None:
+    global _WORKER_DOC, _WORKER_IMAGES_DIR
+    profiling.disable()
+    _WORKER_DOC = fitz.open(pdf_path)
+    _WORKER_IMAGES_DIR = images_dir
+
+
+def _run_worker_task(task: _Task) -> _Result:
+    if _WORKER_DOC is None or _WORKER_IMAGES_DIR is None:
+        raise RuntimeError("worker not initialised")
+    return _run_task(_WORKER_DOC, task, _WORKER_IMAGES_DIR)
+
+
+class _Scan(NamedTuple):
+    tasks: Dict[str, _Task]
+    pages: Dict[str, List[int]]
+    xrefs: Dict[str, List[int]]
+    groups: Dict[str, List[str]]
+
+
+def _scan(
+    doc: fitz.Document,
+    profiles: Sequence[AssetProfile],
+    pdf_fingerprint: str,
+    code_fingerprint: str,
+) -> _Scan:
+    """List the xrefs and pages to export, keyed by input fingerprint.
+
+    An image task is fingerprinted by its xref's raw stream and object
+    definition (plus those of its soft mask), so it stays fresh while the image
+    itself is unchanged. Rendered pages depend on everything the page draws and
+    are fingerprinted by the whole PDF.
+    """
+
+    tasks: Dict[str, _Task] = {}
+    pages: Dict[str, List[int]] = {}
+    xrefs: Dict[str, List[int]] = {}
+    groups: Dict[str, List[str]] = {}
+    by_xref: Dict[int, str] = {}
+
+    def add(task: _Task, page_number: int, group: str) -> None:
+        # Xrefs with identical definitions share a fingerprint and are decoded once.
+        tasks.setdefault(task.fingerprint, task)
+        task_pages = pages.setdefault(task.fingerprint, [])
+        if page_number not in task_pages:
+            task_pages.append(page_number)
+        task_groups = groups.setdefault(task.fingerprint, [])
+        if group not in task_groups:
+            task_groups.append(group)
+        task_xrefs = xrefs.setdefault(task.fingerprint, [])
+        if task.kind == "image" and task.key not in task_xrefs:
+            task_xrefs.append(task.key)
+
+    for profile in profiles:
+        for page_number in profile.page_span:
+            if page_number > doc.page_count:
+                break
+            images = []
+            if profile.mode == "images":
+                images = [
+                    (xref, smask)
+                    for xref, smask, width, height, *_ in doc[page_number - 1].get_images(full=True)
+                    if min(width, height) >= profile.min_size
+                ]
+            for xref, smask in images:
+                if xref not in by_xref:
+                    parts = [doc.xref_object(xref, compressed=True), doc.xref_stream_raw(xref) or b""]
+                    if smask:
+                        parts += [doc.xref_object(smask, compressed=True), doc.xref_stream_raw(smask) or b""]
+                    by_xref[xref] = fingerprint(code_fingerprint, "image", *parts)
+                add(_Task("image", xref, smask, 0, by_xref[xref]), page_number, profile.name)
+            if not images:
+                task_fingerprint = fingerprint(
+                    code_fingerprint, "render", pdf_fingerprint, str(page_number), str(profile.dpi)
+                )
+                add(_Task("render", page_number, 0, profile.dpi, task_fingerprint), page_number, profile.name)
+    return _Scan(tasks, pages, xrefs, groups)
+
+
+def _run_tasks(pdf_path: Path, tasks: List[_Task], images_dir: Path, workers: int) -> List[_Result]:
+    if workers > 1 and len(tasks) > 1:
+        chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(str(pdf_path), images_dir),
+        ) as pool:
+            return list(pool.map(_run_worker_task, tasks, chunksize=chunk_size))
+    with fitz.open(pdf_path) as doc:
+        return [_run_task(doc, task, images_dir) for task in tasks]
+
+
+def extract_assets(
+    pdf_path: Path,
+    *,
+    profiles: Sequence[AssetProfile],
+    assets_dir: Path = ASSETS_DIR,
+    workers: int = 1,
+    build_state: BuildState | None = None,
+    counts: Dict[str, int] | None = None,
+) -> AssetManifest:
+    """Export the images on the profiled pages into ``assets_dir`` and return their manifest.
+
+    Files go to ``assets_dir/images`` named by content hash; ``manifest.json``
+    lists them with their pages, xrefs and profile names, and is only rewritten
+    when it changes. Sources recorded in the previous manifest whose fingerprint
+    is unchanged are reused without decoding, and files no asset references any
+    more are removed. With ``build_state``, a run whose PDF, profiles and code
+    are unchanged returns the previous manifest without opening the PDF.
+
+    ``counts`` receives how many sources were decoded or reused and how many
+    files were written or removed.
+    """
+
+    pdf_path = Path(pdf_path)
+    if not pdf_path.exists():
+        raise FileNotFoundError(pdf_path)
+    images_dir = assets_dir / IMAGES_DIR_NAME
+    manifest_path = assets_dir / ASSET_MANIFEST_NAME
+    stats = {"decoded": 0, "reused": 0, "written": 0, "removed": 0}
+    if counts is not None:
+        counts.update(stats)
+        stats = counts
+
+    pdf_fingerprint = file_fingerprint(pdf_path)
+    code_fingerprint = source_fingerprint(sys.modules[__name__])
+    stage_key = str(manifest_path.resolve())
+    stage_fingerprint = fingerprint(
+        pdf_fingerprint, code_fingerprint, json_fingerprint([profile.model_dump() for profile in profiles])
+    )
+    if build_state is not None and build_state.is_fresh("assets", stage_key, stage_fingerprint):
+        manifest = load_asset_manifest(manifest_path)
+        stats["reused"] += sum(len(asset.sources) for asset in manifest.assets)
+        return manifest
+
+    previous: Dict[str, Asset] = {}
+    if manifest_path.exists():
+        for asset in load_asset_manifest(manifest_path).assets:
+            for source in asset.sources:
+                previous[source] = asset
+
+    images_dir.mkdir(parents=True, exist_ok=True)
+    with profiling.span("extract_assets", "stage"):
+        with profiling.span("assets.scan", "assets"):
+            with fitz.open(pdf_path) as doc:
+                scan = _scan(doc, profiles, pdf_fingerprint, code_fingerprint)
+
+        results: Dict[str, _Result] = {}
+        pending: List[_Task] = []
+        for task_fingerprint, task in scan.tasks.items():
+            asset = previous.get(task_fingerprint)
+            if asset is not None and (images_dir / Path(asset.path).name).exists():
+                results[task_fingerprint] = _Result(
+                    task_fingerprint, asset.sha256, asset.format, asset.width, asset.height, False
+                )
+            else:
+                pending.append(task)
+        for result in _run_tasks(pdf_path, pending, images_dir, workers):
+            results[result.fingerprint] = result
+        stats["decoded"] += len(pending)
+        stats["reused"] += len(scan.tasks) - len(pending)
+        stats["written"] += sum(result.written for result in results.values())
+
+    # Sources with the same bytes become one asset.
+    assets: Dict[str, Asset] = {}
+    for task_fingerprint, task in scan.tasks.items():
+        result = results[task_fingerprint]
+        asset = assets.get(result.sha256)
+        if asset is None:
+            asset = assets[result.sha256] = Asset(
+                path=f"{IMAGES_DIR_NAME}/{result.sha256[:20]}.{result.format}",
+                sha256=result.sha256,
+                format=result.format,
+                width=result.width,
+                height=result.height,
+                kind=task.kind,
+                pages=[],
+                groups=[],
+                sources=[],
+            )
+        asset.pages = sorted(set(asset.pages) | set(scan.pages[task_fingerprint]))
+        asset.groups.extend(group for group in scan.groups[task_fingerprint] if group not in asset.groups)
+        asset.xrefs = sorted(set(asset.xrefs) | set(scan.xrefs[task_fingerprint]))
+        asset.sources.append(task_fingerprint)
+
+    manifest = AssetManifest(
+        pdf_path=str(pdf_path),
+        assets=sorted(assets.values(), key=lambda asset: (asset.pages[0], asset.path)),
+    )
+    for asset in manifest.assets:
+        asset.sources.sort()
+
+    keep = {Path(asset.path).name for asset in manifest.assets}
+    for path in images_dir.iterdir():
+        if path.name not in keep:
+            path.unlink()
+            stats["removed"] += 1
+
+    encoded = json.dumps(manifest.model_dump(), indent=2, ensure_ascii=False).encode("utf-8")
+    if not manifest_path.exists() or manifest_path.read_bytes() != encoded:
+        manifest_path.write_bytes(encoded)
+
+    if build_state is not None:
+        outputs = [manifest_path.resolve(), *((assets_dir / asset.path).resolve() for asset in manifest.assets)]
+        build_state.record("assets", stage_key, stage_fingerprint, outputs)
+    return manifest
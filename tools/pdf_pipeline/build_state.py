@@ -0,0 +1,124 @@
+"""Content fingerprints that let pipeline stages skip work whose inputs are unchanged."""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping
+
+DEFAULT_STATE_PATH = Path("data/.build_state.json")
+
+_STATE_VERSION = 1
+
+
+def fingerprint(*parts: bytes | str) -> str:
+    """Hash an ordered sequence of values into a single hex digest."""
+
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def json_fingerprint(value: object) -> str:
+    """Fingerprint a JSON-compatible value independently of key order."""
+
+    return fingerprint(json.dumps(value, sort_keys=True, ensure_ascii=False))
+
+
+def file_fingerprint(path: Path) -> str:
+    """Fingerprint a file's bytes without loading it into memory at once."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(*objects: object) -> str:
+    """Fingerprint the source files that define the given modules or callables."""
+
+    parts: List[str] = []
+    for obj in objects:
+        source_file = inspect.getsourcefile(obj)  # type: ignore[arg-type]
+        if source_file is None:
+            raise ValueError(f"Cannot locate source for {obj!r}")
+        parts.append(file_fingerprint(Path(source_file)))
+    return fingerprint(*parts)
+
+
+class BuildState:
+    """Persistent record of the input fingerprints behind each stage output.
+
+    Records are grouped by stage (``extract``, ``transform``, ``compendia``) and
+    keyed by an output identifier. A record is fresh when its fingerprint matches
+    and every output it produced still exists on disk. Stages may keep extra
+    ``details`` with a record, e.g. to decide freshness without reading outputs.
+    """
+
+    def __init__(self, path: Path | None = None, stages: Dict[str, Dict[str, dict]] | None = None) -> None:
+        self.path = path
+        self._stages: Dict[str, Dict[str, dict]] = stages or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "BuildState":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+        if data.get("version") != _STATE_VERSION:
+            return cls(path)
+        return cls(path, data.get("stages", {}))
+
+    def is_fresh(self, stage: str, key: str, fingerprint_value: str) -> bool:
+        record = self._stages.get(stage, {}).get(key)
+        if record is None or record.get("fingerprint") != fingerprint_value:
+            return False
+        return all(Path(output).exists() for output in record.get("outputs", []))
+
+    def outputs(self, stage: str, key: str) -> List[Path]:
+        record = self._stages.get(stage, {}).get(key, {})
+        return [Path(output) for output in record.get("outputs", [])]
+
+    def record(
+        self,
+        stage: str,
+        key: str,
+        fingerprint_value: str,
+        outputs: Iterable[Path] = (),
+        details: Mapping[str, object] | None = None,
+    ) -> None:
+        entry: dict = {
+            "fingerprint": fingerprint_value,
+            "outputs": [str(output) for output in outputs],
+        }
+        if details:
+            entry["details"] = dict(details)
+        self._stages.setdefault(stage, {})[key] = entry
+
+    def details(self, stage: str, key: str) -> Dict[str, object]:
+        return dict(self._stages.get(stage, {}).get(key, {}).get("details", {}))
+
+    def forget(self, stage: str, key: str | None = None) -> None:
+        if key is None:
+            self._stages.pop(stage, None)
+        else:
+            self._stages.get(stage, {}).pop(key, None)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps({"version": _STATE_VERSION, "stages": self._stages}, indent=2, sort_keys=True),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
@@ -2,10 +2,27 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
-import uuid
+import os
+import shutil
+import sys
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from . import profiling, search_index
+from .build_state import BuildState, file_fingerprint, fingerprint, source_fingerprint
+from .crosslinks import CrossLinker, compendium_uuid, entity_names, title_names
+from .leveldb import read_leveldb_log, recover_directory, replace_directory, stage_leveldb, staging_path
+from .models import (
+    AncestryData,
+    AncestryEntity,
+    JournalData,
+    ProcessedPayload,
+    RecordEntry,
+    RecordsData,
+    load_payload,
+)
 
 
 def _paragraphs_to_html(paragraphs: Iterable[str]) -> str:
@@ -45,111 +62,791 @@ def _build_flaws(flaws: List[str]) -> dict:
     return {str(idx): {"value": [flaw]} for idx, flaw in enumerate(flaws)}
 
 
-def _read_processed(path: Path) -> dict:
-    return json.loads(path.read_text(encoding="utf-8"))
+MODULE_ID = "darksun-pf2e"
+ANCESTRY_PACK = "dark-sun-ancestries"
+JOURNAL_PACK = "dark-sun-rules"
+BESTIARY_PACK = "dark-sun-bestiary"
+SPELL_PACK = "dark-sun-spells"
 
+PACK_FORMATS = ("nedb", "leveldb")
 
-def build_ancestry_pack(processed_path: Path, output_path: Path) -> Path:
-    """Create a Foundry-ready ancestry pack from processed ancestry data."""
+# Embedded collections that Foundry's LevelDB packs store as separate documents
+# under ``!<collection>.<field>!<parent id>.<id>``.
+_EMBEDDED_FIELDS = {
+    "actors": ("items", "effects"),
+    "items": ("effects",),
+    "journal": ("pages",),
+}
 
-    processed = _read_processed(processed_path)
-    entities = processed.get("data", {}).get("entities", [])
 
-    entries = []
+def stable_id(*parts: str) -> str:
+    """Derive a 16-character Foundry document ID from a document's source identity.
+
+    The same slug always maps to the same ID, so rebuilding a pack keeps world
+    links and ``@UUID`` references intact.
+    """
+
+    digest = hashlib.sha256(":".join((MODULE_ID,) + parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_pack_hashes(path: Path) -> Tuple[Dict[str, str], str | None]:
+    """Return per-entry hashes of an existing NeDB pack and a digest of the whole file."""
+
+    hashes: Dict[str, str] = {}
+    if not path.exists():
+        return hashes, None
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for raw in handle:
+            digest.update(raw)
+            line = raw.rstrip(b"\n")
+            if not line.strip():
+                continue
+            hashes[json.loads(line)["_id"]] = _content_hash(line)
+    return hashes, digest.hexdigest()
+
+
+def _tally(counts: Dict[str, int], previous_hash: str | None, new_hash: str) -> None:
+    if previous_hash is None:
+        counts["added"] += 1
+    elif previous_hash == new_hash:
+        counts["unchanged"] += 1
+    else:
+        counts["updated"] += 1
+
+
+def _write_nedb_pack(entries: Iterable[dict], output_path: Path) -> Dict[str, int]:
+    previous, previous_digest = _read_pack_hashes(output_path)
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    digest = hashlib.sha256()
+    written = 0
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = output_path.with_name(f".{output_path.name}.tmp")
+    try:
+        with profiling.span("compendium.write_pack", "io", pack=output_path.name) as metrics:
+            with staging.open("wb") as handle:
+                for entry in entries:
+                    line = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+                    _tally(counts, previous.pop(entry["_id"], None), _content_hash(line))
+                    if written:
+                        line = b"\n" + line
+                    handle.write(line)
+                    digest.update(line)
+                    written += len(line)
+            metrics["bytes_written"] = written
+        counts["removed"] = len(previous)
+
+        if digest.hexdigest() != previous_digest:
+            os.replace(staging, output_path)
+    finally:
+        staging.unlink(missing_ok=True)
+    return counts
+
+
+def _leveldb_documents(entry: dict, collection: str) -> List[Tuple[bytes, bytes]]:
+    document = dict(entry)
+    documents: List[Tuple[bytes, bytes]] = []
+    for field in _EMBEDDED_FIELDS.get(collection, ()):
+        children = document.get(field) or []
+        ids = []
+        for child in children:
+            key = f"!{collection}.{field}!{document['_id']}.{child['_id']}"
+            documents.append((key.encode("utf-8"), json.dumps(child, ensure_ascii=False).encode("utf-8")))
+            ids.append(child["_id"])
+        document[field] = ids
+    key = f"!{collection}!{document['_id']}"
+    documents.append((key.encode("utf-8"), json.dumps(document, ensure_ascii=False).encode("utf-8")))
+    return documents
+
+
+def _write_leveldb_pack(entries: Iterable[dict], output_path: Path, collection: str) -> Dict[str, int]:
+    recover_directory(output_path)
+    previous = {key: _content_hash(value) for key, value in read_leveldb_log(output_path)}
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    top_prefix = f"!{collection}!".encode("utf-8")
+    changed = False
+
+    def documents() -> Iterator[Tuple[bytes, bytes]]:
+        nonlocal changed
+        for entry in entries:
+            entry_documents = _leveldb_documents(entry, collection)
+            entry_hashes = [(key, _content_hash(value)) for key, value in entry_documents]
+            top_key, top_hash = entry_hashes[-1]
+            unchanged = all(previous.get(key) == value_hash for key, value_hash in entry_hashes)
+            _tally(counts, previous.get(top_key), top_hash if unchanged else "")
+            for key, _ in entry_hashes:
+                previous.pop(key, None)
+            changed = changed or not unchanged
+            yield from entry_documents
+
+    staging = staging_path(output_path)
+    try:
+        with profiling.span("compendium.write_pack", "io", pack=output_path.name) as metrics:
+            metrics["bytes_written"] = stage_leveldb(staging, documents())
+        counts["removed"] = sum(1 for key in previous if key.startswith(top_prefix))
+        if changed or previous or not output_path.is_dir():
+            replace_directory(staging, output_path)
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging)
+    return counts
+
+
+def write_pack(
+    entries: Iterable[dict],
+    output_path: Path,
+    *,
+    pack_format: str = "nedb",
+    collection: str = "items",
+) -> Dict[str, int]:
+    """Write pack entries, leaving the pack untouched when no entry changed.
+
+    ``pack_format`` selects the legacy NeDB JSON-lines file (``"nedb"``) or the
+    LevelDB directory Foundry v11+ reads natively (``"leveldb"``); the latter
+    stores each document under its ``collection`` (``items``, ``journal``) and
+    splits embedded pages and effects into their own documents.
+
+    Entries are serialized one at a time into a temporary file (or directory)
+    beside ``output_path``, which then replaces the pack, so ``entries`` may be
+    a generator and a failed build never truncates a pack. A file replaces the
+    old pack atomically; a directory takes two renames and the old pack is
+    restored if the second fails (see :func:`replace_directory`).
+    Entries are compared by ``_id`` and content against the existing pack; the
+    returned counts report how many were added, updated, unchanged or removed.
+    """
+
+    if pack_format == "leveldb":
+        return _write_leveldb_pack(entries, output_path, collection)
+    if pack_format != "nedb":
+        raise ValueError(f"Unknown pack format '{pack_format}'; expected one of {PACK_FORMATS}")
+    return _write_nedb_pack(entries, output_path)
+
+
+def update_module_pack_paths(module_path: Path, packs_dir: Path, pack_format: str) -> bool:
+    """Point the ``path`` of every pack listed in ``module_path`` at its ``pack_format`` output.
+
+    NeDB packs are ``<name>.db`` files and LevelDB packs are ``<name>/``
+    directories under ``packs_dir``. Nothing is written when ``packs_dir`` lies
+    outside the module directory (a scratch build), when the manifest is missing
+    or when every path already matches; returns whether the manifest changed.
+    """
+
+    if pack_format not in PACK_FORMATS:
+        raise ValueError(f"Unknown pack format '{pack_format}'; expected one of {PACK_FORMATS}")
+    if not module_path.exists():
+        return False
+    try:
+        relative = packs_dir.resolve().relative_to(module_path.resolve().parent)
+    except ValueError:
+        return False
+
+    module = json.loads(module_path.read_text(encoding="utf-8"))
+    suffix = ".db" if pack_format == "nedb" else ""
+    changed = False
+    for pack in module.get("packs", []):
+        path = (relative / f"{pack['name']}{suffix}").as_posix()
+        if pack.get("path") != path:
+            pack["path"] = path
+            changed = True
+    if not changed:
+        return False
+
+    tmp_path = module_path.with_name(module_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(module, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    os.replace(tmp_path, module_path)
+    return True
+
+
+# Parsed payloads keyed by path and (mtime, size). Only kept while a long-running
+# session has turned it on with :func:`cache_payloads`; one-shot builds stream.
+_PAYLOADS: "Dict[Path, Tuple[Tuple[int, int], ProcessedPayload]] | None" = None
+
+
+def cache_payloads(enabled: bool = True) -> None:
+    """Keep parsed processed payloads in memory between builds, or drop them."""
+
+    global _PAYLOADS
+    _PAYLOADS = {} if enabled else None
+
+
+def _read_processed(path: Path) -> ProcessedPayload:
+    stamp = None
+    if _PAYLOADS is not None:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _PAYLOADS.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    with profiling.span("compendium.read_processed", "io", file=path.name) as metrics:
+        raw = path.read_bytes()
+        metrics["bytes_read"] = len(raw)
+        processed = load_payload(raw)
+    if _PAYLOADS is not None and stamp is not None:
+        _PAYLOADS[path] = (stamp, processed)
+    return processed
+
+
+def _ancestry_entities(processed: ProcessedPayload) -> List[AncestryEntity]:
+    return processed.data.entities if isinstance(processed.data, AncestryData) else []
+
+
+def _records(processed: ProcessedPayload) -> RecordsData:
+    if not isinstance(processed.data, RecordsData):
+        raise ValueError(f"Processed payload '{processed.slug}' holds no records")
+    return processed.data
+
+
+def _inputs_fingerprint(paths: Iterable[Path], *options: str) -> str:
+    parts = [source_fingerprint(sys.modules[__name__]), *options]
+    for path in paths:
+        parts.extend([path.name, file_fingerprint(path)])
+    return fingerprint(*parts)
+
+
+def iter_ancestry_entries(entities: Iterable[AncestryEntity]) -> Iterator[dict]:
+    """Yield ancestry item documents for processed ancestry entities, one at a time."""
+
     for entity in entities:
-        pf2e = entity.get("pf2e", {})
-        description_html = _description_to_html(entity.get("description", ""))
-        boosts = pf2e.get("boosts", [])
-        flaws = pf2e.get("flaws", [])
+        pf2e = entity.pf2e
+        with profiling.span("compendium.description_to_html", "compendium", entity=entity.name):
+            description_html = _description_to_html(entity.description)
 
         entry = {
-            "_id": uuid.uuid4().hex,
-            "name": entity["name"],
+            "_id": stable_id(ANCESTRY_PACK, entity.slug or entity.name),
+            "name": entity.name,
             "type": "ancestry",
             "img": "systems/pf2e/icons/default-icons/ancestry.svg",
             "system": {
                 "description": {"value": description_html},
-                "hp": pf2e.get("hit_points", 8),
-                "size": {"value": pf2e.get("size", "medium")},
+                "hp": pf2e.hit_points,
+                "size": {"value": pf2e.size},
                 "reach": {"value": 5},
-                "speed": {"value": pf2e.get("speed", 25), "otherSpeeds": []},
-                "boosts": _build_boosts(boosts),
-                "flaws": _build_flaws(flaws),
+                "speed": {"value": pf2e.speed, "otherSpeeds": []},
+                "boosts": _build_boosts(pf2e.boosts),
+                "flaws": _build_flaws(pf2e.flaws),
                 "languages": {
-                    "value": pf2e.get("languages", []),
+                    "value": pf2e.languages,
                     "custom": "",
                 },
                 "traits": {
-                    "value": pf2e.get("traits", []),
+                    "value": pf2e.traits,
                     "rarity": "uncommon",
                     "custom": "",
                 },
                 "vision": {"value": "normal"},
-                "heritages": pf2e.get("heritages", []),
-                "additionalFeatures": pf2e.get("additional_features", []),
+                "heritages": pf2e.heritages,
+                "additionalFeatures": pf2e.additional_features,
             },
             "effects": [],
             "flags": {},
-            "source": {"value": entity.get("source_section", "Dark Sun")},
+            "source": {"value": entity.source_section or "Dark Sun"},
         }
-        entries.append(entry)
+        yield entry
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(
-        "\n".join(json.dumps(entry, ensure_ascii=False) for entry in entries),
-        encoding="utf-8",
-    )
-    return output_path
 
+def _journal_data(processed: ProcessedPayload) -> JournalData:
+    return processed.data if isinstance(processed.data, JournalData) else JournalData(content="")
 
-def build_journal_pack(processed_dir: Path, output_path: Path) -> Path:
-    """Create a journal compendium that mirrors the extracted source material."""
 
-    processed_files = sorted(processed_dir.glob("*.json"))
-    entries = []
+def _journal_title(processed: ProcessedPayload) -> str | None:
+    return _journal_data(processed).title or processed.source_section or processed.slug
+
+
+def _journal_page(processed: ProcessedPayload, sort: int) -> dict:
+    title = _journal_title(processed)
+    slug = processed.slug or title
+    return {
+        "_id": stable_id(JOURNAL_PACK, slug, "page"),
+        "name": title,
+        "type": "text",
+        "text": {
+            "format": 1,
+            "content": _journal_data(processed).content,
+        },
+        "title": {"show": False},
+        "image": {"displayMode": 0},
+        "sort": sort,
+    }
+
+
+def _journal_entry(processed: ProcessedPayload, pages: List[dict], sort: int) -> dict:
+    title = _journal_title(processed)
+    return {
+        "_id": stable_id(JOURNAL_PACK, processed.slug or title),
+        "name": title,
+        "type": "JournalEntry",
+        "flags": {
+            "darksun-pf2e": {
+                "slug": processed.slug,
+                "source_pages": _journal_data(processed).source_pages,
+            }
+        },
+        "ownership": {},
+        "pages": pages,
+        "sort": sort,
+    }
+
+
+def iter_journal_entries(processed_payloads: Iterable[ProcessedPayload]) -> Iterator[dict]:
+    """Yield journal entry documents for processed journal payloads, one at a time."""
+
     sort = 1000
-    for processed_file in processed_files:
-        processed = _read_processed(processed_file)
-        data = processed.get("data", {})
-        title = data.get("title") or processed.get("source_section") or processed.get("slug")
-        if not title:
+    for processed in processed_payloads:
+        if not _journal_title(processed):
             continue
-        content = data.get("content", "")
+        yield _journal_entry(processed, [_journal_page(processed, sort)], sort)
+        sort += 1000
 
-        page_id = uuid.uuid4().hex
-        entry = {
-            "_id": uuid.uuid4().hex,
-            "name": title,
-            "type": "JournalEntry",
-            "flags": {
-                "darksun-pf2e": {
-                    "slug": processed.get("slug"),
-                    "source_pages": data.get("source_pages"),
-                }
+
+def _record_stats_html(fields: Dict[str, str]) -> str:
+    rows = "".join(
+        f"<tr><th>{name.replace('_', ' ').title()}</th><td>{value}</td></tr>" for name, value in fields.items()
+    )
+    return f"<table>{rows}</table>" if rows else ""
+
+
+def _record_flags(record: RecordEntry, source_pages: List | None) -> dict:
+    return {
+        "darksun-pf2e": {
+            "slug": record.slug,
+            "source_pages": source_pages,
+            "stats": record.fields,
+        }
+    }
+
+
+def iter_bestiary_entries(processed: ProcessedPayload) -> Iterator[dict]:
+    """Yield NPC actor documents for the monster records of a processed bestiary.
+
+    The AD&D statistics are not converted; they are kept in the actor's flags and
+    shown in its public notes alongside the creature's text.
+    """
+
+    data = _records(processed)
+    for record in data.records:
+        if not record.name:
+            # Untitled records are reported by validation; there is nothing to name the actor.
+            continue
+        notes = _record_stats_html(record.fields) + _description_to_html(record.text)
+        yield {
+            "_id": stable_id(BESTIARY_PACK, record.slug),
+            "name": record.name,
+            "type": "npc",
+            "img": "systems/pf2e/icons/default-icons/npc.svg",
+            "system": {
+                "details": {"publicNotes": notes, "source": {"value": processed.source_section or "Dark Sun"}},
+                "traits": {"value": [], "rarity": "common"},
             },
-            "ownership": {},
-            "pages": [
-                {
-                    "_id": page_id,
-                    "name": title,
-                    "type": "text",
-                    "text": {
-                        "format": 1,
-                        "content": content,
-                    },
-                    "title": {"show": False},
-                    "image": {"displayMode": 0},
-                    "sort": sort,
-                }
-            ],
-            "sort": sort,
+            "items": [],
+            "effects": [],
+            "flags": _record_flags(record, data.source_pages),
         }
-        sort += 1000
-        entries.append(entry)
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(
-        "\n".join(json.dumps(entry, ensure_ascii=False) for entry in entries),
-        encoding="utf-8",
+
+_SPELL_LEVELS = {
+    word: index
+    for index, word in enumerate(
+        ("first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth"), start=1
     )
+}
+
+
+def _spell_level(label: str | None) -> int:
+    words = (label or "").replace("-", " ").split()
+    return _SPELL_LEVELS.get(words[0].lower(), 1) if words else 1
+
+
+def iter_spell_entries(processed: ProcessedPayload) -> Iterator[dict]:
+    """Yield spell item documents for the spell records of a processed spell chapter."""
+
+    data = _records(processed)
+    for record in data.records:
+        if not record.name:
+            continue
+        fields = record.fields
+        description = _record_stats_html(fields) + _description_to_html(record.text)
+        yield {
+            "_id": stable_id(SPELL_PACK, record.slug),
+            "name": record.name,
+            "type": "spell",
+            "img": "systems/pf2e/icons/default-icons/spell.svg",
+            "system": {
+                "description": {"value": description},
+                "level": {"value": _spell_level(fields.get("level"))},
+                "range": {"value": fields.get("range", "")},
+                "duration": {"value": fields.get("duration", "")},
+                "time": {"value": fields.get("casting_time", "")},
+                "area": None,
+                "traits": {"value": [], "rarity": "uncommon", "traditions": ["arcane"]},
+            },
+            "effects": [],
+            "flags": _record_flags(record, data.source_pages),
+        }
+
+
+class _OutlineNode(NamedTuple):
+    path: Path
+    slug: str
+    level: int
+    parent_slugs: Tuple[str, ...]
+    start_page: int
+    title: str | None
+
+
+def _journal_outline(
+    processed_files: Iterable[Path], load: Callable[[Path], ProcessedPayload]
+) -> List[_OutlineNode]:
+    outline = []
+    for path in processed_files:
+        processed = load(path)
+        data = _journal_data(processed)
+        source_pages = data.source_pages or [None]
+        slug = processed.slug or path.stem
+        outline.append(
+            _OutlineNode(
+                path=path,
+                slug=slug,
+                level=data.metadata.level or 0,
+                # A section whose slug repeats its parent's (e.g. a booklet whose
+                # first chapter shares its title) must not count as its own child.
+                parent_slugs=tuple(parent for parent in data.metadata.parent_slugs if parent != slug),
+                start_page=source_pages[0] or 0,
+                title=_journal_title(processed),
+            )
+        )
+    return outline
+
+
+def _chapter_groups(outline: List[_OutlineNode]) -> List[List[_OutlineNode]]:
+    """Group journal sections under their outermost processed ancestor.
+
+    Sections nest by page range, so a parent's text repeats its subsections'. A
+    parent only keeps its own page when it starts before its first subsection,
+    which preserves introductory pages without duplicating every subsection.
+    """
+
+    slugs = {node.slug for node in outline}
+    first_child_page: Dict[str, int] = {}
+    for node in outline:
+        parents = [slug for slug in node.parent_slugs if slug in slugs]
+        if parents:
+            parent = parents[-1]
+            first_child_page[parent] = min(first_child_page.get(parent, node.start_page), node.start_page)
+
+    groups: Dict[str, List[_OutlineNode]] = {}
+    for node in sorted(outline, key=lambda node: (node.start_page, node.level)):
+        root = next((slug for slug in node.parent_slugs if slug in slugs), node.slug)
+        group = groups.setdefault(root, [])
+        if node.slug not in first_child_page or node.start_page < first_child_page[node.slug]:
+            group.append(node)
+
+    # A parent may only be dropped when a subsection starts on its first page;
+    # otherwise its opening pages would silently vanish from the pack.
+    kept = {node.slug for group in groups.values() for node in group}
+    for node in outline:
+        if node.slug not in kept and first_child_page.get(node.slug) != node.start_page:
+            raise ValueError(f"Journal section '{node.slug}' would be dropped from its chapter")
+    return [group for group in groups.values() if group]
+
+
+def iter_journal_chapters(
+    processed_files: Iterable[Path], load: Callable[[Path], ProcessedPayload] = _read_processed
+) -> Iterator[dict]:
+    """Yield one journal entry per chapter, with a page per subsection.
+
+    Chapters are found from the ``parent_slugs`` and ``level`` metadata written by
+    the journal transformer; pages keep document order. Files are read once for
+    their metadata and again, one chapter at a time, for their content. Pass
+    ``load`` to take payloads from memory instead of reading ``processed_files``.
+    """
+
+    outline = _journal_outline(processed_files, load)
+    roots = {node.slug: node for node in outline}
+    sort = 1000
+    for group in _chapter_groups(outline):
+        root_slug = next((slug for slug in group[0].parent_slugs if slug in roots), group[0].slug)
+        chapter = load(roots[root_slug].path)
+        if not _journal_title(chapter):
+            continue
+        pages = []
+        for index, node in enumerate(group, start=1):
+            processed = chapter if node.slug == root_slug else load(node.path)
+            if _journal_title(processed):
+                pages.append(_journal_page(processed, index * 1000))
+        yield _journal_entry(chapter, pages, sort)
+        sort += 1000
+
+
+# Mapping files whose entities become pack documents, and the pack they land in.
+_MAPPING_PACKS = {"ancestries.json": (ANCESTRY_PACK, "Item")}
+
+
+def build_cross_linker(
+    mappings_dir: Path,
+    journals_dir: Path | None = None,
+    group_chapters: bool = False,
+) -> CrossLinker:
+    """Collect linkable names from the mappings and journal titles.
+
+    Entity names, headings and aliases come first so they win over journal
+    titles that share a name. Journal titles resolve to the entry or, when
+    ``group_chapters`` matches the journal pack's layout, to the chapter page;
+    their subtitles only match with the same case.
+    """
+
+    targets: List[Tuple[str, str]] = []
+    subtitles: List[str] = []
+    for mapping_name, (pack, document_type) in _MAPPING_PACKS.items():
+        mapping_path = mappings_dir / mapping_name
+        if not mapping_path.exists():
+            continue
+        for entity in json.loads(mapping_path.read_text(encoding="utf-8")).get("entities", []):
+            uuid = compendium_uuid(MODULE_ID, pack, document_type, stable_id(pack, entity.get("slug") or entity["name"]))
+            targets.extend((name, uuid) for name in entity_names(entity))
+
+    if journals_dir is not None and journals_dir.exists():
+        outline = _journal_outline(sorted(journals_dir.glob("*.json")), _read_processed)
+        if group_chapters:
+            slugs = {node.slug for node in outline}
+            for group in _chapter_groups(outline):
+                root_slug = next((slug for slug in group[0].parent_slugs if slug in slugs), group[0].slug)
+                entry_id = stable_id(JOURNAL_PACK, root_slug)
+                for node in group:
+                    page_id = None if node.slug == root_slug else stable_id(JOURNAL_PACK, node.slug, "page")
+                    uuid = compendium_uuid(MODULE_ID, JOURNAL_PACK, "JournalEntry", entry_id, page_id)
+                    names = title_names(node.title or "")
+                    targets.extend((name, uuid) for name in names)
+                    subtitles.extend(names[1:])
+        else:
+            for node in outline:
+                uuid = compendium_uuid(MODULE_ID, JOURNAL_PACK, "JournalEntry", stable_id(JOURNAL_PACK, node.slug))
+                names = title_names(node.title or "")
+                targets.extend((name, uuid) for name in names)
+                subtitles.extend(names[1:])
+
+    return CrossLinker(targets, match_case=subtitles)
+
+
+def link_entries(entries: Iterable[dict], linker: CrossLinker, pack: str, document_type: str) -> Iterator[dict]:
+    """Rewrite the HTML of streamed pack entries with cross-reference links.
+
+    Item descriptions, actor notes and journal page content are linked; an entry
+    never links to itself or to one of its own pages.
+    """
+
+    for entry in entries:
+        own = {compendium_uuid(MODULE_ID, pack, document_type, entry["_id"])}
+        own.update(
+            compendium_uuid(MODULE_ID, pack, document_type, entry["_id"], page["_id"])
+            for page in entry.get("pages", [])
+        )
+        with profiling.span("compendium.link", "compendium", entry=entry.get("name")):
+            system = entry.get("system", {})
+            description = system.get("description")
+            if description and description.get("value"):
+                description["value"] = linker.link(description["value"], own)
+            details = system.get("details")
+            if details and details.get("publicNotes"):
+                details["publicNotes"] = linker.link(details["publicNotes"], own)
+            for page in entry.get("pages", []):
+                text = page.get("text", {})
+                if text.get("content"):
+                    text["content"] = linker.link(text["content"], own)
+        yield entry
+
+
+def build_ancestry_pack(
+    processed_path: Path,
+    output_path: Path,
+    build_state: BuildState | None = None,
+    pack_format: str = "nedb",
+    linker: CrossLinker | None = None,
+) -> Path:
+    """Create a Foundry-ready ancestry pack from processed ancestry data.
+
+    With ``build_state``, the pack is left alone when neither the processed data
+    nor this module changed since it was last built. See :func:`write_pack` for
+    ``pack_format``. With ``linker``, descriptions get cross-reference links
+    (see :func:`build_cross_linker`).
+    """
+
+    pack_fingerprint = ""
+    if build_state is not None:
+        pack_fingerprint = _inputs_fingerprint([processed_path], linker.fingerprint if linker else "")
+        if build_state.is_fresh("compendia", str(output_path), pack_fingerprint):
+            return output_path
+
+    processed = _read_processed(processed_path)
+    entries = iter_ancestry_entries(_ancestry_entities(processed))
+    if linker is not None:
+        entries = link_entries(entries, linker, ANCESTRY_PACK, "Item")
+    write_pack(entries, output_path, pack_format=pack_format, collection="items")
+    if build_state is not None:
+        build_state.record("compendia", str(output_path), pack_fingerprint, [output_path])
+    return output_path
+
+
+def build_journal_pack(
+    processed_dir: Path,
+    output_path: Path,
+    build_state: BuildState | None = None,
+    pack_format: str = "nedb",
+    group_chapters: bool = False,
+    linker: CrossLinker | None = None,
+) -> Path:
+    """Create a journal compendium that mirrors the extracted source material.
+
+    By default every processed section becomes its own entry with a single
+    page. With ``group_chapters``, subsections are gathered into one entry per
+    chapter with a page each (see :func:`iter_journal_chapters`), so Foundry
+    renders them page by page.
+
+    Skipped under ``build_state`` and linked with ``linker`` in the same way as
+    :func:`build_ancestry_pack`.
+    """
+
+    processed_files = sorted(processed_dir.glob("*.json"))
+
+    pack_fingerprint = ""
+    if build_state is not None:
+        pack_fingerprint = _inputs_fingerprint(
+            processed_files,
+            "chapters" if group_chapters else "sections",
+            linker.fingerprint if linker else "",
+        )
+        if build_state.is_fresh("compendia", str(output_path), pack_fingerprint):
+            return output_path
+
+    if group_chapters:
+        entries = iter_journal_chapters(processed_files)
+    else:
+        entries = iter_journal_entries(_read_processed(path) for path in processed_files)
+    if linker is not None:
+        entries = link_entries(entries, linker, JOURNAL_PACK, "JournalEntry")
+    write_pack(entries, output_path, pack_format=pack_format, collection="journal")
+    if build_state is not None:
+        build_state.record("compendia", str(output_path), pack_fingerprint, [output_path])
+    return output_path
+
+
+def _build_record_pack(
+    processed_path: Path,
+    output_path: Path,
+    iter_entries: Callable[[ProcessedPayload], Iterator[dict]],
+    pack: str,
+    document_type: str,
+    build_state: BuildState | None,
+    pack_format: str,
+    linker: CrossLinker | None,
+) -> Path:
+    pack_fingerprint = ""
+    if build_state is not None:
+        pack_fingerprint = _inputs_fingerprint([processed_path], linker.fingerprint if linker else "")
+        if build_state.is_fresh("compendia", str(output_path), pack_fingerprint):
+            return output_path
+
+    entries = iter_entries(_read_processed(processed_path))
+    if linker is not None:
+        entries = link_entries(entries, linker, pack, document_type)
+    collection = "actors" if document_type == "Actor" else "items"
+    write_pack(entries, output_path, pack_format=pack_format, collection=collection)
+    if build_state is not None:
+        build_state.record("compendia", str(output_path), pack_fingerprint, [output_path])
     return output_path
+
+
+def build_bestiary_pack(
+    processed_path: Path,
+    output_path: Path,
+    build_state: BuildState | None = None,
+    pack_format: str = "nedb",
+    linker: CrossLinker | None = None,
+) -> Path:
+    """Create an actor compendium from the segmented monster records.
+
+    Skipped under ``build_state`` and linked with ``linker`` in the same way as
+    :func:`build_ancestry_pack`.
+    """
+
+    return _build_record_pack(
+        processed_path, output_path, iter_bestiary_entries, BESTIARY_PACK, "Actor", build_state, pack_format, linker
+    )
+
+
+def build_spell_pack(
+    processed_path: Path,
+    output_path: Path,
+    build_state: BuildState | None = None,
+    pack_format: str = "nedb",
+    linker: CrossLinker | None = None,
+) -> Path:
+    """Create a spell item compendium from the segmented spell records.
+
+    Skipped under ``build_state`` and linked with ``linker`` in the same way as
+    :func:`build_ancestry_pack`.
+    """
+
+    return _build_record_pack(
+        processed_path, output_path, iter_spell_entries, SPELL_PACK, "Item", build_state, pack_format, linker
+    )
+
+
+def build_search_index(
+    output_dir: Path,
+    *,
+    ancestries_path: Path | None = None,
+    journals_dir: Path | None = None,
+    group_chapters: bool = False,
+    build_state: BuildState | None = None,
+    linker: CrossLinker | None = None,
+) -> Path:
+    """Write the sharded full-text index for the ancestry and journal packs.
+
+    Documents are taken from the same entry generators as the packs, so postings
+    carry the pack's entry and page IDs; pass the ``group_chapters`` and
+    ``linker`` used for the packs, so the index holds the content the packs ship.
+    Skipped under ``build_state`` when no input changed; otherwise only changed
+    entries are re-indexed (see :mod:`.search_index`).
+    """
+
+    processed_files = []
+    if ancestries_path is not None and ancestries_path.exists():
+        processed_files.append(ancestries_path)
+    journal_files = sorted(journals_dir.glob("*.json")) if journals_dir is not None and journals_dir.exists() else []
+
+    index_fingerprint = ""
+    if build_state is not None:
+        index_fingerprint = fingerprint(
+            _inputs_fingerprint(processed_files + journal_files, "chapters" if group_chapters else "sections"),
+            source_fingerprint(search_index),
+            linker.fingerprint if linker else "",
+        )
+        if build_state.is_fresh("compendia", str(output_dir), index_fingerprint):
+            return output_dir
+
+    def documents() -> Iterator[search_index.SearchDocument]:
+        if processed_files:
+            entities = _ancestry_entities(_read_processed(ancestries_path))
+            ancestry_entries = iter_ancestry_entries(entities)
+            if linker is not None:
+                ancestry_entries = link_entries(ancestry_entries, linker, ANCESTRY_PACK, "Item")
+            yield from search_index.iter_entry_documents(ANCESTRY_PACK, "Item", ancestry_entries)
+        if group_chapters:
+            journal_entries = iter_journal_chapters(journal_files)
+        else:
+            journal_entries = iter_journal_entries(_read_processed(path) for path in journal_files)
+        if linker is not None:
+            journal_entries = link_entries(journal_entries, linker, JOURNAL_PACK, "JournalEntry")
+        yield from search_index.iter_entry_documents(JOURNAL_PACK, "JournalEntry", journal_entries)
+
+    with profiling.span("compendium.search_index", "compendium"):
+        search_index.build_search_index(documents(), output_dir)
+    if build_state is not None:
+        build_state.record("compendia", str(output_dir), index_fingerprint, [output_dir / search_index.INDEX_NAME])
+    return output_dir
@@ -0,0 +1,136 @@
+"""Cross-reference linking of entity names inside pack content.
+
+Every linkable name (ancestry names and aliases from the mappings, journal
+titles) is compiled into one :class:`~.matching.AhoCorasick` automaton, so each
+document is rewritten in a single scan whose cost depends on its length, not on
+the number of names.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from .build_state import json_fingerprint
+from .matching import AhoCorasick
+
+# Names shorter than this are too likely to match ordinary words.
+MIN_NAME_LENGTH = 3
+
+# Markup that must not be rewritten: tags and existing document links.
+_PROTECTED = re.compile(r"<[^>]*>|@UUID\[[^\]]*\](?:\{[^}]*\})?")
+
+# Length-preserving lower-casing, so match offsets index the original text.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class CrossLinker:
+    """Insert ``@UUID[...]{...}`` links for known names into HTML content.
+
+    ``targets`` maps names to document UUIDs; matching ignores ASCII case,
+    except for names listed in ``match_case``, and only accepts whole words.
+    When a name is registered twice the first UUID wins, so callers list their
+    most specific sources first. Only the first
+    mention of each target in a document is linked, and text inside tags or
+    existing links is left alone.
+    """
+
+    def __init__(self, targets: Iterable[Tuple[str, str]], match_case: Iterable[str] = ()) -> None:
+        cased = {name.strip() for name in match_case}
+        self._uuids: Dict[str, str] = {}
+        # key -> the exact spelling a match must have
+        self._exact: Dict[str, str] = {}
+        for name, uuid in targets:
+            key = name.strip().translate(_ASCII_LOWER)
+            if len(key) >= MIN_NAME_LENGTH and key not in self._uuids:
+                self._uuids[key] = uuid
+                if name.strip() in cased:
+                    self._exact[key] = name.strip()
+        self._matcher = AhoCorasick(self._uuids)
+        self.fingerprint = json_fingerprint([sorted(self._uuids.items()), sorted(self._exact.items())])
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    def _candidates(self, text: str) -> List[Tuple[int, int, str]]:
+        lowered = text.translate(_ASCII_LOWER)
+        patterns = self._matcher.patterns
+        found = []
+        for start, index in self._matcher.iter_matches(lowered):
+            key = patterns[index]
+            end = start + len(key)
+            if key in self._exact and text[start:end] != self._exact[key]:
+                continue
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            found.append((start, end, self._uuids[key]))
+        # Leftmost, then longest: "Half-giants" wins over "Half-giant".
+        found.sort(key=lambda match: (match[0], match[0] - match[1]))
+        return found
+
+    def link(self, html: str, exclude: Iterable[str] = ()) -> str:
+        """Return ``html`` with the first mention of each target linked.
+
+        UUIDs in ``exclude`` (typically the document's own) are never linked.
+        """
+
+        if not self._uuids or not html:
+            return html
+        protected = [match.span() for match in _PROTECTED.finditer(html)]
+        linked = set(exclude)
+        parts: List[str] = []
+        cursor = 0
+        guard = 0
+        for start, end, uuid in self._candidates(html):
+            if start < cursor or uuid in linked:
+                continue
+            while guard < len(protected) and protected[guard][1] <= start:
+                guard += 1
+            if guard < len(protected) and protected[guard][0] < end:
+                continue
+            parts.append(html[cursor:start])
+            parts.append(f"@UUID[{uuid}]{{{html[start:end]}}}")
+            linked.add(uuid)
+            cursor = end
+        parts.append(html[cursor:])
+        return "".join(parts)
+
+
+def compendium_uuid(module_id: str, pack: str, document_type: str, document_id: str, page_id: str | None = None) -> str:
+    uuid = f"Compendium.{module_id}.{pack}.{document_type}.{document_id}"
+    if page_id is not None:
+        uuid += f".JournalEntryPage.{page_id}"
+    return uuid
+
+
+def entity_names(entity: Mapping[str, object]) -> List[str]:
+    """Return an entity's name followed by its heading and aliases, without duplicates."""
+
+    names = [entity.get("name"), entity.get("heading"), *(entity.get("aliases") or [])]  # type: ignore[misc]
+    unique: List[str] = []
+    for name in names:
+        if isinstance(name, str) and name and name not in unique:
+            unique.append(name)
+    return unique
+
+
+def title_names(title: str) -> List[str]:
+    """Return a journal title plus its subtitle when that has several words.
+
+    ``"Chapter Six: Money and Equipment"`` also yields ``"Money and Equipment"``;
+    one-word subtitles such as ``"Combat"`` would match too much prose. Link
+    subtitles with their case (``match_case``) so that ``"The World of Athas"``
+    does not link "the world of Athas" in running text.
+    """
+
+    names = [title]
+    _, _, subtitle = title.partition(": ")
+    if " " in subtitle.strip():
+        names.append(subtitle.strip())
+    return names
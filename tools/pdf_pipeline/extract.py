@@ -2,13 +2,40 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable, Iterator, List, Sequence, Tuple
+from typing import (
+    AbstractSet,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+)
 
 import fitz
 
+from . import profiling, tables
+from .build_state import BuildState, file_fingerprint, fingerprint, json_fingerprint, source_fingerprint
 from .models import Manifest, Section
+from .page_cache import PageCache
+from .section_store import (
+    SECTION_STORE_NAME,
+    SectionStoreWriter,
+    catalog_entry,
+    read_catalog,
+    section_filename,
+    write_catalog,
+)
+from .tables import TableFinder
 
 
 def _iter_sections(
@@ -43,54 +70,541 @@ def _serialize_blocks(blocks: Iterable[tuple]) -> List[dict]:
     return serialized
 
 
+def _serialize_spans(page_dict: dict) -> List[dict]:
+    serialized = []
+    for block in page_dict.get("blocks", []):
+        for line_number, line in enumerate(block.get("lines", [])):
+            for span in line.get("spans", []):
+                serialized.append(
+                    {
+                        "bbox": list(span["bbox"]),
+                        "text": span["text"],
+                        "font": span["font"],
+                        "size": span["size"],
+                        "flags": span["flags"],
+                        "color": span["color"],
+                        "block": block.get("number"),
+                        "line": line_number,
+                    }
+                )
+    return serialized
+
+
+# Span dicts without embedded image bytes.
+_SPAN_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+Features = FrozenSet[str]
+TEXT_ONLY: Features = frozenset({"text"})
+TEXT_AND_BLOCKS: Features = frozenset({"text", "blocks"})
+
+
+def _extract_page(
+    doc: fitz.Document,
+    page_number: int,
+    features: Features,
+    table_finder: TableFinder | None = None,
+) -> dict:
+    with profiling.span("page.get_text", "extract", page=page_number, pages=1):
+        page = doc[page_number - 1]
+        page_entry = {
+            "page_number": page_number,
+            "text": page.get_text("text"),
+        }
+        blocks = page.get_text("blocks") if features & {"blocks", "tables"} else []
+        if "blocks" in features:
+            page_entry["blocks"] = _serialize_blocks(blocks)
+        if "spans" in features:
+            page_entry["spans"] = _serialize_spans(page.get_text("dict", flags=_SPAN_FLAGS))
+    if "tables" in features:
+        if table_finder is None:
+            raise RuntimeError("table features need a TableFinder")
+        page_entry["tables"] = table_finder.find(page, blocks)
+    return page_entry
+
+
+def _project_page(page_entry: dict, features: Features) -> dict:
+    """Return ``page_entry`` limited to the features a section asked for."""
+
+    return {key: value for key, value in page_entry.items() if key == "page_number" or key in features}
+
+
+STORAGE_BACKENDS = ("json", "sqlite", "memory")
+TABLE_CACHE_NAME = "table_cache"
+
+# Maps a section's file name and slug to the page features its consumers need.
+FeatureResolver = Callable[[str, str], AbstractSet[str]]
+
+
+class _FeaturePlan(NamedTuple):
+    sections: Dict[str, Features]
+    pages: Dict[int, Features]
+
+
+def _plan_features(
+    targets: List[Tuple[Section, Tuple[str, ...]]],
+    features: FeatureResolver | None,
+    include_blocks: bool,
+) -> _FeaturePlan:
+    """Decide each section's features and extract each page once with their union."""
+
+    default = TEXT_AND_BLOCKS if include_blocks else TEXT_ONLY
+    sections: Dict[str, Features] = {}
+    pages: Dict[int, Features] = {}
+    for section, _ in targets:
+        wanted = default
+        if features is not None:
+            wanted = TEXT_ONLY | frozenset(features(section_filename(section), section.slug))
+        sections[section_filename(section)] = wanted
+        for page_number in section.page_span:
+            pages[page_number] = pages.get(page_number, TEXT_ONLY) | wanted
+    return _FeaturePlan(sections, pages)
+
+
+# Receives each extracted section's file name and data (as written to JSON).
+SectionSink = Callable[[str, dict], None]
+
+
+def _section_data(section: Section, parents: Tuple[str, ...], pages: List[dict]) -> dict:
+    return {
+        "title": section.title,
+        "slug": section.slug,
+        "level": section.level,
+        "start_page": section.start_page,
+        "end_page": section.end_page,
+        "parent_slugs": list(parents),
+        "pages": pages,
+    }
+
+
+class _SectionOutput:
+    """A section being written one page at a time, in page order.
+
+    JSON output is encoded page by page into a temporary file that replaces the
+    section file on :meth:`close`, so memory use does not grow with the span.
+    The encoding matches ``json.dumps(data, indent=2)`` byte for byte. Pages are
+    only kept when ``keep_pages`` is set, for callers that need the whole section.
+    """
+
+    def __init__(
+        self,
+        section: Section,
+        parents: Tuple[str, ...],
+        features: Features,
+        *,
+        json_path: Path | None = None,
+        store: SectionStoreWriter | None = None,
+        keep_pages: bool = False,
+    ) -> None:
+        self.section = section
+        self.parents = parents
+        self.features = features
+        self.pages: List[dict] | None = [] if keep_pages else None
+        self._store = store
+        self._page_hashes: List[str] = []
+        self._json_path = json_path
+        self._file = None
+        self._hash = hashlib.sha256()
+        self._count = 0
+        if json_path is not None:
+            self._file = self._temp_path.open("wb")
+            # Everything up to the opening bracket of the (empty) page list.
+            head = json.dumps(_section_data(section, parents, []), ensure_ascii=False, indent=2)
+            self._emit(head[: -len("]\n}")])
+
+    @property
+    def _temp_path(self) -> Path:
+        if self._json_path is None:
+            raise RuntimeError(f"Section '{self.section.slug}' has no JSON output")
+        return self._json_path.with_name(self._json_path.name + ".tmp")
+
+    def _emit(self, text: str) -> int:
+        encoded = text.encode("utf-8")
+        self._file.write(encoded)
+        self._hash.update(encoded)
+        return len(encoded)
+
+    def add(self, page_entry: dict) -> None:
+        if self._store is not None:
+            self._page_hashes.append(self._store.write_page(page_entry))
+        page = _project_page(page_entry, self.features)
+        if self._file is not None:
+            with profiling.span("json.dumps", "extract", section=self.section.slug, page=page["page_number"]) as metrics:
+                # Strings never contain raw newlines, so indenting every line nests the page.
+                encoded = json.dumps(page, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+                metrics["bytes_written"] = self._emit(("," if self._count else "") + "\n    " + encoded)
+        if self.pages is not None:
+            self.pages.append(page)
+        self._count += 1
+
+    def close(self) -> str:
+        """Finish the section and return its content hash."""
+
+        if self._store is not None:
+            return self._store.write_section(self.section, self.parents, self._page_hashes)
+        if self._file is None:
+            return ""
+        self._emit("\n  ]\n}" if self._count else "]\n}")
+        self._file.close()
+        self._temp_path.replace(self._json_path)
+        return self._hash.hexdigest()
+
+    def abort(self) -> None:
+        """Drop a partly written section, leaving any previous output in place."""
+
+        if self._file is not None:
+            self._file.close()
+            self._temp_path.unlink(missing_ok=True)
+
+
+# Opens the output for a section, and finishes it once all its pages were added.
+SectionOpener = Callable[[Section, Tuple[str, ...]], _SectionOutput]
+SectionCloser = Callable[[_SectionOutput], None]
+
+
+# Each pool worker keeps its own document handle; PyMuPDF documents cannot be
+# shared across processes.
+_WORKER_DOC: fitz.Document | None = None
+_WORKER_TABLES: TableFinder | None = None
+
+
+def _init_worker(pdf_path: str, table_cache_dir: Path | None) -> None:
+    global _WORKER_DOC, _WORKER_TABLES
+    profiling.disable()
+    _WORKER_DOC = fitz.open(pdf_path)
+    _WORKER_TABLES = TableFinder(Path(pdf_path), table_cache_dir)
+
+
+def _extract_page_range(task: Tuple[int, int, Tuple[Features, ...]]) -> List[dict]:
+    start, end, page_features = task
+    if _WORKER_DOC is None:
+        raise RuntimeError("worker document not initialised")
+    return [
+        _extract_page(_WORKER_DOC, page_number, features, _WORKER_TABLES)
+        for page_number, features in zip(range(start, end + 1), page_features)
+    ]
+
+
+def _page_ranges(page_numbers: Sequence[int], chunk_size: int) -> List[Tuple[int, int]]:
+    """Split sorted page numbers into contiguous ranges of at most ``chunk_size`` pages."""
+
+    ranges: List[Tuple[int, int]] = []
+    for page_number in page_numbers:
+        if ranges:
+            start, end = ranges[-1]
+            if page_number == end + 1 and end - start + 1 < chunk_size:
+                ranges[-1] = (start, page_number)
+                continue
+        ranges.append((page_number, page_number))
+    return ranges
+
+
+def _extract_serial(
+    pdf_path: Path,
+    targets: List[Tuple[Section, Tuple[str, ...]]],
+    open_section: SectionOpener,
+    close_section: SectionCloser,
+    plan: _FeaturePlan,
+    page_cache: PageCache,
+    table_cache_dir: Path | None,
+    doc: fitz.Document | None = None,
+) -> None:
+    table_finder = TableFinder(pdf_path, table_cache_dir)
+    owned = doc is None
+    if doc is None:
+        doc = fitz.open(pdf_path)
+    try:
+        for section, parents in targets:
+            with profiling.span("extract.section", "extract", section=section.slug, pages=len(section.page_span)):
+                output = open_section(section, parents)
+                try:
+                    for page_number in section.page_span:
+                        # Keyed by features too, so a cache kept across runs never
+                        # serves a page extracted for a narrower plan.
+                        output.add(
+                            page_cache.get(
+                                (page_number, plan.pages[page_number]),
+                                lambda page_number=page_number: _extract_page(
+                                    doc, page_number, plan.pages[page_number], table_finder
+                                ),
+                            )
+                        )
+                except BaseException:
+                    output.abort()
+                    raise
+                close_section(output)
+    finally:
+        table_finder.close()
+        if owned:
+            doc.close()
+
+
+def _extract_parallel(
+    pdf_path: Path,
+    targets: List[Tuple[Section, Tuple[str, ...]]],
+    open_section: SectionOpener,
+    close_section: SectionCloser,
+    plan: _FeaturePlan,
+    workers: int,
+    table_cache_dir: Path | None,
+) -> None:
+    """Shard the required pages across a process pool and stream them into sections.
+
+    Page ranges come back in page order. A section is opened when its first page
+    arrives; each page is added to every open section and then dropped, and a
+    section is finished with its last page.
+    """
+
+    needed = sorted({page_number for section, _ in targets for page_number in section.page_span})
+    chunk_size = max(1, math.ceil(len(needed) / (workers * 4)))
+    tasks = [
+        (start, end, tuple(plan.pages[page_number] for page_number in range(start, end + 1)))
+        for start, end in _page_ranges(needed, chunk_size)
+    ]
+
+    pending = sorted(targets, key=lambda item: item[0].start_page)
+    next_pending = 0
+    outputs: List[_SectionOutput] = []
+
+    def open_until(page_number: int) -> None:
+        nonlocal next_pending
+        while next_pending < len(pending) and pending[next_pending][0].start_page <= page_number:
+            outputs.append(open_section(*pending[next_pending]))
+            next_pending += 1
+
+    def close_until(page_number: int) -> None:
+        for output in [output for output in outputs if output.section.end_page <= page_number]:
+            outputs.remove(output)
+            close_section(output)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(str(pdf_path), table_cache_dir),
+        ) as pool:
+            for chunk in pool.map(_extract_page_range, tasks):
+                # Pop pages off the chunk so each is released once it is written.
+                chunk.reverse()
+                while chunk:
+                    page_entry = chunk.pop()
+                    page_number = page_entry["page_number"]
+                    open_until(page_number)
+                    for output in outputs:
+                        if output.section.end_page >= page_number:
+                            output.add(page_entry)
+                    del page_entry
+                    close_until(page_number)
+        # Sections with an empty page span never see a page.
+        open_until(sys.maxsize)
+        close_until(sys.maxsize)
+    except BaseException:
+        for output in outputs:
+            output.abort()
+        raise
+
+
+def _section_fingerprint(
+    pdf_fingerprint: str,
+    code_fingerprint: str,
+    section: Section,
+    parents: Tuple[str, ...],
+    features: Features,
+) -> str:
+    identity = {
+        "title": section.title,
+        "slug": section.slug,
+        "level": section.level,
+        "start_page": section.start_page,
+        "end_page": section.end_page,
+        "parent_slugs": list(parents),
+        "features": sorted(features),
+    }
+    return fingerprint(pdf_fingerprint, code_fingerprint, json_fingerprint(identity))
+
+
+def section_catalog(manifest: Manifest, min_level: int = 2) -> List[dict]:
+    """Return catalog entries for the sections :func:`extract_sections` would write.
+
+    Content hashes are left empty, since nothing has been extracted yet.
+    """
+
+    return [
+        catalog_entry(section, parents, "")
+        for section, parents in _iter_sections(manifest.sections)
+        if section.level >= min_level
+    ]
+
+
 def extract_sections(
     manifest: Manifest,
     *,
-    output_dir: Path,
+    output_dir: Path | None,
     min_level: int = 2,
     include_blocks: bool = True,
+    features: FeatureResolver | None = None,
+    page_cache: PageCache | None = None,
+    workers: int = 1,
+    build_state: BuildState | None = None,
+    storage: str = "json",
+    table_cache_dir: Path | None = None,
+    doc: fitz.Document | None = None,
+    pdf_fingerprint: str | None = None,
+    on_section: SectionSink | None = None,
 ) -> List[Path]:
-    """Extract section text (and blocks) according to a manifest."""
+    """Extract section text (and blocks) according to a manifest.
+
+    ``features`` maps each section to the page features (see
+    ``transformers.PAGE_FEATURES``) its transformers read, e.g. from
+    :func:`.transform.feature_resolver`; every page is extracted once with the
+    union its sections need and each JSON section keeps only its own features.
+    Text is always extracted. Without a resolver every section gets text, plus
+    blocks when ``include_blocks`` is set. The ``tables`` feature runs the
+    :mod:`.tables` stage: pages are screened by block geometry and only flagged
+    pages go through pdfplumber, with results cached per page hash in
+    ``table_cache_dir`` (default ``output_dir/table_cache``; not cached when
+    both are ``None``).
+
+    Pages are pulled through ``page_cache`` so that nested sections covering the
+    same pages only extract each page once; a default-sized cache is used when
+    none is supplied. With ``workers > 1`` the pages are extracted by a process
+    pool instead and the written files are identical to the serial output.
+
+    When ``build_state`` is given, sections whose PDF bytes, manifest entry and
+    extractor source are unchanged since the recorded run are left untouched.
+
+    Long-running callers (see :mod:`.watch`) can pass an open ``doc`` for serial
+    extraction and the ``pdf_fingerprint`` they already hold, so repeated runs
+    neither reopen nor re-hash the PDF.
 
-    output_dir = output_dir.expanduser().resolve()
-    output_dir.mkdir(parents=True, exist_ok=True)
+    ``storage="sqlite"`` writes every section into a single ``sections.sqlite``
+    store in ``output_dir`` (pages stored once, sections as page ranges) and
+    returns the store path instead of one path per section. JSON output also gets
+    a ``catalog.json`` listing each section's slug, title, level, page span,
+    parents, file name and content hash.
+
+    Sections are written a page at a time as pages are extracted, so peak memory
+    depends on the largest page rather than the longest section (a level-1 section
+    can span most of a booklet). A section file is only replaced once complete.
+
+    ``on_section`` is called with each section's file name and data as soon as
+    the section is complete; sections skipped as fresh are not passed to it.
+    ``storage="memory"`` writes no section files, for callers that consume the
+    sections through ``on_section`` (see :mod:`.pipeline`); ``output_dir`` may
+    then be ``None``, and nothing is created unless ``table_cache_dir`` is given.
+    """
+
+    if storage not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{storage}'")
+    if storage == "memory" and build_state is not None:
+        raise ValueError("Memory storage writes no outputs to record in the build state")
+
+    if output_dir is not None:
+        output_dir = output_dir.expanduser().resolve()
+        if storage != "memory":
+            output_dir.mkdir(parents=True, exist_ok=True)
+    elif storage != "memory":
+        raise ValueError(f"Storage backend '{storage}' needs an output directory")
 
     pdf_path = Path(manifest.pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(pdf_path)
 
-    written_files: List[Path] = []
+    targets = [
+        (section, parents)
+        for section, parents in _iter_sections(manifest.sections)
+        if section.level >= min_level
+    ]
 
-    with fitz.open(pdf_path) as doc:
-        for section, parents in _iter_sections(manifest.sections):
-            if section.level < min_level:
-                continue
+    store_path = output_dir / SECTION_STORE_NAME if output_dir is not None else None
+    if table_cache_dir is None and output_dir is not None:
+        table_cache_dir = output_dir / TABLE_CACHE_NAME
+    plan = _plan_features(targets, features, include_blocks)
 
-            pages = []
-            for page_number in section.page_span:
-                page = doc[page_number - 1]
-                page_entry = {
-                    "page_number": page_number,
-                    "text": page.get_text("text"),
-                }
-                if include_blocks:
-                    page_entry["blocks"] = _serialize_blocks(page.get_text("blocks"))
-                pages.append(page_entry)
-
-            data = {
-                "title": section.title,
-                "slug": section.slug,
-                "level": section.level,
-                "start_page": section.start_page,
-                "end_page": section.end_page,
-                "parent_slugs": list(parents),
-                "pages": pages,
-            }
+    def output_key(section: Section) -> str:
+        if storage == "sqlite":
+            return f"{store_path}::{section_filename(section)}"
+        return str(output_dir / section_filename(section))
+
+    def output_path(section: Section) -> Path:
+        return store_path if storage == "sqlite" else output_dir / section_filename(section)
+
+    pending = targets
+    fingerprints: Dict[str, str] = {}
+    if build_state is not None:
+        if pdf_fingerprint is None:
+            pdf_fingerprint = file_fingerprint(pdf_path)
+        code_fingerprint = source_fingerprint(sys.modules[__name__], tables)
+        pending = []
+        for section, parents in targets:
+            key = output_key(section)
+            fingerprints[key] = _section_fingerprint(
+                pdf_fingerprint, code_fingerprint, section, parents, plan.sections[section_filename(section)]
+            )
+            if not build_state.is_fresh("extract", key, fingerprints[key]):
+                pending.append((section, parents))
+
+    store: SectionStoreWriter | None = None
+    if storage == "sqlite":
+        store = SectionStoreWriter(store_path)
+    elif storage == "json":
+        # A stale store would shadow the JSON files for readers.
+        store_path.unlink(missing_ok=True)
+
+    content_hashes: Dict[str, str] = {}
+
+    def open_section(section: Section, parents: Tuple[str, ...]) -> _SectionOutput:
+        filename = section_filename(section)
+        return _SectionOutput(
+            section,
+            parents,
+            plan.sections[filename],
+            json_path=output_dir / filename if storage == "json" else None,
+            store=store,
+            keep_pages=on_section is not None,
+        )
+
+    def close_section(output: _SectionOutput) -> None:
+        filename = section_filename(output.section)
+        content_hashes[filename] = output.close()
+        if on_section is not None:
+            on_section(filename, _section_data(output.section, output.parents, output.pages or []))
+
+    page_count = len({page_number for section, _ in pending for page_number in section.page_span})
+    try:
+        with profiling.span("extract_sections", "stage", sections=len(pending), pages=page_count):
+            if workers > 1 and pending:
+                _extract_parallel(pdf_path, pending, open_section, close_section, plan, workers, table_cache_dir)
+            elif pending:
+                if page_cache is None:
+                    page_cache = PageCache()
+                _extract_serial(
+                    pdf_path, pending, open_section, close_section, plan, page_cache, table_cache_dir, doc
+                )
+            if store is not None:
+                store.prune(section_filename(section) for section, _ in targets)
+    finally:
+        if store is not None:
+            store.close()
+
+    if build_state is not None:
+        for section, _ in pending:
+            key = output_key(section)
+            build_state.record("extract", key, fingerprints[key], [output_path(section)])
 
-            filename = f"{section.level:02d}-{section.start_page:03d}-{section.slug}.json"
-            output_path = output_dir / filename
-            output_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-            written_files.append(output_path)
+    if storage == "sqlite":
+        return [store_path]
+    if storage == "memory":
+        return []
 
-    return written_files
+    # The store's sections table doubles as its catalog; JSON output gets a file.
+    previous = {entry["filename"]: entry["content_hash"] for entry in read_catalog(output_dir)}
+    catalog = []
+    for section, parents in targets:
+        filename = section_filename(section)
+        content_hash = content_hashes.get(filename) or previous.get(filename)
+        if content_hash is None:
+            content_hash = file_fingerprint(output_dir / filename)
+        catalog.append(catalog_entry(section, parents, content_hash))
+    write_catalog(output_dir, catalog)
 
+    return [output_dir / section_filename(section) for section, _ in targets]
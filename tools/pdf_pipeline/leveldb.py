@@ -0,0 +1,324 @@
+"""Minimal writer for the LevelDB directory layout used by Foundry VTT packs.
+
+Foundry v11+ stores compendia as LevelDB databases (via ``classic-level``). A
+database written here holds a single write-ahead log plus the manifest that
+points at it; LevelDB replays the log on first open, exactly as it would after
+an unclean shutdown, so no native bindings are needed to produce a valid pack.
+"""
+
+from __future__ import annotations
+
+import shutil
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+_BLOCK_SIZE = 32768
+_HEADER_SIZE = 7
+_FULL, _FIRST, _MIDDLE, _LAST = 1, 2, 3, 4
+_TYPE_VALUE = 1
+
+# VersionEdit tags (db/version_edit.cc).
+_COMPARATOR = 1
+_LOG_NUMBER = 2
+_NEXT_FILE_NUMBER = 3
+_LAST_SEQUENCE = 4
+_PREV_LOG_NUMBER = 9
+
+_MANIFEST_NUMBER = 2
+_LOG_FILE_NUMBER = 3
+_MANIFEST_NAME = f"MANIFEST-{_MANIFEST_NUMBER:06d}"
+_LOG_NAME = f"{_LOG_FILE_NUMBER:06d}.log"
+
+# Keep write batches well below LevelDB's default 4 MiB write buffer.
+_BATCH_BYTES = 1 << 20
+
+
+def _crc32c_tables() -> List[List[int]]:
+    """Return the eight slicing-by-8 lookup tables for CRC-32C (Castagnoli)."""
+
+    first = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        first.append(crc)
+    tables = [first]
+    for _ in range(7):
+        previous = tables[-1]
+        tables.append([(value >> 8) ^ first[value & 0xFF] for value in previous])
+    return tables
+
+
+_CRC_TABLES = _crc32c_tables()
+_CRC_WORDS = struct.Struct("<II")
+
+
+def _crc32c_python(data: bytes, crc: int = 0) -> int:
+    # Slicing-by-8: fold eight bytes per iteration through eight tables, then
+    # finish the tail a byte at a time.
+    t0, t1, t2, t3, t4, t5, t6, t7 = _CRC_TABLES
+    crc ^= 0xFFFFFFFF
+    view = memoryview(data).cast("B")
+    whole = len(view) - len(view) % 8
+    for low, high in _CRC_WORDS.iter_unpack(view[:whole]):
+        low ^= crc
+        crc = (
+            t7[low & 0xFF]
+            ^ t6[(low >> 8) & 0xFF]
+            ^ t5[(low >> 16) & 0xFF]
+            ^ t4[low >> 24]
+            ^ t3[high & 0xFF]
+            ^ t2[(high >> 8) & 0xFF]
+            ^ t1[(high >> 16) & 0xFF]
+            ^ t0[high >> 24]
+        )
+    for byte in view[whole:]:
+        crc = t0[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+try:  # Optional C implementations, much faster than the loop above.
+    from google_crc32c import extend as _crc32c_native
+except ImportError:
+    try:
+        from crc32c import crc32c as _crc32c_accel
+    except ImportError:
+        _crc32c_native = None
+    else:
+
+        def _crc32c_native(crc: int, data: bytes) -> int:
+            return _crc32c_accel(data, value=crc)
+
+
+def crc32c(data: bytes, crc: int = 0) -> int:
+    """Return the CRC-32C of ``data``, continuing from ``crc``.
+
+    Uses ``google-crc32c`` or ``crc32c`` when one is installed and a
+    pure-Python slicing-by-8 loop otherwise.
+    """
+
+    if _crc32c_native is not None:
+        return _crc32c_native(crc, data)
+    return _crc32c_python(data, crc)
+
+
+def _masked_crc(data: bytes) -> int:
+    crc = crc32c(data)
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _length_prefixed(data: bytes) -> bytes:
+    return _varint(len(data)) + data
+
+
+class _LogWriter:
+    """Writes records in LevelDB's block-framed log format (db/log_format.h)."""
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+        self._block_offset = 0
+        self.bytes_written = 0
+
+    def _write(self, data: bytes) -> None:
+        self._handle.write(data)
+        self.bytes_written += len(data)
+
+    def add_record(self, data: bytes) -> None:
+        remaining = memoryview(data)
+        first = True
+        while True:
+            leftover = _BLOCK_SIZE - self._block_offset
+            if leftover < _HEADER_SIZE:
+                self._write(b"\x00" * leftover)
+                self._block_offset = 0
+                leftover = _BLOCK_SIZE
+
+            fragment = bytes(remaining[: leftover - _HEADER_SIZE])
+            remaining = remaining[len(fragment) :]
+            last = not remaining
+            if first and last:
+                record_type = _FULL
+            elif first:
+                record_type = _FIRST
+            elif last:
+                record_type = _LAST
+            else:
+                record_type = _MIDDLE
+
+            checksum = _masked_crc(bytes([record_type]) + fragment)
+            self._write(struct.pack("<IHB", checksum, len(fragment), record_type) + fragment)
+            self._block_offset += _HEADER_SIZE + len(fragment)
+            first = False
+            if last:
+                return
+
+
+def _iter_log_records(handle: BinaryIO) -> Iterator[bytes]:
+    pending = bytearray()
+    while block := handle.read(_BLOCK_SIZE):
+        offset = 0
+        while offset + _HEADER_SIZE <= len(block):
+            _, length, record_type = struct.unpack_from("<IHB", block, offset)
+            fragment = block[offset + _HEADER_SIZE : offset + _HEADER_SIZE + length]
+            offset += _HEADER_SIZE + length
+            if record_type == _FULL:
+                yield fragment
+            elif record_type == _FIRST:
+                pending = bytearray(fragment)
+            elif record_type == _MIDDLE:
+                pending.extend(fragment)
+            elif record_type == _LAST:
+                pending.extend(fragment)
+                yield bytes(pending)
+                pending = bytearray()
+
+
+def _write_batch(sequence: int, items: List[Tuple[bytes, bytes]]) -> bytes:
+    parts = [struct.pack("<QI", sequence, len(items))]
+    for key, value in items:
+        parts.append(bytes([_TYPE_VALUE]))
+        parts.append(_length_prefixed(key))
+        parts.append(_length_prefixed(value))
+    return b"".join(parts)
+
+
+def _version_edit(last_sequence: int) -> bytes:
+    return b"".join(
+        [
+            _varint(_COMPARATOR) + _length_prefixed(b"leveldb.BytewiseComparator"),
+            _varint(_LOG_NUMBER) + _varint(_LOG_FILE_NUMBER),
+            _varint(_PREV_LOG_NUMBER) + _varint(0),
+            _varint(_NEXT_FILE_NUMBER) + _varint(_LOG_FILE_NUMBER + 1),
+            _varint(_LAST_SEQUENCE) + _varint(last_sequence),
+        ]
+    )
+
+
+def stage_leveldb(directory: Path, items: Iterable[Tuple[bytes, bytes]]) -> int:
+    """Write a fresh LevelDB database holding ``items`` into an empty ``directory``.
+
+    Items are streamed into the log in bounded write batches; LevelDB sorts them
+    when the log is replayed, so they may arrive in any order. Returns the number
+    of bytes written.
+    """
+
+    directory.mkdir(parents=True, exist_ok=True)
+    with (directory / _LOG_NAME).open("wb") as handle:
+        log = _LogWriter(handle)
+        batch: List[Tuple[bytes, bytes]] = []
+        batch_bytes = 0
+        sequence = 1
+        for key, value in items:
+            batch.append((key, value))
+            batch_bytes += len(key) + len(value)
+            if batch_bytes >= _BATCH_BYTES:
+                log.add_record(_write_batch(sequence, batch))
+                sequence += len(batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            log.add_record(_write_batch(sequence, batch))
+            sequence += len(batch)
+
+    with (directory / _MANIFEST_NAME).open("wb") as handle:
+        manifest = _LogWriter(handle)
+        manifest.add_record(_version_edit(sequence - 1))
+    (directory / "CURRENT").write_text(f"{_MANIFEST_NAME}\n", encoding="ascii")
+    return log.bytes_written + manifest.bytes_written
+
+
+def _retired_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.old")
+
+
+def recover_directory(path: Path) -> None:
+    """Restore the previous database at ``path`` if a replacement was interrupted.
+
+    :func:`replace_directory` moves the old database aside before renaming the new
+    one into place; a crash between the two renames leaves only the retired copy.
+    """
+
+    retired = _retired_path(path)
+    if retired.is_dir() and not path.exists():
+        retired.rename(path)
+
+
+def replace_directory(staging: Path, path: Path) -> None:
+    """Move a fully written ``staging`` directory into place at ``path``.
+
+    Directories cannot be swapped in one rename, so the old database is renamed
+    aside first and removed once ``staging`` is in place. If the second rename
+    fails the old database is restored; if the process dies between the two,
+    :func:`recover_directory` restores it on the next run.
+    """
+
+    recover_directory(path)
+    retired = _retired_path(path)
+    if retired.exists():
+        shutil.rmtree(retired)
+    if path.is_dir():
+        path.rename(retired)
+    elif path.exists():
+        path.unlink()
+    try:
+        staging.rename(path)
+    except OSError:
+        if retired.is_dir() and not path.exists():
+            retired.rename(path)
+        raise
+    if retired.exists():
+        shutil.rmtree(retired)
+
+
+def staging_path(path: Path) -> Path:
+    """Return an empty sibling directory in which to assemble a database for ``path``."""
+
+    staging = path.with_name(f".{path.name}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+    return staging
+
+
+def read_leveldb_log(path: Path) -> Iterator[Tuple[bytes, bytes]]:
+    """Yield the key/value pairs of a database written by :func:`stage_leveldb`.
+
+    Yields nothing when ``path`` is not in that layout, e.g. after LevelDB has
+    compacted the log into table files; callers then treat the pack as new.
+    """
+
+    log_path = path / _LOG_NAME
+    if not log_path.is_file() or any(path.glob("*.ldb")):
+        return
+
+    with log_path.open("rb") as handle:
+        for record in _iter_log_records(handle):
+            _, count = struct.unpack_from("<QI", record)
+            offset = 12
+            for _ in range(count):
+                offset += 1
+                key_length, offset = _read_varint(record, offset)
+                key = record[offset : offset + key_length]
+                offset += key_length
+                value_length, offset = _read_varint(record, offset)
+                yield key, record[offset : offset + value_length]
+                offset += value_length
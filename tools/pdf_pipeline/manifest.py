@@ -8,6 +8,7 @@ from typing import Iterable, List
 
 import fitz
 
+from . import profiling
 from .models import Manifest, Section, TocEntry, slugify
 
 
@@ -66,7 +67,7 @@ def generate_manifest(pdf_path: Path, output_path: Path | None = None) -> Manife
     if not pdf_path.exists():
         raise FileNotFoundError(pdf_path)
 
-    with fitz.open(pdf_path) as doc:
+    with profiling.span("generate_manifest", "stage"), fitz.open(pdf_path) as doc:
         toc = _normalize_toc(doc.get_toc(simple=True))
         sections = _build_sections(toc, doc.page_count)
         manifest = Manifest(
@@ -2,9 +2,18 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Annotated, Any, Dict, Iterable, List, Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    ValidationError,
+    ValidationInfo,
+    ValidatorFunctionWrapHandler,
+    field_validator,
+)
 
 
 def slugify(title: str) -> str:
@@ -58,3 +67,223 @@ class Manifest(BaseModel):
 
     model_config = ConfigDict(extra="forbid")
 
+
+# Processed payloads: what ``transform_all`` writes and the compendium builders and
+# validators read. Field order matches the JSON files on disk.
+
+
+class AncestryStats(BaseModel):
+    size: str = "medium"
+    hit_points: int = 8
+    speed: int = 25
+    languages: List[str] = Field(default_factory=list)
+    traits: List[str] = Field(default_factory=list)
+    boosts: List[str] = Field(default_factory=list)
+    flaws: List[str] = Field(default_factory=list)
+    ability_mods: Dict[str, int] = Field(default_factory=dict)
+    heritages: List[Any] = Field(default_factory=list)
+    additional_features: List[Any] = Field(default_factory=list)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class AncestryMetadata(BaseModel):
+    aliases: List[str] = Field(default_factory=list)
+    notes: Optional[str] = None
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class AncestryEntity(BaseModel):
+    name: str
+    slug: Optional[str] = None
+    source_section: Optional[str] = None
+    source_pages: List[Optional[int]] = Field(default_factory=list)
+    description: str = ""
+    pf2e: AncestryStats = Field(default_factory=AncestryStats)
+    metadata: AncestryMetadata = Field(default_factory=AncestryMetadata)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class AncestryData(BaseModel):
+    entities: List[AncestryEntity]
+    entity_type: str = "ancestry"
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class JournalMetadata(BaseModel):
+    parent_slugs: List[str] = Field(default_factory=list)
+    level: Optional[int] = None
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class JournalData(BaseModel):
+    entity_type: str = "journal"
+    slug: Optional[str] = None
+    title: Optional[str] = None
+    content: str
+    source_pages: List[Optional[int]] = Field(default_factory=list)
+    metadata: JournalMetadata = Field(default_factory=JournalMetadata)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class RecordEntry(BaseModel):
+    name: str
+    slug: str
+    fields: Dict[str, str] = Field(default_factory=dict)
+    text: str = ""
+    shared_titles: List[str] = Field(default_factory=list)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class RecordsData(BaseModel):
+    entity_type: str = "record"
+    title: Optional[str] = None
+    source_pages: List[Optional[int]] = Field(default_factory=list)
+    records: List[RecordEntry]
+
+    model_config = ConfigDict(extra="forbid")
+
+
+def _payload_kind(value: Any) -> str:
+    # Tells legacy payloads, whose transformer is not a payload kind, apart by their keys.
+    if isinstance(value, dict):
+        if "entities" in value:
+            return "ancestries"
+        return "records" if "records" in value else "journal"
+    if isinstance(value, AncestryData):
+        return "ancestries"
+    return "records" if isinstance(value, RecordsData) else "journal"
+
+
+PayloadData = Union[AncestryData, JournalData, RecordsData]
+
+_PAYLOAD_DATA_ADAPTERS: Dict[str, TypeAdapter[Any]] = {
+    "ancestries": TypeAdapter(AncestryData),
+    "journal": TypeAdapter(JournalData),
+    "records": TypeAdapter(RecordsData),
+}
+
+
+class ProcessedPayload(BaseModel):
+    """Envelope written for every transformed section."""
+
+    slug: str
+    transformer: str
+    source_section: Optional[str] = None
+    data: PayloadData
+
+    model_config = ConfigDict(extra="forbid")
+
+    @field_validator("data", mode="wrap")
+    @classmethod
+    def _data_for_transformer(
+        cls, value: Any, handler: ValidatorFunctionWrapHandler, info: ValidationInfo
+    ) -> PayloadData:
+        """Validate ``data`` as the model its ``transformer`` produces.
+
+        A wrap validator rather than a plain one so the field keeps its union
+        serializer; ``handler`` would try every model and is not used.
+        """
+
+        kind = info.data.get("transformer")
+        if kind not in _PAYLOAD_DATA_ADAPTERS:
+            kind = _payload_kind(value)
+        return _PAYLOAD_DATA_ADAPTERS[kind].validate_python(value)
+
+
+PAYLOAD_ADAPTER: TypeAdapter[ProcessedPayload] = TypeAdapter(ProcessedPayload)
+PAYLOAD_LIST_ADAPTER: TypeAdapter[List[ProcessedPayload]] = TypeAdapter(List[ProcessedPayload])
+
+
+def load_payload(raw: bytes | str) -> ProcessedPayload:
+    """Parse and validate a processed payload straight from JSON bytes."""
+
+    return PAYLOAD_ADAPTER.validate_json(raw)
+
+
+def load_payloads(raws: List[bytes]) -> List[ProcessedPayload]:
+    """Validate several JSON payloads in one pydantic-core call."""
+
+    if not raws:
+        return []
+    return PAYLOAD_LIST_ADAPTER.validate_json(b"[" + b",".join(raws) + b"]")
+
+
+def payload_issues(error: ValidationError) -> List[str]:
+    """Describe why a payload failed its schema, one ``"<field path>: <message>"`` per error.
+
+    A journal without content reads ``"data.content: Field required"``.
+    """
+
+    issues = []
+    for detail in error.errors():
+        path = ".".join(str(part) for part in detail["loc"])
+        issues.append(f"{path}: {detail['msg']}" if path else detail["msg"])
+    return issues
+
+
+def dump_payload(payload: ProcessedPayload, compact: bool = False) -> bytes:
+    """Serialise a payload; indented for review by default, single-line when ``compact``."""
+
+    return PAYLOAD_ADAPTER.dump_json(payload, indent=None if compact else 2)
+
+
+# Image assets: which pages to export (``data/mappings/asset_profiles.json``) and
+# the manifest ``extract_assets`` writes next to the exported files.
+
+
+class AssetProfile(BaseModel):
+    """A page range exported as image assets.
+
+    ``images`` mode exports the embedded images at least ``min_size`` pixels on
+    each side, rendering pages that have none; ``render`` mode renders every page.
+    """
+
+    name: str
+    start_page: int = Field(..., ge=1)
+    end_page: int = Field(..., ge=1)
+    mode: Literal["images", "render"] = "images"
+    dpi: int = Field(150, ge=18)
+    min_size: int = Field(64, ge=1)
+
+    model_config = ConfigDict(extra="forbid")
+
+    @property
+    def page_span(self) -> range:
+        return range(self.start_page, self.end_page + 1)
+
+
+class Asset(BaseModel):
+    """One exported image file, shared by every page and xref with the same content."""
+
+    path: str
+    sha256: str
+    format: str
+    width: int
+    height: int
+    kind: Literal["image", "render"]
+    pages: List[int]
+    xrefs: List[int] = Field(default_factory=list)
+    groups: List[str]
+    sources: List[str]
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class AssetManifest(BaseModel):
+    pdf_path: str
+    assets: List[Asset]
+
+    model_config = ConfigDict(extra="forbid")
+
+    def for_pages(self, pages: Iterable[int]) -> List[Asset]:
+        """Return the assets shown on any of ``pages``, in manifest order."""
+
+        wanted = set(pages)
+        return [asset for asset in self.assets if wanted.intersection(asset.pages)]
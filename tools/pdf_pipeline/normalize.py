@@ -0,0 +1,34 @@
+"""Shared text normalisation stage for transformer input."""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import Iterable
+
+_HYPHENATED_BREAK = re.compile(r"-\n\s*")
+_EXCESS_BLANK_LINES = re.compile(r"\n{3,}")
+
+PAGE_MEMO_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=PAGE_MEMO_SIZE)
+def normalize_page(text: str) -> str:
+    """Normalise a single page of extracted text.
+
+    Results are memoised on the page content, so pages shared by nested sections
+    (or repeated across transformers) are only normalised once per process.
+    """
+
+    text = text.replace("\r", "\n")
+    # repair hyphenated line breaks
+    text = _HYPHENATED_BREAK.sub("", text)
+    return _EXCESS_BLANK_LINES.sub("\n\n", text)
+
+
+def normalize_pages(pages: Iterable[dict]) -> str:
+    """Join normalised page texts into a single section text."""
+
+    combined = "\n".join(normalize_page(page.get("text", "")) for page in pages)
+    # Blank-line runs can still span a page boundary.
+    return _EXCESS_BLANK_LINES.sub("\n\n", combined)
@@ -0,0 +1,94 @@
+"""Bounded page-level cache shared by overlapping section extractions."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Approximate CPython overhead of the containers extract.py builds, on top of
+# their text: a block dict and its bbox, a span dict (bbox, font, size, flags,
+# colour, block and line numbers), a table dict and its bbox, a table row list
+# and one cell's list slot and string header.
+_BLOCK_OVERHEAD = 400
+_SPAN_OVERHEAD = 650
+_TABLE_OVERHEAD = 400
+_ROW_OVERHEAD = 56
+_CELL_OVERHEAD = 57
+
+
+def _entry_size(entry: dict) -> int:
+    """Estimate the bytes held by a page entry across every feature it carries."""
+
+    size = len(entry.get("text", ""))
+    for block in entry.get("blocks", ()):
+        size += len(block.get("text", "")) + _BLOCK_OVERHEAD
+    for span in entry.get("spans", ()):
+        size += len(span.get("text", "")) + len(span.get("font", "")) + _SPAN_OVERHEAD
+    for table in entry.get("tables", ()):
+        size += _TABLE_OVERHEAD
+        for row in table.get("rows", ()):
+            size += _ROW_OVERHEAD + sum(len(cell or "") + _CELL_OVERHEAD for cell in row)
+    return size
+
+
+class PageCache:
+    """LRU cache of extracted page entries bounded by an approximate byte budget.
+
+    A chapter and its nested subsections cover the same pages, so the cache lets
+    every section that spans a page reuse a single ``get_text`` call. Entries are
+    evicted least-recently-used first once ``max_bytes`` is exceeded; a budget of
+    ``0`` disables caching entirely.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[dict, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, loader: Callable[[], dict]) -> dict:
+        """Return the cached entry for ``key``, calling ``loader`` on a miss."""
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+        self.misses += 1
+        entry = loader()
+        size = _entry_size(entry)
+        if size <= self.max_bytes:
+            self._entries[key] = (entry, size)
+            self.current_bytes += size
+            self._evict()
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
@@ -0,0 +1,214 @@
+"""Single-pass pipeline that streams sections from the PDF into the packs.
+
+:func:`run_pipeline` runs extraction, transformation and pack building as
+threads connected by bounded queues. A section is transformed and validated as
+soon as extraction completes it, and its payload goes straight to the pack
+stage. Raw sections and processed payloads are only written to disk when
+directories are given for them.
+
+The ancestry, bestiary and spell packs are written as soon as their payload
+arrives. The journal pack is ordered by output name and grouped by chapter, so
+it is written, together with the search index, after the last payload.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from . import compendium, profiling, search_index, transform
+from .compendium import ANCESTRY_PACK, BESTIARY_PACK, JOURNAL_PACK, SPELL_PACK, write_pack
+from .extract import extract_sections, section_catalog
+from .models import AncestryData, Manifest, ProcessedPayload, RecordsData, dump_payload
+from .page_cache import PageCache
+
+DEFAULT_QUEUE_SIZE = 8
+
+# Record payloads by ``entity_type``: the pack they fill, its entries and collection.
+_RECORD_PACKS: Dict[str, Tuple[str, Callable[[ProcessedPayload], Iterator[dict]], str]] = {
+    "monster": (BESTIARY_PACK, compendium.iter_bestiary_entries, "actors"),
+    "spell": (SPELL_PACK, compendium.iter_spell_entries, "items"),
+}
+
+_DONE = object()
+
+
+class _Channel:
+    """Bounded queue between two stages; iterating ends at :meth:`close`."""
+
+    def __init__(self, size: int) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=size)
+        self._closed = False
+
+    def put(self, item: object) -> None:
+        self._queue.put(item)
+
+    def close(self) -> None:
+        self._queue.put(_DONE)
+
+    def __iter__(self) -> Iterator:
+        while not self._closed:
+            item = self._queue.get()
+            if item is _DONE:
+                self._closed = True
+                return
+            yield item
+
+    def discard(self) -> None:
+        """Drain the remaining items so a blocked producer can finish."""
+
+        for _ in self:
+            pass
+
+
+def _collect(entries: Iterator[dict], sink: List[dict]) -> Iterator[dict]:
+    for entry in entries:
+        sink.append(entry)
+        yield entry
+
+
+def run_pipeline(
+    manifest: Manifest,
+    *,
+    section_profiles: Path,
+    packs_dir: Path,
+    sections_dir: Path | None = None,
+    processed_dir: Path | None = None,
+    table_cache_dir: Path | None = None,
+    min_level: int = 2,
+    workers: int = 1,
+    page_cache: PageCache | None = None,
+    pack_format: str = "nedb",
+    group_chapters: bool = False,
+    compact: bool = False,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    issues: Dict[str, List[str]] | None = None,
+) -> Dict[Path, Dict[str, int]]:
+    """Extract, transform, validate and pack in one pass, returning per-pack counts.
+
+    With ``sections_dir`` raw sections are also written there as JSON, and with
+    ``processed_dir`` processed payloads are written as :func:`.transform.transform_all`
+    writes them (``compact`` selects single-line JSON). Otherwise they only exist
+    in memory. Table results are cached in ``table_cache_dir``, by default under
+    ``sections_dir``; with neither, nothing is cached. At most ``queue_size`` sections and payloads wait between stages,
+    so extraction pauses when the later stages fall behind.
+
+    Every section is processed; build-state fingerprints are not consulted. See
+    :func:`.compendium.write_pack` for ``pack_format`` and the returned counts.
+    Validation issues are collected in ``issues``. When a stage fails, packs
+    already complete are kept but the journal pack and search index are left
+    untouched; transformer failures are then raised as
+    :class:`.transform.TransformError` and any other error is re-raised once
+    every stage has stopped.
+    """
+
+    sections = _Channel(queue_size)
+    payloads = _Channel(queue_size)
+    errors: List[BaseException] = []
+    features = transform.feature_resolver(section_profiles)
+    output_dir = processed_dir if processed_dir is not None else Path("data/processed")
+
+    def extract_stage() -> None:
+        try:
+            with profiling.span("pipeline.extract", "stage"):
+                extract_sections(
+                    manifest,
+                    output_dir=sections_dir,
+                    min_level=min_level,
+                    features=features,
+                    page_cache=page_cache,
+                    workers=workers,
+                    storage="json" if sections_dir is not None else "memory",
+                    table_cache_dir=table_cache_dir,
+                    on_section=lambda name, data: sections.put((name, data)),
+                )
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            sections.close()
+
+    def transform_stage() -> None:
+        try:
+            with profiling.span("pipeline.transform", "stage"):
+                for output_path, payload in transform.transform_stream(
+                    sections,
+                    catalog=section_catalog(manifest, min_level),
+                    section_profiles=section_profiles,
+                    output_dir=output_dir,
+                    issues=issues,
+                ):
+                    if processed_dir is not None:
+                        with profiling.span("payload.dump_json", "transform", output=output_path.name) as metrics:
+                            encoded = dump_payload(payload, compact)
+                            output_path.parent.mkdir(parents=True, exist_ok=True)
+                            output_path.write_bytes(encoded)
+                            metrics["bytes_written"] = len(encoded)
+                    payloads.put((output_path, payload))
+        except BaseException as exc:
+            errors.append(exc)
+            sections.discard()
+        finally:
+            payloads.close()
+
+    stages = [threading.Thread(target=extract_stage), threading.Thread(target=transform_stage)]
+    for stage in stages:
+        stage.start()
+
+    suffix = ".db" if pack_format == "nedb" else ""
+    counts: Dict[Path, Dict[str, int]] = {}
+    journals: Dict[Path, ProcessedPayload] = {}
+    ancestry_entries: List[dict] = []
+    journal_entries: List[dict] = []
+    try:
+        with profiling.span("pipeline.packs", "stage"):
+            packs_dir.mkdir(parents=True, exist_ok=True)
+            for output_path, payload in payloads:
+                data = payload.data
+                if isinstance(data, AncestryData):
+                    pack_path = packs_dir / f"{ANCESTRY_PACK}{suffix}"
+                    entries = _collect(compendium.iter_ancestry_entries(data.entities), ancestry_entries)
+                    counts[pack_path] = write_pack(entries, pack_path, pack_format=pack_format, collection="items")
+                elif isinstance(data, RecordsData) and data.entity_type in _RECORD_PACKS:
+                    pack, iter_entries, collection = _RECORD_PACKS[data.entity_type]
+                    pack_path = packs_dir / f"{pack}{suffix}"
+                    counts[pack_path] = write_pack(
+                        iter_entries(payload), pack_path, pack_format=pack_format, collection=collection
+                    )
+                elif payload.transformer == "journal":
+                    journals[output_path] = payload
+
+            # Upstream errors are recorded before the payload channel closes. With
+            # sections missing, the journal pack and index would lose entries.
+            if not errors and journals:
+                paths = sorted(journals)
+                if group_chapters:
+                    entries = compendium.iter_journal_chapters(paths, load=journals.__getitem__)
+                else:
+                    entries = compendium.iter_journal_entries(journals[path] for path in paths)
+                pack_path = packs_dir / f"{JOURNAL_PACK}{suffix}"
+                counts[pack_path] = write_pack(
+                    _collect(entries, journal_entries), pack_path, pack_format=pack_format, collection="journal"
+                )
+
+            if not errors:
+                documents = [
+                    *search_index.iter_entry_documents(ANCESTRY_PACK, "Item", ancestry_entries),
+                    *search_index.iter_entry_documents(JOURNAL_PACK, "JournalEntry", journal_entries),
+                ]
+                with profiling.span("compendium.search_index", "compendium"):
+                    search_index.build_search_index(documents, packs_dir / "search")
+    except BaseException:
+        payloads.discard()
+        raise
+    finally:
+        for stage in stages:
+            stage.join()
+
+    failures = [error for error in errors if not isinstance(error, transform.TransformError)]
+    if failures:
+        raise failures[0]
+    if errors:
+        raise errors[0]
+    return counts
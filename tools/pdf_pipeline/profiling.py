@@ -0,0 +1,181 @@
+"""Opt-in per-stage profiling with Chrome-trace (Perfetto) output.
+
+Pipeline code wraps interesting work in :func:`span`. Spans cost nothing until a
+:class:`Profiler` is enabled (the scripts do this for ``--profile``); then each
+span records wall time and any metrics the caller attaches, such as ``pages``,
+``bytes_read`` or ``bytes_written``. Spans on the main thread also record the
+process-wide peak of traced memory while they ran.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+_ACTIVE: "Profiler | None" = None
+
+
+class Profiler:
+    """Collects completed spans as Chrome trace events."""
+
+    def __init__(self) -> None:
+        self.events: List[dict] = []
+        self._origin = time.perf_counter_ns()
+        # Spans nest per thread; the streaming pipeline runs its stages in threads.
+        self._local = threading.local()
+
+    @property
+    def _stack(self) -> List[dict]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, category: str, **metrics: object) -> Iterator[Dict[str, object]]:
+        # tracemalloc has a single, process-wide peak counter, so fold the peak
+        # seen so far into the enclosing span before resetting it for this one.
+        # Only the main thread samples it: the peak includes every thread's
+        # allocations, and a reset from a pipeline stage thread would clobber the
+        # peak a main-thread span is measuring.
+        stack = self._stack
+        track_peak = threading.current_thread() is threading.main_thread()
+        if track_peak:
+            _, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+
+        frame = {"peak": 0}
+        stack.append(frame)
+        start = time.perf_counter_ns()
+        try:
+            yield metrics
+        finally:
+            end = time.perf_counter_ns()
+            stack.pop()
+            args = dict(metrics)
+            if track_peak:
+                _, peak = tracemalloc.get_traced_memory()
+                span_peak = max(frame["peak"], peak)
+                if stack:
+                    stack[-1]["peak"] = max(stack[-1]["peak"], span_peak)
+                args["process_peak_memory_bytes"] = span_peak
+
+            seconds = (end - start) / 1e9
+            pages = metrics.get("pages")
+            if isinstance(pages, int) and seconds > 0:
+                args["pages_per_second"] = round(pages / seconds, 2)
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start - self._origin) / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    def write_trace(self, path: Path) -> Path:
+        """Write the collected spans as a Chrome-trace/Perfetto JSON file."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"}),
+            encoding="utf-8",
+        )
+        return path
+
+    def summary(self, top: int = 15) -> str:
+        """Summarise the spans with the largest total wall time."""
+
+        totals: Dict[str, dict] = {}
+        for event in self.events:
+            entry = totals.setdefault(
+                event["name"],
+                {"calls": 0, "seconds": 0.0, "pages": 0, "bytes_read": 0, "bytes_written": 0, "peak": None},
+            )
+            args = event["args"]
+            entry["calls"] += 1
+            entry["seconds"] += event["dur"] / 1e6
+            for key in ("pages", "bytes_read", "bytes_written"):
+                value = args.get(key)
+                if isinstance(value, int):
+                    entry[key] += value
+            peak = args.get("process_peak_memory_bytes")
+            if peak is not None:
+                entry["peak"] = peak if entry["peak"] is None else max(entry["peak"], peak)
+
+        ranked = sorted(totals.items(), key=lambda item: item[1]["seconds"], reverse=True)[:top]
+        # Peaks are process-wide and only sampled on the main thread; "-" marks
+        # spans that only ran in pipeline stage threads.
+        lines = [
+            f"{'span':<36} {'calls':>7} {'total s':>9} {'pages/s':>9} {'read MiB':>9} {'write MiB':>9} "
+            f"{'proc peak MiB':>13}"
+        ]
+        for name, entry in ranked:
+            rate = f"{entry['pages'] / entry['seconds']:.1f}" if entry["pages"] and entry["seconds"] else "-"
+            peak = f"{entry['peak'] / 2**20:.2f}" if entry["peak"] is not None else "-"
+            lines.append(
+                f"{name[:36]:<36} {entry['calls']:>7} {entry['seconds']:>9.3f} {rate:>9} "
+                f"{entry['bytes_read'] / 2**20:>9.2f} {entry['bytes_written'] / 2**20:>9.2f} "
+                f"{peak:>13}"
+            )
+        return "\n".join(lines)
+
+
+def enable() -> Profiler:
+    global _ACTIVE
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _ACTIVE = Profiler()
+    return _ACTIVE
+
+
+def disable() -> None:
+    """Stop profiling; also called in pool workers, which cannot report spans."""
+
+    global _ACTIVE
+    _ACTIVE = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@contextmanager
+def span(name: str, category: str = "pipeline", **metrics: object) -> Iterator[Dict[str, object]]:
+    """Record a span on the active profiler; a no-op when profiling is off.
+
+    The yielded dict can be updated with metrics discovered inside the span.
+    """
+
+    if _ACTIVE is None:
+        yield metrics
+        return
+    with _ACTIVE.span(name, category, **metrics) as recorded:
+        yield recorded
+
+
+@contextmanager
+def profile_session(trace_path: Path | None, top: int = 15) -> Iterator[Profiler | None]:
+    """Profile a script run, writing the trace and printing a summary on exit."""
+
+    if trace_path is None:
+        yield None
+        return
+    profiler = enable()
+    try:
+        yield profiler
+    finally:
+        disable()
+        profiler.write_trace(trace_path)
+        print(f"Profile trace written to {trace_path}")
+        print(profiler.summary(top))
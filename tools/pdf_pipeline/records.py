@@ -0,0 +1,244 @@
+"""Declarative record segmentation for stat-block style sections.
+
+Monster, spell and equipment chapters repeat the same shape: a title line, a
+run of labelled fields (``ARMOR CLASS: 7``, ``Range: Touch``) and free text. A
+:class:`RecordSegmenter` is configured from a section profile and splits a
+section's text into records with one combined regular-expression scan, so adding
+an entity type means writing patterns rather than another hand-rolled scanner.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Sequence, Tuple
+
+from .models import slugify
+
+
+class Record(NamedTuple):
+    title: str
+    slug: str
+    fields: Dict[str, str]
+    text: str
+    start: int
+    end: int
+    shared_titles: Tuple[str, ...] = ()
+
+
+_SPACED_WORD = re.compile(r"\S(?: \S)+")
+
+
+def collapse_letter_spacing(line: str) -> str:
+    """Undo OCR letter spacing: ``"S a n d  t o  S t o n e"`` becomes ``"Sand to Stone"``.
+
+    Words are split on the double spaces OCR leaves between them; a word whose
+    characters are all separated by single spaces is joined back together.
+    """
+
+    words = re.split(r"[ \t]{2,}", line.strip())
+    return " ".join(word.replace(" ", "") if _SPACED_WORD.fullmatch(word) else word for word in words)
+
+
+def label_pattern(label: str) -> str:
+    """Return a regex for ``label`` that tolerates the letter spacing OCR leaves behind.
+
+    ``"MORALE:"`` also matches ``"M O R A L E :"`` and ``"MOR A L E :"``. A label
+    written without a colon matches with or without one.
+    """
+
+    words = []
+    for word in label.split():
+        words.append(r" ?".join(re.escape(ch) for ch in word))
+    pattern = r"\s+".join(words)
+    if not label.endswith(":"):
+        pattern += r"(?: ?:)?"
+    return pattern
+
+
+class RecordSegmenter:
+    """Split text into records that start at an anchor label.
+
+    ``start`` is the label that opens every record (e.g. ``"CLIMATE/TERRAIN:"``)
+    and ``fields`` maps output field names to labels; labels only count at the
+    start of a line. A field's value is the rest of its line or, when that is
+    empty, the next non-blank line. The record title is the nearest line before
+    the anchor matching ``title_pattern`` (tried again with OCR letter spacing
+    collapsed), or the line just above the anchor when no pattern is given. A
+    second title line directly above the chosen one names a creature printed side
+    by side with it over a single stat block; it is kept in ``shared_titles``. A
+    record runs from its first title line to the next record's. With
+    ``start_field``, the anchor label's own value is kept under that name.
+
+    ``context`` maps field names to line patterns (without named groups) such as
+    ``"(First|Second) Level Spells"``; the last matching line seen is copied into
+    the fields of every record that starts after it.
+
+    Multi-column layouts sometimes put the next label where a value belongs; such
+    values are dropped rather than recorded.
+    """
+
+    def __init__(
+        self,
+        start: str,
+        fields: Mapping[str, str],
+        title_pattern: str | None = None,
+        context: Mapping[str, str] | None = None,
+        max_title_distance: int = 400,
+        start_field: str | None = None,
+    ) -> None:
+        self.start = start
+        self.start_field = start_field
+        self.fields = dict(fields)
+        self.context = dict(context or {})
+        self.max_title_distance = max_title_distance
+        self._title = re.compile(title_pattern, re.MULTILINE) if title_pattern else None
+
+        alternatives = [f"(?P<start>{label_pattern(start)})"]
+        self._field_names: List[str] = []
+        for index, (name, label) in enumerate(self.fields.items()):
+            alternatives.append(f"(?P<f{index}>{label_pattern(label)})")
+            self._field_names.append(name)
+        self._context_names: List[str] = []
+        for index, (name, pattern) in enumerate(self.context.items()):
+            alternatives.append(f"(?P<c{index}>{pattern})")
+            self._context_names.append(name)
+        self._labels = re.compile(r"^[ \t]*(?:" + "|".join(alternatives) + ")", re.MULTILINE)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, object]) -> "RecordSegmenter":
+        """Build a segmenter from a profile's ``records`` config block."""
+
+        try:
+            start = config["start"]
+        except KeyError as exc:
+            raise ValueError("Record config requires a 'start' label") from exc
+        return cls(
+            start=str(start),
+            fields=dict(config.get("fields", {})),  # type: ignore[arg-type]
+            title_pattern=config.get("title_pattern"),  # type: ignore[arg-type]
+            context=dict(config.get("context", {})),  # type: ignore[arg-type]
+            max_title_distance=int(config.get("max_title_distance", 400)),  # type: ignore[arg-type]
+            start_field=config.get("start_field"),  # type: ignore[arg-type]
+        )
+
+    @staticmethod
+    def _title_match(pattern: re.Pattern, line: str) -> str | None:
+        for candidate in dict.fromkeys((line, collapse_letter_spacing(line))):
+            best = None
+            for match in pattern.finditer(candidate):
+                best = match
+            if best is not None:
+                return (best.groupdict().get("title") or best.group(0)).strip()
+        return None
+
+    def _title_span(self, text: str, anchor: int, floor: int) -> Tuple[int, str, Tuple[str, ...]]:
+        if self._title is None:
+            line_end = text.rfind("\n", floor, anchor)
+            if line_end <= floor:
+                return anchor, "", ()
+            line_start = max(text.rfind("\n", floor, line_end) + 1, floor)
+            return line_start, collapse_letter_spacing(text[line_start:line_end]).strip(), ()
+
+        # Only whole lines inside the window are candidates; a line cut by the
+        # window start would match on its tail.
+        window_start = max(floor, anchor - self.max_title_distance)
+        if window_start > 0 and text[window_start - 1] != "\n":
+            window_start = text.find("\n", window_start, anchor) + 1 or anchor
+        lines: List[Tuple[int, str | None]] = []
+        position = window_start
+        for line in text[window_start:anchor].split("\n"):
+            lines.append((position, self._title_match(self._title, line)))
+            position += len(line) + 1
+        for index in range(len(lines) - 1, -1, -1):
+            start, title = lines[index]
+            if title is None:
+                continue
+            # Only the line directly above counts: further up, permissive title
+            # patterns also match the short values of a column layout ("Nil").
+            if index > 0 and lines[index - 1][1] is not None:
+                above_start, above = lines[index - 1]
+                return above_start, title, (above,)
+            return start, title, ()
+        return anchor, "", ()
+
+    @staticmethod
+    def _value_after(text: str, position: int) -> str:
+        line_end = text.find("\n", position)
+        if line_end == -1:
+            line_end = len(text)
+        value = text[position:line_end].strip()
+        while not value and line_end < len(text):
+            next_end = text.find("\n", line_end + 1)
+            if next_end == -1:
+                next_end = len(text)
+            value = text[line_end + 1 : next_end].strip()
+            line_end = next_end
+        return value
+
+    def iter_records(self, text: str) -> Iterator[Record]:
+        """Yield records in document order from a single scan of ``text``."""
+
+        current: dict | None = None
+        context: Dict[str, str] = {}
+        floor = 0
+        for match in self._labels.finditer(text):
+            group = match.lastgroup
+            if group == "start":
+                title_start, title, shared = self._title_span(text, match.start(), floor)
+                if current is not None:
+                    yield self._finish(text, current, title_start)
+                current = {"start": title_start, "title": title, "shared": shared, "fields": dict(context)}
+                if self.start_field:
+                    value = self._value_after(text, match.end())
+                    if value and not self._labels.match(value):
+                        current["fields"][self.start_field] = value
+                floor = match.end()
+                continue
+            if group is not None and group.startswith("c"):
+                context[self._context_names[int(group[1:])]] = match.group(group).strip()
+                continue
+            if current is None or group is None:
+                continue
+            name = self._field_names[int(group[1:])]
+            if name not in current["fields"]:
+                value = self._value_after(text, match.end())
+                if value and not self._labels.match(value):
+                    current["fields"][name] = value
+        if current is not None:
+            yield self._finish(text, current, len(text))
+
+    def _finish(self, text: str, current: dict, end: int) -> Record:
+        title = current["title"]
+        return Record(
+            title=title,
+            slug=slugify(title) if title else "",
+            fields=current["fields"],
+            text=text[current["start"] : end].strip(),
+            start=current["start"],
+            end=end,
+            shared_titles=current["shared"],
+        )
+
+    def segment(self, text: str) -> List[Record]:
+        return list(self.iter_records(text))
+
+
+def records_to_payload(records: Sequence[Record]) -> List[dict]:
+    """Serialise records, keeping every one so validation can report the bad ones.
+
+    Untitled records are named ``""`` with a positional slug and repeated slugs
+    get a numeric suffix, so each entry still has a unique slug.
+    """
+
+    payload = []
+    seen: Dict[str, int] = {}
+    for index, record in enumerate(records, start=1):
+        slug = record.slug or f"record-{index}"
+        seen[slug] = seen.get(slug, 0) + 1
+        if seen[slug] > 1:
+            slug = f"{slug}-{seen[slug]}"
+        entry = {"name": record.title, "slug": slug, "fields": record.fields, "text": record.text}
+        if record.shared_titles:
+            entry["shared_titles"] = list(record.shared_titles)
+        payload.append(entry)
+    return payload
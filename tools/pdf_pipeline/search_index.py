@@ -0,0 +1,257 @@
+"""Prebuilt full-text search index for the module's compendium packs.
+
+The index is an inverted map from terms to the pack documents (journal pages,
+items) that contain them, written as JSON shards keyed by term prefix so the
+client only fetches the shards a query touches. ``index.json`` lists the shards
+and a document table; postings refer to documents by their slot in that table
+and hold the character offsets of each occurrence in the document's plain text,
+the text Foundry displays: tags stripped and ``@UUID[...]{label}`` links shown
+as their labels.
+
+Slots are reused across builds and every document carries a content hash, so a
+rebuild only re-tokenises documents that changed and only rewrites the shards
+whose postings changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from . import profiling
+
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+PREFIX_LENGTH = 2
+
+_TAG = re.compile(r"<[^>]+>")
+_LINK = re.compile(r"@UUID\[[^\]]*\](?:\{([^}]*)\})?")
+_WHITESPACE = re.compile(r"\s+")
+_TERM = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he his in is it its of on or that the their they this to was "
+    "were which will with".split()
+)
+
+# slot -> offsets of one term within that document
+Postings = Dict[int, List[int]]
+
+
+class SearchDocument(NamedTuple):
+    """One searchable unit: a journal page or an item, addressed by its pack IDs."""
+
+    pack: str
+    document_type: str
+    entry_id: str
+    page_id: str | None
+    name: str
+    html: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.pack}:{self.entry_id}:{self.page_id or ''}"
+
+
+def plain_text(markup: str) -> str:
+    """Strip tags, entities and link syntax from ``markup`` and collapse whitespace."""
+
+    text = _LINK.sub(lambda match: match.group(1) or "", _TAG.sub(" ", markup))
+    return _WHITESPACE.sub(" ", html.unescape(text)).strip()
+
+
+def tokenize(text: str) -> Iterator[Tuple[str, int]]:
+    """Yield ``(term, offset)`` pairs for the indexable words of ``text``.
+
+    Terms are lower-cased; stopwords and single characters are skipped, and a
+    trailing possessive is dropped (``"athas's"`` indexes as ``"athas"``).
+    """
+
+    for match in _TERM.finditer(text.lower()):
+        term = match.group(0)
+        if term.endswith("'s"):
+            term = term[:-2]
+        if len(term) < 2 or term in _STOPWORDS:
+            continue
+        yield term, match.start()
+
+
+def shard_name(term: str) -> str:
+    """Return the shard holding ``term``; the client derives it the same way."""
+
+    prefix = "".join(ch if ch.isalnum() else "_" for ch in term[:PREFIX_LENGTH])
+    return prefix.ljust(PREFIX_LENGTH, "_")
+
+
+def iter_entry_documents(pack: str, document_type: str, entries: Iterable[dict]) -> Iterator[SearchDocument]:
+    """Turn pack entries into search documents, one per journal page or item."""
+
+    for entry in entries:
+        pages = entry.get("pages")
+        if pages is not None:
+            for page in pages:
+                content = page.get("text", {}).get("content", "")
+                name = page.get("name") or entry["name"]
+                yield SearchDocument(pack, document_type, entry["_id"], page["_id"], name, content)
+            continue
+        description = entry.get("system", {}).get("description", {}).get("value", "")
+        yield SearchDocument(pack, document_type, entry["_id"], None, entry["name"], f"{entry['name']} {description}")
+
+
+def _document_hash(document: SearchDocument) -> str:
+    return hashlib.sha256(f"{document.name}\0{document.html}".encode("utf-8")).hexdigest()[:16]
+
+
+def _document_record(document: SearchDocument, digest: str) -> dict:
+    return {
+        "key": document.key,
+        "pack": document.pack,
+        "type": document.document_type,
+        "id": document.entry_id,
+        "page": document.page_id,
+        "name": document.name,
+        "hash": digest,
+    }
+
+
+def _encode_postings(postings: Postings) -> List[List[int]]:
+    encoded = []
+    for slot in sorted(postings):
+        offsets = postings[slot]
+        # Offsets are stored as deltas to keep shards small.
+        encoded.append([slot, offsets[0]] + [b - a for a, b in zip(offsets, offsets[1:])])
+    return encoded
+
+
+def _decode_postings(encoded: List[List[int]]) -> Iterator[Tuple[int, List[int]]]:
+    for slot, *deltas in encoded:
+        offsets = []
+        position = 0
+        for delta in deltas:
+            position += delta
+            offsets.append(position)
+        yield slot, offsets
+
+
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    if path.exists() and path.read_bytes() == data:
+        return False
+    staging = path.with_name(f".{path.name}.tmp")
+    staging.write_bytes(data)
+    os.replace(staging, path)
+    return True
+
+
+def _load_index(output_dir: Path) -> dict:
+    try:
+        index = json.loads((output_dir / INDEX_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if index.get("version") != INDEX_VERSION or index.get("prefix_length") != PREFIX_LENGTH:
+        return {}
+    return index
+
+
+def build_search_index(documents: Iterable[SearchDocument], output_dir: Path) -> Dict[str, int]:
+    """Write the sharded index for ``documents`` into ``output_dir``.
+
+    Documents whose key and content hash match the previous build keep their
+    slot and postings, which are read back from the existing shards rather than
+    re-tokenised. Returns counts of ``indexed`` and ``reused`` documents and of
+    ``shards_written`` and ``shards_removed``.
+    """
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_index(output_dir)
+    previous_docs: List[dict | None] = previous.get("documents", [])
+    previous_slots = {doc["key"]: slot for slot, doc in enumerate(previous_docs) if doc is not None}
+
+    slots: List[dict | None] = [None] * len(previous_docs)
+    reused = set()
+    changed: List[Tuple[int, SearchDocument]] = []
+    pending: List[Tuple[SearchDocument, str]] = []
+    for document in documents:
+        digest = _document_hash(document)
+        slot = previous_slots.pop(document.key, None)
+        if slot is None:
+            pending.append((document, digest))
+            continue
+        if previous_docs[slot]["hash"] == digest:
+            reused.add(slot)
+        else:
+            changed.append((slot, document))
+        slots[slot] = _document_record(document, digest)
+
+    # New documents fill slots freed by removed ones before growing the table.
+    free = [slot for slot, doc in enumerate(slots) if doc is None]
+    for document, digest in pending:
+        slot = free.pop(0) if free else len(slots)
+        if slot == len(slots):
+            slots.append(None)
+        slots[slot] = _document_record(document, digest)
+        changed.append((slot, document))
+    while slots and slots[-1] is None:
+        slots.pop()
+
+    with profiling.span("search_index.tokenize", "compendium", documents=len(changed)):
+        fresh: Dict[str, Dict[str, Postings]] = defaultdict(lambda: defaultdict(dict))
+        for slot, document in changed:
+            for term, offset in tokenize(plain_text(document.html)):
+                fresh[shard_name(term)][term].setdefault(slot, []).append(offset)
+
+    # Slots whose previous postings are stale: changed documents and removed ones.
+    dirty = {slot for slot, _ in changed} | set(previous_slots.values())
+    shards: Dict[str, Dict[str, List[List[int]]] | None] = {}
+    with profiling.span("search_index.reuse", "compendium", documents=len(reused)):
+        for name in previous.get("shards", []):
+            path = output_dir / f"{name}.json"
+            if not reused or not path.exists():
+                continue
+            encoded_terms = json.loads(path.read_text(encoding="utf-8"))
+            touched = name in fresh or any(entry[0] in dirty for entries in encoded_terms.values() for entry in entries)
+            if not touched:
+                # Unchanged shards are left as written; ``None`` marks them kept.
+                shards[name] = None
+                continue
+            terms: Dict[str, Postings] = defaultdict(dict)
+            for term, encoded in encoded_terms.items():
+                for slot, offsets in _decode_postings(encoded):
+                    if slot in reused:
+                        terms[term][slot] = offsets
+            for term, postings in fresh.pop(name, {}).items():
+                terms[term].update(postings)
+            shards[name] = {term: _encode_postings(terms[term]) for term in sorted(terms)}
+    for name, terms in fresh.items():
+        shards[name] = {term: _encode_postings(terms[term]) for term in sorted(terms)}
+
+    counts = {"indexed": len(changed), "reused": len(reused), "shards_written": 0, "shards_removed": 0}
+    with profiling.span("search_index.write", "io") as metrics:
+        written = 0
+        for name, shard in shards.items():
+            if shard is None:
+                continue
+            data = json.dumps(shard, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            if _write_if_changed(output_dir / f"{name}.json", data):
+                counts["shards_written"] += 1
+                written += len(data)
+        live = {name for name, shard in shards.items() if shard is None or shard}
+        for name in set(previous.get("shards", [])) - live:
+            (output_dir / f"{name}.json").unlink(missing_ok=True)
+            counts["shards_removed"] += 1
+
+        index = {
+            "version": INDEX_VERSION,
+            "prefix_length": PREFIX_LENGTH,
+            "shards": sorted(live),
+            "documents": slots,
+        }
+        data = json.dumps(index, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        if _write_if_changed(output_dir / INDEX_NAME, data):
+            written += len(data)
+        metrics["bytes_written"] = written
+    return counts
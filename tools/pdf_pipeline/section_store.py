@@ -0,0 +1,373 @@
+"""Storage backends for extracted raw sections.
+
+Sections are either written as one JSON file per section (the default) or into a
+single SQLite store that keeps every page exactly once and records sections as
+page-range references. Readers use :func:`open_section_source` so transforms can
+load sections lazily from either layout.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from . import profiling
+from .build_state import file_fingerprint, fingerprint, json_fingerprint
+from .models import Section
+
+SECTION_STORE_NAME = "sections.sqlite"
+CATALOG_NAME = "catalog.json"
+
+# Page features stored as JSON columns when extracted (text is always present).
+_OPTIONAL_PAGE_COLUMNS = ("blocks", "spans", "tables")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_number INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    blocks TEXT,
+    spans TEXT,
+    tables TEXT,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    name TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    start_page INTEGER NOT NULL,
+    end_page INTEGER NOT NULL,
+    parent_slugs TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_slug ON sections (slug);
+"""
+
+
+def section_filename(section: Section) -> str:
+    """Return the file name (or store key) used for an extracted section."""
+
+    return f"{section.level:02d}-{section.start_page:03d}-{section.slug}.json"
+
+
+def catalog_entry(section: Section, parents: Tuple[str, ...], content_hash: str) -> dict:
+    return {
+        "filename": section_filename(section),
+        "slug": section.slug,
+        "title": section.title,
+        "level": section.level,
+        "start_page": section.start_page,
+        "end_page": section.end_page,
+        "parent_slugs": list(parents),
+        "content_hash": content_hash,
+    }
+
+
+def read_catalog(output_dir: Path) -> List[dict]:
+    path = output_dir / CATALOG_NAME
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_catalog(output_dir: Path, entries: List[dict]) -> Path:
+    """Write the section catalog that lets readers resolve profiles without parsing sections."""
+
+    path = output_dir / CATALOG_NAME
+    path.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def _compact(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SectionStoreWriter:
+    """Write extracted sections into a single SQLite store.
+
+    Pages shared by nested sections are stored once; sections only keep their
+    metadata and page span. Existing rows are updated in place so incremental
+    extraction can rewrite a subset of sections.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        for column in _OPTIONAL_PAGE_COLUMNS:
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        self._page_hashes: Dict[int, str] = {}
+
+    def write_page(self, page_entry: dict) -> str:
+        page_number = page_entry["page_number"]
+        if page_number in self._page_hashes:
+            return self._page_hashes[page_number]
+
+        text = page_entry["text"]
+        blocks = page_entry.get("blocks")
+        blocks_json = _compact(blocks) if blocks is not None else None
+        hashed = text + "\0" + (blocks_json or "")
+        extras = []
+        for column in _OPTIONAL_PAGE_COLUMNS[1:]:
+            value = page_entry.get(column)
+            extras.append(_compact(value) if value is not None else None)
+            if value is not None:
+                hashed += f"\0{column}:" + extras[-1]
+        content_hash = hashlib.sha256(hashed.encode("utf-8")).hexdigest()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (page_number, text, blocks, spans, tables, content_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (page_number, text, blocks_json, *extras, content_hash),
+        )
+        self._page_hashes[page_number] = content_hash
+        return content_hash
+
+    def write_section(self, section: Section, parents: Tuple[str, ...], page_hashes: Sequence[str]) -> str:
+        """Record a section whose pages were stored with :meth:`write_page`.
+
+        ``page_hashes`` are the hashes those calls returned, in page order.
+        """
+
+        with profiling.span("sqlite.write_section", "extract", section=section.slug):
+            return self._write_section(section, parents, page_hashes)
+
+    def _write_section(self, section: Section, parents: Tuple[str, ...], page_hashes: Sequence[str]) -> str:
+        metadata = {
+            "title": section.title,
+            "slug": section.slug,
+            "level": section.level,
+            "start_page": section.start_page,
+            "end_page": section.end_page,
+            "parent_slugs": list(parents),
+        }
+        content_hash = fingerprint(json_fingerprint(metadata), *page_hashes)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sections "
+            "(name, title, slug, level, start_page, end_page, parent_slugs, content_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                section_filename(section),
+                section.title,
+                section.slug,
+                section.level,
+                section.start_page,
+                section.end_page,
+                _compact(list(parents)),
+                content_hash,
+            ),
+        )
+        return content_hash
+
+    def prune(self, names: Iterable[str]) -> None:
+        """Drop sections not listed in ``names`` and pages no section references."""
+
+        keep = list(names)
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_names (name TEXT PRIMARY KEY)")
+        self._conn.execute("DELETE FROM keep_names")
+        self._conn.executemany("INSERT OR IGNORE INTO keep_names (name) VALUES (?)", [(name,) for name in keep])
+        self._conn.execute("DELETE FROM sections WHERE name NOT IN (SELECT name FROM keep_names)")
+        self._conn.execute(
+            "DELETE FROM pages WHERE NOT EXISTS ("
+            "SELECT 1 FROM sections WHERE pages.page_number BETWEEN sections.start_page AND sections.end_page)"
+        )
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+class JsonSectionSource:
+    """Read raw sections from a directory of per-section JSON files.
+
+    When the directory has a catalog, profiles are resolved and fingerprinted from
+    it in memory; otherwise the directory is globbed and files are hashed.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._catalog: Dict[str, dict] = {
+            entry["filename"]: entry for entry in sorted(read_catalog(root), key=lambda item: item["filename"])
+        }
+
+    def entries(self) -> List[dict]:
+        return list(self._catalog.values())
+
+    def slug(self, name: str) -> str | None:
+        entry = self._catalog.get(name)
+        return entry["slug"] if entry else None
+
+    def find(self, slug: str) -> str:
+        if self._catalog:
+            for name, entry in self._catalog.items():
+                if entry["slug"] == slug:
+                    return name
+        else:
+            matches = sorted(self.root.glob(f"*-{slug}.json"))
+            if matches:
+                return matches[0].name
+        raise FileNotFoundError(f"No raw section file found for slug '{slug}' in {self.root}")
+
+    def glob(self, pattern: str) -> List[str]:
+        if self._catalog:
+            return [name for name in self._catalog if fnmatch.fnmatchcase(name, pattern)]
+        return [path.name for path in sorted(self.root.glob(pattern)) if path.name != CATALOG_NAME]
+
+    def load(self, name: str) -> dict:
+        with profiling.span("source.load", "io", section=name) as metrics:
+            raw = (self.root / name).read_bytes()
+            metrics["bytes_read"] = len(raw)
+            return json.loads(raw.decode("utf-8"))
+
+    def fingerprint(self, name: str) -> str:
+        entry = self._catalog.get(name)
+        if entry is not None:
+            return entry["content_hash"]
+        return file_fingerprint(self.root / name)
+
+
+class SqliteSectionSource:
+    """Read raw sections lazily from a SQLite section store."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+
+    def _names(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT name FROM sections ORDER BY name")]
+
+    def entries(self) -> List[dict]:
+        rows = self._conn.execute(
+            "SELECT name, slug, title, level, start_page, end_page, parent_slugs, content_hash "
+            "FROM sections ORDER BY name"
+        )
+        return [
+            {
+                "filename": name,
+                "slug": slug,
+                "title": title,
+                "level": level,
+                "start_page": start_page,
+                "end_page": end_page,
+                "parent_slugs": json.loads(parent_slugs),
+                "content_hash": content_hash,
+            }
+            for name, slug, title, level, start_page, end_page, parent_slugs, content_hash in rows
+        ]
+
+    def slug(self, name: str) -> str | None:
+        row = self._conn.execute("SELECT slug FROM sections WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def find(self, slug: str) -> str:
+        row = self._conn.execute(
+            "SELECT name FROM sections WHERE slug = ? ORDER BY name LIMIT 1", (slug,)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No raw section found for slug '{slug}' in {self.path}")
+        return row[0]
+
+    def glob(self, pattern: str) -> List[str]:
+        return [name for name in self._names() if fnmatch.fnmatchcase(name, pattern)]
+
+    def load(self, name: str) -> dict:
+        row = self._conn.execute(
+            "SELECT title, slug, level, start_page, end_page, parent_slugs FROM sections WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No raw section '{name}' in {self.path}")
+        title, slug, level, start_page, end_page, parent_slugs = row
+
+        pages = []
+        for page_number, text, *optional in self._conn.execute(
+            "SELECT page_number, text, blocks, spans, tables FROM pages "
+            "WHERE page_number BETWEEN ? AND ? ORDER BY page_number",
+            (start_page, end_page),
+        ):
+            page_entry = {"page_number": page_number, "text": text}
+            for column, value in zip(_OPTIONAL_PAGE_COLUMNS, optional):
+                if value is not None:
+                    page_entry[column] = json.loads(value)
+            pages.append(page_entry)
+
+        return {
+            "title": title,
+            "slug": slug,
+            "level": level,
+            "start_page": start_page,
+            "end_page": end_page,
+            "parent_slugs": json.loads(parent_slugs),
+            "pages": pages,
+        }
+
+    def fingerprint(self, name: str) -> str:
+        row = self._conn.execute("SELECT content_hash FROM sections WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No raw section '{name}' in {self.path}")
+        return row[0]
+
+
+class MemorySectionSource:
+    """Serve sections handed over in memory, resolved against a known catalog.
+
+    Streaming callers know every section from the manifest before any is
+    extracted; each section's data is only held between :meth:`put` and
+    :meth:`discard`.
+    """
+
+    def __init__(self, entries: Iterable[dict]) -> None:
+        self._catalog: Dict[str, dict] = {
+            entry["filename"]: entry for entry in sorted(entries, key=lambda item: item["filename"])
+        }
+        self._sections: Dict[str, dict] = {}
+
+    def entries(self) -> List[dict]:
+        return list(self._catalog.values())
+
+    def slug(self, name: str) -> str | None:
+        entry = self._catalog.get(name)
+        return entry["slug"] if entry else None
+
+    def find(self, slug: str) -> str:
+        for name, entry in self._catalog.items():
+            if entry["slug"] == slug:
+                return name
+        raise FileNotFoundError(f"No section found for slug '{slug}' in the catalog")
+
+    def glob(self, pattern: str) -> List[str]:
+        return [name for name in self._catalog if fnmatch.fnmatchcase(name, pattern)]
+
+    def put(self, name: str, data: dict) -> None:
+        self._sections[name] = data
+
+    def discard(self, name: str) -> None:
+        self._sections.pop(name, None)
+
+    def load(self, name: str) -> dict:
+        try:
+            return self._sections[name]
+        except KeyError:
+            raise FileNotFoundError(f"Section '{name}' has not been handed over") from None
+
+    def fingerprint(self, name: str) -> str:
+        return self._catalog[name]["content_hash"]
+
+
+SectionSource = JsonSectionSource | SqliteSectionSource | MemorySectionSource
+
+
+def open_section_source(path: Path) -> SectionSource:
+    """Open raw sections from a JSON directory, a store file, or a directory holding a store."""
+
+    if path.is_file():
+        return SqliteSectionSource(path)
+    if (path / SECTION_STORE_NAME).exists():
+        return SqliteSectionSource(path / SECTION_STORE_NAME)
+    return JsonSectionSource(path)
@@ -0,0 +1,172 @@
+"""Synthetic PDF generator used to benchmark the pipeline beyond the box set."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import List, Sequence
+
+import fitz
+
+RACES_CHAPTER_TITLE = "Chapter Two: Player Character Races"
+MONSTERS_CHAPTER_TITLE = "Chapter Five: Monsters of Athas"
+SPELLS_CHAPTER_TITLE = "Chapter Fifteen: New Spells"
+
+_WORDS = (
+    "athas sun desert templar sorcerer king defiler preserver psionic gladiator "
+    "obsidian silt sea caravan merchant house tyr urik balic draj nibenay gulg "
+    "raam slave tribe elemental cleric druid ranger bard thief wizard veiled "
+    "alliance dune trader kank erdlu inix mekillot crodlu ruins salt flats"
+).split()
+
+_PAGE_WIDTH = 612
+_PAGE_HEIGHT = 792
+_MARGIN = 36
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+_MONSTER_STATS = (
+    ("CLIMATE/TERRAIN:", "Tablelands"),
+    ("FREQUENCY:", "Uncommon"),
+    ("ORGANIZATION:", "Pack"),
+    ("ACTIVITY CYCLE:", "Day"),
+    ("DIET:", "Carnivore"),
+    ("INTELLIGENCE:", "Low (5-7)"),
+    ("TREASURE:", "Nil"),
+    ("ALIGNMENT:", "Neutral"),
+    ("NO. APPEARING:", "2-12"),
+    ("ARMOR CLASS:", "6"),
+    ("MOVEMENT:", "15"),
+    ("HIT DICE:", "4"),
+    ("THAC0:", "17"),
+    ("NO. OF ATTACKS:", "2"),
+    ("DAMAGE/ATTACK:", "1d6/1d6"),
+    ("SPECIAL ATTACKS:", "Nil"),
+    ("SPECIAL DEFENSES:", "Nil"),
+    ("MAGIC RESISTANCE:", "Nil"),
+    ("SIZE:", "M (6')"),
+    ("MORALE:", "Steady (11)"),
+    ("XP VALUE:", "175"),
+)
+_SPELL_STATS = (
+    ("Range:", "10 yards/level"),
+    ("Components:", "V, S, M"),
+    ("Duration:", "1 round/level"),
+    ("Casting Time:", "3"),
+    ("Area of Effect:", "One creature"),
+    ("Saving Throw:", "Neg."),
+)
+_SPELL_LEVELS = ("First", "Second", "Third", "Fourth", "Fifth", "Sixth", "Seventh", "Eighth", "Ninth")
+
+
+def _record_page_text(kind: str, index: int) -> str:
+    """Return one stat-block record shaped like the box set's monster or spell pages."""
+
+    # Two words picked by index keep names unique (and digit-free) across the chapter.
+    name = f"{_WORDS[index % len(_WORDS)].capitalize()} {_WORDS[index // len(_WORDS) % len(_WORDS)].capitalize()}"
+    if kind == "monster":
+        lines = [name] + [f"{label} {value}" for label, value in _MONSTER_STATS]
+    else:
+        lines = []
+        if index % 4 == 1:
+            lines.append(f"{_SPELL_LEVELS[(index // 4) % len(_SPELL_LEVELS)]} Level Spells")
+        lines.append(f"{name} (Alteration)")
+        lines.extend(f"{label} {value}" for label, value in _SPELL_STATS)
+    return "\n".join(lines)
+
+
+def _fill_page(
+    page: fitz.Page,
+    rng: random.Random,
+    blocks_per_page: int,
+    heading: str | None,
+    record: str | None = None,
+) -> None:
+    row_height = (_PAGE_HEIGHT - 2 * _MARGIN) / max(blocks_per_page, 1)
+    for index in range(blocks_per_page):
+        top = _MARGIN + index * row_height
+        rect = fitz.Rect(_MARGIN, top, _PAGE_WIDTH - _MARGIN, top + row_height)
+        text = _paragraph(rng, 40)
+        if index == 0 and heading:
+            text = f"{heading}\n{text}"
+        if index == 0 and record:
+            # A stat block takes the first third of the page.
+            rect.y1 = _MARGIN + max(1, blocks_per_page // 3) * row_height
+            text = record
+        elif record and index < blocks_per_page // 3:
+            continue
+        page.insert_textbox(rect, text, fontsize=7)
+
+
+def generate_synthetic_pdf(
+    output_path: Path,
+    *,
+    pages: int,
+    toc_depth: int = 4,
+    blocks_per_page: int = 12,
+    chapter_pages: int = 12,
+    headings: Sequence[str] = (),
+    seed: int = 0,
+) -> Path:
+    """Write a PDF with a deep table of contents and dense text blocks.
+
+    Level-1 booklets split the document into quarters, level-2 chapters start
+    every ``chapter_pages`` pages (and with each booklet), level-3 sections every
+    three pages of a chapter and level-4 topics on every page, down to
+    ``toc_depth``. The first chapter mirrors the box set's race chapter and opens
+    one page per entry in ``headings`` so the ancestry transformer has real work.
+    The second and third chapters mirror the monster and spell chapters, with one
+    stat block per page for the record segmenter.
+    """
+
+    if pages < 1:
+        raise ValueError("pages must be positive")
+
+    rng = random.Random(seed)
+    booklet_pages = max(1, -(-pages // 4))
+    toc: List[list] = []
+    chapter = 0
+    chapter_start = 0
+    section = 0
+
+    with fitz.open() as doc:
+        for page_number in range(1, pages + 1):
+            offset = page_number - 1
+            # Every level opens alongside its parent so the TOC hierarchy stays valid.
+            new_booklet = offset % booklet_pages == 0
+            new_chapter = toc_depth >= 2 and (new_booklet or offset - chapter_start >= chapter_pages)
+            if new_chapter:
+                chapter_start = offset
+            new_section = toc_depth >= 3 and (new_chapter or (offset - chapter_start) % 3 == 0)
+
+            if new_booklet:
+                toc.append([1, f"Booklet {offset // booklet_pages + 1}", page_number])
+            if new_chapter:
+                chapter += 1
+                titles = {1: RACES_CHAPTER_TITLE, 2: MONSTERS_CHAPTER_TITLE, 3: SPELLS_CHAPTER_TITLE}
+                title = titles.get(chapter, f"Chapter {chapter}: Synthetic Lore {chapter}")
+                toc.append([2, title, page_number])
+            if new_section:
+                section += 1
+                toc.append([3, f"Section {section}", page_number])
+            if toc_depth >= 4:
+                toc.append([4, f"Topic {page_number}", page_number])
+
+            heading = None
+            if chapter == 1 and offset < len(headings):
+                heading = headings[offset]
+            record = None
+            if chapter in (2, 3):
+                record = _record_page_text("monster" if chapter == 2 else "spell", page_number)
+
+            page = doc.new_page(width=_PAGE_WIDTH, height=_PAGE_HEIGHT)
+            _fill_page(page, rng, blocks_per_page, heading, record)
+
+        doc.set_toc(toc)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        doc.save(output_path, garbage=1, deflate=True)
+
+    return output_path
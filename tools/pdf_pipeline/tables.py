@@ -0,0 +1,203 @@
+"""Table extraction for pages whose block geometry looks tabular.
+
+Running pdfplumber's table finder on every page is expensive, so pages are first
+screened with :func:`looks_tabular`, which only inspects the PyMuPDF text blocks
+extraction already has. Flagged pages go through pdfplumber and the resulting
+tables are cached on disk under a hash of the page's content stream and the
+resources it draws with, so later runs only pay for pages that changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import List, Sequence
+
+import fitz
+
+from . import profiling
+
+# Bump when the screening or table settings change so cached results are redone.
+CACHE_VERSION = "2"
+
+_ROW_TOLERANCE = 3.0
+_COLUMN_GRID = 4.0
+_MAX_CELL_CHARS = 60
+# Stacked lines are at least this tall; a block whose lines average less sits
+# them side by side, which is how PyMuPDF reports a table row as one block.
+_MIN_LINE_HEIGHT = 8.0
+
+# Ruled tables first; tables laid out with whitespace alone fall back to text alignment.
+_LINE_SETTINGS = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+_TEXT_SETTINGS = {"vertical_strategy": "text", "horizontal_strategy": "text", "min_words_vertical": 2}
+
+
+def looks_tabular(blocks: Sequence[tuple], min_rows: int = 3, min_columns: int = 2) -> bool:
+    """Return whether text blocks sit in a grid of short, side-by-side cells.
+
+    Two layouts count as table rows: blocks whose top edges align within a few
+    points (one block per cell), and single blocks holding ``min_columns`` or
+    more short lines that are too flat to be stacked (one block per row). A page
+    is flagged when ``min_rows`` row blocks are found, or when ``min_columns``
+    left edges recur in ``min_rows`` rows of cell blocks. False positives only
+    cost a pdfplumber pass; running prose rarely aligns like this.
+    """
+
+    text_blocks = sorted(
+        (block for block in blocks if len(block) >= 5 and (len(block) < 7 or block[6] == 0) and block[4].strip()),
+        key=lambda block: (block[1], block[0]),
+    )
+
+    row_blocks = 0
+    for block in text_blocks:
+        lines = [line for line in block[4].splitlines() if line.strip()]
+        if (
+            len(lines) >= min_columns
+            and (block[3] - block[1]) / len(lines) < _MIN_LINE_HEIGHT
+            and all(len(line.strip()) <= _MAX_CELL_CHARS for line in lines)
+        ):
+            row_blocks += 1
+    if row_blocks >= min_rows:
+        return True
+
+    rows: List[List[tuple]] = []
+    for block in text_blocks:
+        if rows and block[1] - rows[-1][0][1] <= _ROW_TOLERANCE:
+            rows[-1].append(block)
+        else:
+            rows.append([block])
+
+    column_counts: Counter = Counter()
+    for row in rows:
+        cells = sorted(row, key=lambda block: block[0])
+        if len(cells) < min_columns:
+            continue
+        if any(len(cell[4].strip()) > _MAX_CELL_CHARS for cell in cells):
+            continue
+        if any(right[0] < left[2] for left, right in zip(cells, cells[1:])):
+            continue
+        column_counts.update({round(cell[0] / _COLUMN_GRID) for cell in cells})
+
+    recurring = [column for column, count in column_counts.items() if count >= min_rows]
+    return len(recurring) >= min_columns
+
+
+# Indirect references in an object's source; ``/Parent`` links lead back up the
+# page tree rather than into the resources a page draws with.
+_REFERENCE = re.compile(r"(/Parent\s+)?(\d+)\s+\d+\s+R\b")
+
+
+def _resources_source(page: fitz.Page) -> str:
+    """Return the page's ``/Resources`` entry, inherited from the page tree if absent."""
+
+    doc = page.parent
+    xref = page.xref
+    while xref:
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            return value
+        kind, value = doc.xref_get_key(xref, "Parent")
+        xref = int(value.split()[0]) if kind == "xref" else 0
+    return ""
+
+
+def page_hash(page: fitz.Page) -> str:
+    """Hash a page's size, content stream and resources; identical drawings yield identical tables.
+
+    The resources are followed through every indirect reference, so a changed
+    form or image XObject (drawn by ``/Fm0 Do``) or font changes the hash even
+    when the page's own content stream does not.
+    """
+
+    doc = page.parent
+    digest = hashlib.sha256(CACHE_VERSION.encode("ascii"))
+    digest.update(repr(tuple(page.rect)).encode("ascii"))
+    digest.update(page.read_contents())
+    resources = _resources_source(page)
+    digest.update(resources.encode("utf-8", "surrogateescape"))
+
+    seen = set()
+    pending = [resources]
+    while pending:
+        for match in _REFERENCE.finditer(pending.pop()):
+            xref = int(match.group(2))
+            if match.group(1) or xref in seen or not 0 < xref < doc.xref_length():
+                continue
+            seen.add(xref)
+            source = doc.xref_object(xref, compressed=True)
+            digest.update(f"{xref}:{source}".encode("utf-8", "surrogateescape"))
+            if doc.xref_is_stream(xref):
+                digest.update(doc.xref_stream_raw(xref))
+            pending.append(source)
+    return digest.hexdigest()
+
+
+def _clean_cell(cell: str | None) -> str:
+    return " ".join((cell or "").split())
+
+
+class TableFinder:
+    """Find tables on flagged pages of one PDF, caching results per page hash.
+
+    pdfplumber is imported and the PDF opened on the first page that passes the
+    screen, so runs without tabular pages never load it. Each process (e.g. each
+    extraction worker) uses its own finder; cache entries are written atomically,
+    so finders can share a cache directory. Without ``cache_dir`` nothing is
+    cached and every flagged page goes through pdfplumber.
+    """
+
+    def __init__(self, pdf_path: Path, cache_dir: Path | None) -> None:
+        self.pdf_path = Path(pdf_path)
+        self.cache_dir = cache_dir
+        self._pdf = None
+
+    def find(self, page: fitz.Page, blocks: Sequence[tuple]) -> List[dict]:
+        """Return the tables on ``page`` as ``{"bbox", "rows"}`` dicts."""
+
+        with profiling.span("tables.prescreen", "extract", page=page.number + 1):
+            flagged = looks_tabular(blocks)
+        if not flagged:
+            return []
+
+        if self.cache_dir is None:
+            with profiling.span("tables.pdfplumber", "extract", page=page.number + 1, pages=1):
+                return self._extract(page.number)
+
+        cache_path = self.cache_dir / f"{page_hash(page)}.json"
+        if cache_path.exists():
+            return json.loads(cache_path.read_text(encoding="utf-8"))
+
+        with profiling.span("tables.pdfplumber", "extract", page=page.number + 1, pages=1):
+            tables = self._extract(page.number)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+        staging.write_text(json.dumps(tables, ensure_ascii=False), encoding="utf-8")
+        os.replace(staging, cache_path)
+        return tables
+
+    def _extract(self, page_index: int) -> List[dict]:
+        if self._pdf is None:
+            import pdfplumber
+
+            self._pdf = pdfplumber.open(self.pdf_path)
+        plumber_page = self._pdf.pages[page_index]
+
+        found = plumber_page.find_tables(_LINE_SETTINGS) or plumber_page.find_tables(_TEXT_SETTINGS)
+        tables = []
+        for table in found:
+            rows = [[_clean_cell(cell) for cell in row] for row in table.extract()]
+            rows = [row for row in rows if any(row)]
+            if len(rows) < 2:
+                continue
+            tables.append({"bbox": [round(value, 2) for value in table.bbox], "rows": rows})
+        return tables
+
+    def close(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
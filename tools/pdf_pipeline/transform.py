@@ -2,106 +2,381 @@
 
 from __future__ import annotations
 
+import fnmatch
 import json
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Tuple
 
-from .transformers import REGISTRY
+from . import matching, normalize, profiling, records, validators
+from .build_state import BuildState, file_fingerprint, fingerprint, json_fingerprint, source_fingerprint
+from .models import PAYLOAD_ADAPTER, ProcessedPayload, dump_payload
+from .section_store import MemorySectionSource, SectionSource, open_section_source
+from .transformers import FEATURES, PAGE_FEATURES, REGISTRY
+
+
+# Helper modules whose source feeds every transformer's fingerprint. The
+# validators are not among them: a rule change re-checks outputs through
+# ``validate_files`` instead of re-running the transformers.
+_SHARED_SOURCES = (normalize, matching, records)
+
+
+class TransformError(Exception):
+    """Raised after a run in which one or more sections failed to transform.
+
+    Every other section is still processed; ``failures`` lists ``(section, message)``
+    pairs and ``written`` holds the outputs that were produced.
+    """
+
+    def __init__(self, failures: List[Tuple[str, str]], written: List[Path]) -> None:
+        self.failures = failures
+        self.written = written
+        super().__init__(
+            f"{len(failures)} section(s) failed to transform: "
+            + "; ".join(f"{name}: {message}" for name, message in failures)
+        )
+
+
+class _Job(NamedTuple):
+    profile_index: int
+    transformer_key: str
+    name: str
+    explicit_slug: str | None
+    config: dict
+    skip_slugs: FrozenSet[str]
+    output_template: str | None
+    output: str | None
+    target_dir: Path
+    fingerprint: str
+
+
+class _Result(NamedTuple):
+    output_path: Path | None
+    payload: ProcessedPayload | None
+    error: str | None
+    issues: Tuple[str, ...] = ()
 
 
 def _load_json(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def _find_section_file(raw_dir: Path, slug: str) -> Path:
-    matches = sorted(raw_dir.glob(f"*-{slug}.json"))
-    if not matches:
-        raise FileNotFoundError(f"No raw section file found for slug '{slug}' in {raw_dir}")
-    return matches[0]
+def _output_name(job: _Job, slug_value: str) -> str:
+    if job.output_template:
+        return job.output_template.format(slug=slug_value)
+    if job.output is not None and job.explicit_slug is not None:
+        return job.output
+    return f"{slug_value}.json"
 
 
-def transform_all(
-    *,
-    section_profiles: Path,
-    raw_sections_dir: Path,
-    output_dir: Path,
-) -> List[Path]:
-    profiles_data = _load_json(section_profiles)
-    output_dir.mkdir(parents=True, exist_ok=True)
+def _run_job(job: _Job, source: SectionSource) -> _Result:
+    try:
+        section_data = source.load(job.name)
+        slug_value = job.explicit_slug or section_data.get("slug")
+        if not slug_value:
+            raise ValueError("Section data missing slug")
+        if slug_value in job.skip_slugs:
+            return _Result(None, None, None)
 
-    written: List[Path] = []
+        with profiling.span(f"transform.{job.transformer_key}", "transform", section=job.name):
+            transformed = REGISTRY[job.transformer_key](section_data, dict(job.config))
+        payload = PAYLOAD_ADAPTER.validate_python(
+            {
+                "slug": slug_value,
+                "transformer": job.transformer_key,
+                "source_section": section_data.get("title"),
+                "data": transformed,
+            }
+        )
+        with profiling.span("validate", "transform", section=job.name):
+            issues = validators.validate_payload(payload)
+        return _Result(job.target_dir / _output_name(job, slug_value), payload, None, tuple(issues))
+    except Exception as exc:  # reported per section, see TransformError
+        return _Result(None, None, f"{type(exc).__name__}: {exc}")
+
+
+# Pool workers open their own section source; SQLite connections cannot be
+# shared across processes.
+_WORKER_SOURCE: SectionSource | None = None
+
+
+def _init_worker(raw_sections_dir: Path) -> None:
+    global _WORKER_SOURCE
+    profiling.disable()
+    _WORKER_SOURCE = open_section_source(raw_sections_dir)
 
-    for profile in profiles_data:
+
+def _run_worker_job(job: _Job) -> _Result:
+    if _WORKER_SOURCE is None:
+        raise RuntimeError("worker section source not initialised")
+    return _run_job(job, _WORKER_SOURCE)
+
+
+def _plan_jobs(
+    profiles_data: List[dict],
+    section_profiles: Path,
+    source: SectionSource,
+    output_dir: Path,
+    build_state: BuildState | None,
+    compact: bool = False,
+) -> Iterator[_Job]:
+    for profile_index, profile in enumerate(profiles_data):
         transformer_key = profile["transformer"]
         transformer = REGISTRY.get(transformer_key)
         if transformer is None:
             raise KeyError(f"Unknown transformer '{transformer_key}'")
 
         mapping_path = profile.get("mapping")
-        mapping_data: Dict | None = None
+        config: Dict = {}
         if mapping_path:
             mapping_path = Path(mapping_path)
             if not mapping_path.is_absolute():
                 mapping_path = section_profiles.parent / mapping_path
-            mapping_data = _load_json(mapping_path)
+            config.update(_load_json(mapping_path))
+        config.update(profile.get("config", {}))
 
-        base_target_dir = output_dir
+        target_dir = output_dir
         if subdir := profile.get("output_dir"):
-            base_target_dir = output_dir / subdir
-            base_target_dir.mkdir(parents=True, exist_ok=True)
-
-        skip_slugs = set(profile.get("skip_slugs", []))
-        additional_config = profile.get("config", {})
-
-        def process_section(section_data: dict, *, explicit_slug: str | None = None) -> None:
-            slug_value = explicit_slug or section_data.get("slug")
-            if not slug_value:
-                raise ValueError("Section data missing slug")
-            if slug_value in skip_slugs:
-                return
-
-            config = {}
-            if mapping_data:
-                config.update(mapping_data)
-            if additional_config:
-                config.update(additional_config)
-
-            transformed = transformer(section_data, config)
-
-            if template := profile.get("output_template"):
-                output_name = template.format(slug=slug_value)
-            elif "output" in profile and explicit_slug is not None:
-                output_name = profile["output"]
-            else:
-                output_name = f"{slug_value}.json"
+            target_dir = output_dir / subdir
 
-            target_dir = base_target_dir
-            target_dir.mkdir(parents=True, exist_ok=True)
-            output_path = target_dir / output_name
-            payload = {
-                "slug": slug_value,
-                "transformer": transformer_key,
-                "source_section": section_data.get("title"),
-                "data": transformed,
-            }
-            output_path.write_text(
-                json.dumps(payload, indent=2, ensure_ascii=False),
-                encoding="utf-8",
+        profile_fingerprint = ""
+        if build_state is not None:
+            profile_fingerprint = fingerprint(
+                json_fingerprint(profile),
+                source_fingerprint(sys.modules[__name__], *_SHARED_SOURCES, transformer),
+                file_fingerprint(mapping_path) if mapping_path else "",
+                "compact" if compact else "indented",
             )
-            written.append(output_path)
 
         if "slug" in profile:
-            slug = profile["slug"]
-            raw_path = _find_section_file(raw_sections_dir, slug)
-            section_data = _load_json(raw_path)
-            process_section(section_data, explicit_slug=slug)
+            try:
+                selections = [(source.find(profile["slug"]), profile["slug"])]
+            except FileNotFoundError:
+                # Optional profiles cover chapters that not every source PDF has.
+                if profile.get("optional"):
+                    continue
+                raise
         elif "glob" in profile:
-            pattern = profile["glob"]
-            for raw_path in sorted(raw_sections_dir.glob(pattern)):
-                section_data = _load_json(raw_path)
-                process_section(section_data)
+            selections = [(name, None) for name in source.glob(profile["glob"])]
         else:
             raise ValueError("Profile must specify either 'slug' or 'glob'")
 
+        skip_slugs = frozenset(profile.get("skip_slugs", []))
+        for name, explicit_slug in selections:
+            # Catalogued sections are excluded here, before any section is parsed.
+            if (explicit_slug or source.slug(name)) in skip_slugs:
+                continue
+            section_fingerprint = ""
+            if build_state is not None:
+                section_fingerprint = fingerprint(profile_fingerprint, source.fingerprint(name))
+            yield _Job(
+                profile_index=profile_index,
+                transformer_key=transformer_key,
+                name=name,
+                explicit_slug=explicit_slug,
+                config=config,
+                skip_slugs=skip_slugs,
+                output_template=profile.get("output_template"),
+                output=profile.get("output"),
+                target_dir=target_dir,
+                fingerprint=section_fingerprint,
+            )
+
+
+def feature_resolver(section_profiles: Path) -> Callable[[str, str], FrozenSet[str]]:
+    """Return a resolver giving the page features each raw section's profiles need.
+
+    Sections are matched the way :func:`transform_all` matches them (``slug``
+    equality or ``glob`` on the section file name, minus ``skip_slugs``) and get
+    the union of the features their transformers declare. Sections that no
+    profile uses get an empty set.
+    """
+
+    profiles = []
+    for profile in _load_json(section_profiles):
+        transformer_key = profile["transformer"]
+        if transformer_key not in REGISTRY:
+            raise KeyError(f"Unknown transformer '{transformer_key}'")
+        declared = FEATURES.get(transformer_key, frozenset(PAGE_FEATURES))
+        unknown = declared - set(PAGE_FEATURES)
+        if unknown:
+            raise ValueError(f"Transformer '{transformer_key}' declares unknown page features {sorted(unknown)}")
+        profiles.append((profile, declared))
+
+    def resolve(filename: str, slug: str) -> FrozenSet[str]:
+        needed: FrozenSet[str] = frozenset()
+        for profile, declared in profiles:
+            if slug in profile.get("skip_slugs", []):
+                continue
+            if "slug" in profile:
+                matched = profile["slug"] == slug
+            else:
+                matched = fnmatch.fnmatchcase(filename, profile.get("glob", ""))
+            if matched:
+                needed |= declared
+        return needed
+
+    return resolve
+
+
+def transform_all(
+    *,
+    section_profiles: Path,
+    raw_sections_dir: Path,
+    output_dir: Path,
+    build_state: BuildState | None = None,
+    workers: int = 1,
+    issues: Dict[str, List[str]] | None = None,
+    compact: bool = False,
+) -> List[Path]:
+    """Run every section profile and return the processed output paths in order.
+
+    With ``build_state``, a section is only re-transformed when its raw file, the
+    profile entry, its mapping file or the transformer source changed; outputs of
+    unchanged sections are reported without being rewritten.
+
+    ``raw_sections_dir`` may hold per-section JSON files or a SQLite section
+    store (see :mod:`.section_store`). Profiles are resolved against the section
+    catalog in memory and sections are only parsed once a job runs.
+
+    With ``workers > 1`` sections are transformed in a process pool. Outputs are
+    written by this process in profile order, so file names, contents and the
+    returned list match a serial run. A failing section does not stop the run;
+    all failures are raised together as :class:`TransformError` at the end.
+
+    Each payload is checked against the rules in :mod:`.validators` before it is
+    written. Pass an ``issues`` dict to receive the problems found, keyed by
+    section name. Passing outputs are recorded in ``build_state``, so
+    ``validate_data.py`` skips them; with ``issues``, the outputs of sections
+    skipped as fresh are re-checked when they failed last time or the rules
+    changed.
+
+    Payloads are validated against :class:`~.models.ProcessedPayload` and written
+    with pydantic's serializer: indented by default, or on a single line with
+    ``compact`` for production builds.
+    """
+
+    profiles_data = _load_json(section_profiles)
+    source = open_section_source(raw_sections_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = list(_plan_jobs(profiles_data, section_profiles, source, output_dir, build_state, compact))
+    for target_dir in {job.target_dir for job in jobs}:
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+    def state_key(job: _Job) -> str:
+        return f"{job.profile_index}:{raw_sections_dir / job.name}"
+
+    fresh = [
+        build_state is not None and build_state.is_fresh("transform", state_key(job), job.fingerprint)
+        for job in jobs
+    ]
+    pending = [job for job, is_fresh in zip(jobs, fresh) if not is_fresh]
+
+    written: List[Path] = []
+    failures: List[Tuple[str, str]] = []
+    rules = validators.rules_fingerprint()
+
+    def collect(results: Iterator[_Result]) -> None:
+        for job, is_fresh in zip(jobs, fresh):
+            # ``fresh`` is only ever true with a build state.
+            if is_fresh and build_state is not None:
+                previous = build_state.outputs("transform", state_key(job))
+                # Outputs that passed under the same rules and whose stat is
+                # unchanged are not read again; the rest are checked again.
+                if issues is not None and previous:
+                    for found in validators.validate_files(previous, build_state).values():
+                        if found:
+                            issues.setdefault(job.name, []).extend(found)
+                written.extend(previous)
+                continue
+
+            result = next(results)
+            if result.error is not None:
+                failures.append((job.name, result.error))
+                continue
+
+            outputs: List[Path] = []
+            if result.output_path is not None:
+                with profiling.span("payload.dump_json", "transform", output=result.output_path.name) as metrics:
+                    encoded = dump_payload(result.payload, compact)
+                    result.output_path.write_bytes(encoded)
+                    metrics["bytes_written"] = len(encoded)
+                outputs.append(result.output_path)
+                if build_state is not None:
+                    if result.issues:
+                        build_state.forget("validate", str(result.output_path))
+                    else:
+                        validators.record_passed(build_state, result.output_path, encoded, rules)
+                if result.issues and issues is not None:
+                    issues.setdefault(job.name, []).extend(result.issues)
+            if build_state is not None:
+                build_state.record("transform", state_key(job), job.fingerprint, outputs)
+            written.extend(outputs)
+
+    with profiling.span("transform_all", "stage", sections=len(pending)):
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(raw_sections_dir,),
+            ) as pool:
+                collect(pool.map(_run_worker_job, pending))
+        else:
+            collect(_run_job(job, source) for job in pending)
+
+    if failures:
+        raise TransformError(failures, written)
     return written
 
+
+def transform_stream(
+    sections: Iterable[Tuple[str, dict]],
+    *,
+    catalog: List[dict],
+    section_profiles: Path,
+    output_dir: Path,
+    issues: Dict[str, List[str]] | None = None,
+) -> Iterator[Tuple[Path, ProcessedPayload]]:
+    """Transform sections as they arrive, yielding ``(output path, payload)`` pairs.
+
+    ``catalog`` lists every section that will arrive (see
+    :func:`.extract.section_catalog`), so profiles are resolved up front;
+    ``sections`` yields ``(file name, section data)`` pairs in any order. A
+    section's jobs run, in profile order, as soon as it arrives and the section
+    is dropped afterwards. Nothing is written: the paths are those
+    :func:`transform_all` would write under ``output_dir``.
+
+    Payloads are validated as in :func:`transform_all`, with issues collected in
+    ``issues``. Failing sections are skipped and raised together as
+    :class:`TransformError` once ``sections`` is exhausted.
+    """
+
+    source = MemorySectionSource(catalog)
+    jobs: Dict[str, List[_Job]] = defaultdict(list)
+    for job in _plan_jobs(_load_json(section_profiles), section_profiles, source, output_dir, None):
+        jobs[job.name].append(job)
+
+    failures: List[Tuple[str, str]] = []
+    for name, data in sections:
+        section_jobs = jobs.pop(name, [])
+        if not section_jobs:
+            continue
+        source.put(name, data)
+        try:
+            for job in section_jobs:
+                result = _run_job(job, source)
+                if result.error is not None:
+                    failures.append((job.name, result.error))
+                    continue
+                if result.issues and issues is not None:
+                    issues.setdefault(job.name, []).extend(result.issues)
+                if result.output_path is not None:
+                    yield result.output_path, result.payload
+        finally:
+            source.discard(name)
+
+    if failures:
+        raise TransformError(failures, [])
@@ -2,19 +2,30 @@
 
 from __future__ import annotations
 
-from typing import Callable, Dict
+from typing import Callable, Dict, FrozenSet
 
-from .ancestries import transform as transform_ancestries
-from .journal import transform as transform_journal
+from . import ancestries, journal, records
 
 Transformer = Callable[..., dict]
 
+# Page features extraction can provide, from cheapest to richest: plain text,
+# positioned text blocks, span-level font dicts and structured table rows
+# (see ``tables``). Text is always extracted.
+PAGE_FEATURES = ("text", "blocks", "spans", "tables")
+
 
 REGISTRY: Dict[str, Transformer] = {
-    "ancestries": transform_ancestries,
-    "journal": transform_journal,
+    "ancestries": ancestries.transform,
+    "journal": journal.transform,
+    "records": records.transform,
 }
 
+# Page features each transformer reads; extraction fetches only their union.
+FEATURES: Dict[str, FrozenSet[str]] = {
+    "ancestries": ancestries.FEATURES,
+    "journal": journal.FEATURES,
+    "records": records.FEATURES,
+}
 
-__all__ = ["REGISTRY"]
 
+__all__ = ["FEATURES", "PAGE_FEATURES", "REGISTRY"]
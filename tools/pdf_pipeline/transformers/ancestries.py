@@ -2,21 +2,62 @@
 
 from __future__ import annotations
 
+import functools
 import re
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, List, Tuple
 
+from .. import profiling
+from ..matching import AhoCorasick
+from ..normalize import normalize_pages
 
-def _normalize_text(pages: Iterable[dict]) -> str:
-    chunks: List[str] = []
-    for page in pages:
-        text = page.get("text", "")
-        text = text.replace("\r", "\n")
-        # repair hyphenated line breaks
-        text = re.sub(r"-\n\s*", "", text)
-        chunks.append(text)
-    combined = "\n".join(chunks)
-    combined = re.sub(r"\n{3,}", "\n\n", combined)
-    return combined
+
+# Page features this transformer reads; see ``transformers.PAGE_FEATURES``.
+FEATURES = frozenset({"text"})
+
+_PARAGRAPH_BREAK = re.compile(r"\n{2,}")
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _is_word(ch: str) -> bool:
+    return bool(ch) and _WORD_CHAR.match(ch) is not None
+
+
+@functools.lru_cache(maxsize=32)
+def _alias_matcher(patterns: Tuple[str, ...]) -> AhoCorasick:
+    return AhoCorasick(patterns)
+
+
+def _first_alias_positions(text_lower: str, matcher: AhoCorasick) -> Dict[str, int]:
+    """Find each alias's best position in a single pass over the text.
+
+    For every alias the preferred hit is its first occurrence on a line of its
+    own, then its first occurrence at the start of a line, then its first
+    whole-word occurrence anywhere.
+    """
+
+    length = len(text_lower)
+    tiers: List[List[int | None]] = [[None, None, None] for _ in matcher.patterns]
+    for start, index in matcher.iter_matches(text_lower):
+        found = tiers[index]
+        if found[0] is not None:
+            continue
+        end = start + len(matcher.patterns[index])
+        before = text_lower[start - 1] if start else ""
+        after = text_lower[end] if end < length else ""
+        ends_word = _is_word(text_lower[end - 1]) != _is_word(after)
+        if before == "\n" and after == "\n":
+            found[0] = start
+        if found[1] is None and (start == 0 or before == "\n") and ends_word:
+            found[1] = start
+        if found[2] is None and ends_word and _is_word(before) != _is_word(text_lower[start]):
+            found[2] = start
+
+    positions: Dict[str, int] = {}
+    for pattern, found in zip(matcher.patterns, tiers):
+        best = next((value for value in found if value is not None), None)
+        if best is not None:
+            positions[pattern] = best
+    return positions
 
 
 def _find_entity_windows(text: str, mapping: List[dict]) -> Dict[str, Tuple[int, int]]:
@@ -26,10 +67,19 @@ def _find_entity_windows(text: str, mapping: List[dict]) -> Dict[str, Tuple[int,
     }
     heading_map = {entity["name"]: entity.get("heading") for entity in mapping}
 
+    # First entity (in mapping order) whose heading or aliases match a paragraph heading.
+    heading_index: Dict[str, str] = {}
+    for name, aliases in aliases_map.items():
+        target_heading = heading_map.get(name)
+        if target_heading:
+            heading_index.setdefault(target_heading.lower(), name)
+        for alias in aliases:
+            heading_index.setdefault(alias, name)
+
     # Split text into paragraphs while keeping start indices
     paragraphs: List[Tuple[int, str]] = []
     cursor = 0
-    for match in re.finditer(r"\n{2,}", text):
+    for match in _PARAGRAPH_BREAK.finditer(text):
         chunk = text[cursor:match.start()]
         paragraphs.append((cursor, chunk))
         cursor = match.end()
@@ -38,57 +88,39 @@ def _find_entity_windows(text: str, mapping: List[dict]) -> Dict[str, Tuple[int,
     positions: List[Tuple[str, int]] = []
     found_names: set[str] = set()
     for start_idx, paragraph in paragraphs:
-        lines = [line.strip() for line in paragraph.splitlines() if line.strip()]
-        if not lines:
+        heading = next((line.strip() for line in paragraph.splitlines() if line.strip()), None)
+        if heading is None:
             continue
-        heading = lines[0].lower()
-        for name, aliases in aliases_map.items():
-            target_heading = heading_map.get(name)
-            if target_heading and heading == target_heading.lower():
-                positions.append((name, start_idx))
-                found_names.add(name)
-                break
-            if heading in aliases:
-                positions.append((name, start_idx))
-                found_names.add(name)
-                break
+        name = heading_index.get(heading.lower())
+        if name is not None:
+            positions.append((name, start_idx))
+            found_names.add(name)
 
     # Ensure every entity has a recorded position.
-    text_lower = text.lower()
-
-    def locate(alias: str | None) -> int | None:
-        if not alias:
-            return None
-        alias_lower = alias.lower()
-        candidates: List[int] = []
-        for match in re.finditer(rf"\n{re.escape(alias_lower)}\n", text_lower):
-            candidates.append(match.start() + 1)
-        if not candidates:
-            for match in re.finditer(rf"(?:^|\n){re.escape(alias_lower)}\b", text_lower):
-                offset = 1 if match.group(0).startswith("\n") else 0
-                candidates.append(match.start() + offset)
-        if not candidates:
-            match = re.search(rf"\b{re.escape(alias_lower)}\b", text_lower)
-            if match:
-                candidates.append(match.start())
-        return min(candidates) if candidates else None
-
-    for entity in mapping:
-        name = entity["name"]
-        if name in found_names:
-            continue
-        heading_hint = heading_map.get(name)
-        aliases = entity.get("aliases", []) + [name]
-        search_values = [heading_hint] + aliases if heading_hint else aliases
-        entity_pos = None
-        for alias in search_values:
-            match_pos = locate(alias)
-            if match_pos is not None:
-                entity_pos = match_pos if entity_pos is None else min(entity_pos, match_pos)
-                if heading_hint and alias == heading_hint:
-                    break
-        if entity_pos is not None:
-            positions.append((name, entity_pos))
+    missing = [entity for entity in mapping if entity["name"] not in found_names]
+    if missing:
+        search_patterns = []
+        for entity in mapping:
+            if entity.get("heading"):
+                search_patterns.append(entity["heading"].lower())
+            search_patterns.extend(alias.lower() for alias in entity.get("aliases", []) + [entity["name"]])
+        matcher = _alias_matcher(tuple(search_patterns))
+        alias_positions = _first_alias_positions(text.lower(), matcher)
+
+        for entity in missing:
+            name = entity["name"]
+            heading_hint = heading_map.get(name)
+            aliases = entity.get("aliases", []) + [name]
+            search_values = [heading_hint] + aliases if heading_hint else aliases
+            entity_pos = None
+            for alias in search_values:
+                match_pos = alias_positions.get(alias.lower()) if alias else None
+                if match_pos is not None:
+                    entity_pos = match_pos if entity_pos is None else min(entity_pos, match_pos)
+                    if heading_hint and alias == heading_hint:
+                        break
+            if entity_pos is not None:
+                positions.append((name, entity_pos))
 
     positions.sort(key=lambda item: item[1])
 
@@ -136,10 +168,12 @@ def _ability_flaws(mods: Dict[str, int]) -> List[str]:
 
 def transform(section_data: dict, config: dict) -> dict:
     pages = section_data.get("pages", [])
-    text = _normalize_text(pages)
+    with profiling.span("normalize_pages", "transform", pages=len(pages)):
+        text = normalize_pages(pages)
     entities = config.get("entities", [])
 
-    windows = _find_entity_windows(text, entities)
+    with profiling.span("ancestries.find_entity_windows", "transform", entities=len(entities)):
+        windows = _find_entity_windows(text, entities)
 
     processed = []
     for entity in entities:
@@ -148,8 +182,9 @@ def transform(section_data: dict, config: dict) -> dict:
             key.lower(): value for key, value in entity.get("ability_mods", {}).items()
         }
         start, end = windows.get(name, (0, 0))
-        excerpt = text[start:end].strip()
-        description = re.sub(r"\s+", " ", excerpt)
+        with profiling.span("ancestries.entity", "transform", entity=name):
+            excerpt = text[start:end].strip()
+            description = re.sub(r"\s+", " ", excerpt)
 
         processed.append(
             {
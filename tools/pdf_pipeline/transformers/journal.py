@@ -3,19 +3,12 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, List
 
+from .. import profiling
+from ..normalize import normalize_pages
 
-def _normalize_text(pages: Iterable[dict]) -> str:
-    chunks: List[str] = []
-    for page in pages:
-        text = page.get("text", "")
-        text = text.replace("\r", "\n")
-        text = re.sub(r"-\n\s*", "", text)
-        chunks.append(text)
-    combined = "\n".join(chunks)
-    combined = re.sub(r"\n{3,}", "\n\n", combined)
-    return combined.strip()
+# Page features this transformer reads; see ``transformers.PAGE_FEATURES``.
+FEATURES = frozenset({"text"})
 
 
 def _to_html(text: str) -> str:
@@ -28,8 +21,10 @@ def _to_html(text: str) -> str:
 def transform(section_data: dict, config: dict | None = None) -> dict:
     config = config or {}
     pages = section_data.get("pages", [])
-    text = _normalize_text(pages)
-    html = _to_html(text)
+    with profiling.span("normalize_pages", "transform", pages=len(pages)):
+        text = normalize_pages(pages).strip()
+    with profiling.span("journal.to_html", "transform", section=section_data.get("slug")):
+        html = _to_html(text)
 
     return {
         "entity_type": "journal",
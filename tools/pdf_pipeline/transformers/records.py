@@ -0,0 +1,44 @@
+"""Transformer that splits stat-block sections into records (monsters, spells, equipment)."""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+
+from .. import profiling
+from ..normalize import normalize_pages
+from ..records import RecordSegmenter, records_to_payload
+
+# Page features this transformer reads; see ``transformers.PAGE_FEATURES``.
+FEATURES = frozenset({"text"})
+
+
+@lru_cache(maxsize=16)
+def _segmenter(config_json: str) -> RecordSegmenter:
+    return RecordSegmenter.from_config(json.loads(config_json))
+
+
+def transform(section_data: dict, config: dict | None = None) -> dict:
+    """Segment a section using the profile's ``records`` config.
+
+    See :class:`..records.RecordSegmenter` for the ``start``, ``fields``,
+    ``title_pattern`` and ``context`` keys.
+    """
+
+    config = config or {}
+    if "records" not in config:
+        raise ValueError("records transformer requires a 'records' config block")
+    segmenter = _segmenter(json.dumps(config["records"], sort_keys=True))
+
+    pages = section_data.get("pages", [])
+    with profiling.span("normalize_pages", "transform", pages=len(pages)):
+        text = normalize_pages(pages)
+    with profiling.span("records.segment", "transform", section=section_data.get("slug"), pages=len(pages)):
+        records = records_to_payload(segmenter.segment(text))
+
+    return {
+        "entity_type": config.get("entity_type", "record"),
+        "title": section_data.get("title"),
+        "source_pages": [section_data.get("start_page"), section_data.get("end_page")],
+        "records": records,
+    }
@@ -1,25 +1,55 @@
-"""Validation helpers for processed conversion datasets."""
+"""Validation helpers for processed conversion datasets.
+
+Checks are registered per transformer key with :func:`rule` and run against a
+:class:`~.models.ProcessedPayload` (what ``transform_all`` writes). ``transform_all``
+applies them to payloads while they are still in memory; :func:`validate_files`
+re-checks files on disk, skipping those that already passed unchanged.
+"""
 
 from __future__ import annotations
 
-import json
+import hashlib
+import sys
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import pydantic
+
+from . import profiling
+from .build_state import BuildState, fingerprint, source_fingerprint
+from .models import (
+    AncestryData,
+    JournalData,
+    ProcessedPayload,
+    RecordsData,
+    load_payload,
+    load_payloads,
+    payload_issues,
+)
+
+Rule = Callable[[ProcessedPayload], List[str]]
+
+# Validation rules keyed by the transformer that produced the payload.
+RULES: Dict[str, List[Rule]] = {}
 
 
 class ValidationError(Exception):
     """Raised when a dataset fails validation rules."""
 
 
-def _load_json(path: Path) -> dict:
-    return json.loads(path.read_text(encoding="utf-8"))
+def rule(transformer: str) -> Callable[[Rule], Rule]:
+    """Register a check for payloads produced by ``transformer``."""
 
+    def register(check: Rule) -> Rule:
+        RULES.setdefault(transformer, []).append(check)
+        return check
 
-def validate_ancestries(processed_path: Path) -> List[str]:
-    """Run sanity checks on the processed ancestry dataset."""
+    return register
 
-    data = _load_json(processed_path)
-    entities = data.get("data", {}).get("entities", [])
+
+@rule("ancestries")
+def _check_ancestries(payload: ProcessedPayload) -> List[str]:
+    entities = payload.data.entities if isinstance(payload.data, AncestryData) else []
     issues: List[str] = []
 
     if not entities:
@@ -27,24 +57,172 @@ def validate_ancestries(processed_path: Path) -> List[str]:
         return issues
 
     for entity in entities:
-        name = entity.get("name", "<unknown>")
-        description = entity.get("description", "").strip()
-        pf2e = entity.get("pf2e", {})
-
-        if len(description) < 40:
-            issues.append(f"{name}: description too short")
-        boosts = pf2e.get("boosts", [])
+        if len(entity.description.strip()) < 40:
+            issues.append(f"{entity.name}: description too short")
+        boosts = entity.pf2e.boosts
         if not boosts or "free" not in boosts:
-            issues.append(f"{name}: missing free ability boost")
-        if pf2e.get("hit_points", 0) <= 0:
-            issues.append(f"{name}: invalid hit point value")
-        languages = pf2e.get("languages", [])
-        if not languages:
-            issues.append(f"{name}: no languages mapped")
+            issues.append(f"{entity.name}: missing free ability boost")
+        if entity.pf2e.hit_points <= 0:
+            issues.append(f"{entity.name}: invalid hit point value")
+        if not entity.pf2e.languages:
+            issues.append(f"{entity.name}: no languages mapped")
+
+    return issues
+
 
+@rule("journal")
+def _check_journal(payload: ProcessedPayload) -> List[str]:
+    if not isinstance(payload.data, JournalData):
+        return ["journal payload has no content"]
+    issues: List[str] = []
+    if not (payload.data.title or payload.slug):
+        issues.append("missing title")
+    if len(payload.data.content.strip()) < 40:
+        issues.append("content too short")
     return issues
 
 
+@rule("records")
+def _check_records(payload: ProcessedPayload) -> List[str]:
+    records = payload.data.records if isinstance(payload.data, RecordsData) else []
+    if not records:
+        return ["no records found"]
+    issues: List[str] = []
+    names: Dict[str, int] = {}
+    for position, record in enumerate(records, start=1):
+        label = record.name or f"record {position}"
+        if not record.name:
+            issues.append(f"{label}: no title found")
+        elif record.name in names:
+            issues.append(f"{label}: duplicate title (also record {names[record.name]})")
+        else:
+            names[record.name] = position
+        if record.shared_titles:
+            issues.append(f"{label}: stat block shared with {', '.join(record.shared_titles)}")
+        if not record.fields:
+            issues.append(f"{label}: no fields parsed")
+    return issues
+
+
+def validate_payload(payload: ProcessedPayload) -> List[str]:
+    """Run the rules registered for the payload's transformer."""
+
+    issues: List[str] = []
+    for check in RULES.get(payload.transformer, []):
+        issues.extend(check(payload))
+    return issues
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint the rule definitions; a change re-checks every file."""
+
+    return source_fingerprint(sys.modules[__name__])
+
+
+def content_fingerprint(encoded: bytes, rules: str) -> str:
+    """Fingerprint a processed file's bytes together with the rule definitions."""
+
+    return fingerprint(hashlib.sha256(encoded).hexdigest(), rules)
+
+
+def _check_raw(raw: bytes, check: Rule = validate_payload) -> List[str]:
+    """Parse one file and run ``check``; schema errors are reported as issues."""
+
+    try:
+        payload = load_payload(raw)
+    except pydantic.ValidationError as exc:
+        return payload_issues(exc)
+    return check(payload)
+
+
+def _check_file(path: Path, check: Rule) -> List[str]:
+    with profiling.span("validators.load", "io", file=path.name) as metrics:
+        raw = path.read_bytes()
+        metrics["bytes_read"] = len(raw)
+    return _check_raw(raw, check)
+
+
+def _file_stat(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def record_passed(build_state: BuildState, path: Path, raw: bytes, rules: str) -> None:
+    """Record that ``path``, holding ``raw``, passed the rules fingerprinted as ``rules``.
+
+    The rules fingerprint and the file's size and mtime are kept with the record,
+    so :func:`validate_files` can skip the file later without reading it.
+    """
+
+    build_state.record(
+        "validate",
+        str(path),
+        content_fingerprint(raw, rules),
+        [path],
+        details={"rules": rules, "stat": _file_stat(path)},
+    )
+
+
+def _passed_unchanged(build_state: BuildState, path: Path, rules: str) -> bool:
+    details = build_state.details("validate", str(path))
+    if details.get("rules") != rules:
+        return False
+    try:
+        return details.get("stat") == _file_stat(path)
+    except FileNotFoundError:
+        return False
+
+
+def validate_files(paths: Iterable[Path], build_state: BuildState | None = None) -> Dict[Path, List[str]]:
+    """Validate processed files, returning the issues found per file.
+
+    With ``build_state``, files that last passed under the same rules are skipped
+    without being read while their size and mtime are unchanged; otherwise their
+    content is hashed and they are only re-checked if it changed. Only passing
+    files are recorded, so files with issues are checked again on every run.
+    """
+
+    paths = list(paths)
+    rules = rules_fingerprint()
+    results: Dict[Path, List[str]] = {}
+    pending: List[Tuple[Path, bytes]] = []
+    for path in paths:
+        if build_state is not None and _passed_unchanged(build_state, path, rules):
+            results[path] = []
+            continue
+        with profiling.span("validators.load", "io", file=path.name) as metrics:
+            raw = path.read_bytes()
+            metrics["bytes_read"] = len(raw)
+        if build_state is not None and build_state.is_fresh("validate", str(path), content_fingerprint(raw, rules)):
+            # Same content and rules, but touched since or recorded without a stat.
+            record_passed(build_state, path, raw, rules)
+            results[path] = []
+            continue
+        pending.append((path, raw))
+
+    # Changed files are parsed together in a single bulk validation. One malformed
+    # file fails the whole call, so the batch is then re-parsed file by file.
+    with profiling.span("validators.check", "validate", files=len(pending)):
+        try:
+            checked = [validate_payload(payload) for payload in load_payloads([raw for _, raw in pending])]
+        except pydantic.ValidationError:
+            checked = [_check_raw(raw) for _, raw in pending]
+        for (path, raw), issues in zip(pending, checked):
+            if build_state is not None:
+                if issues:
+                    build_state.forget("validate", str(path))
+                else:
+                    record_passed(build_state, path, raw, rules)
+            results[path] = issues
+    return {path: results[path] for path in paths}
+
+
+def validate_ancestries(processed_path: Path) -> List[str]:
+    """Run sanity checks on the processed ancestry dataset."""
+
+    return _check_file(processed_path, _check_ancestries)
+
+
 def validate_journals(processed_dir: Path) -> List[str]:
     """Ensure each processed journal entry has content and a title."""
 
@@ -59,14 +237,6 @@ def validate_journals(processed_dir: Path) -> List[str]:
         return issues
 
     for journal_file in files:
-        payload = _load_json(journal_file)
-        data = payload.get("data", {})
-        title = data.get("title") or payload.get("slug") or journal_file.stem
-        content = data.get("content", "").strip()
-
-        if not title:
-            issues.append(f"{journal_file.name}: missing title")
-        if len(content) < 40:
-            issues.append(f"{journal_file.name}: content too short")
+        issues.extend(f"{journal_file.name}: {issue}" for issue in _check_file(journal_file, _check_journal))
 
     return issues
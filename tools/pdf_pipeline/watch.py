@@ -0,0 +1,317 @@
+"""Long-running rebuild loop for tuning mappings and transformers.
+
+A :class:`WatchSession` keeps the PDF open, extracted pages in a
+:class:`~.page_cache.PageCache`, parsed processed payloads and the build state in
+memory between rebuilds. :func:`watch` polls the mapping files, the transformer
+package and the PDF; on a change it reloads edited transformer modules and
+re-runs the pipeline, whose build-state fingerprints limit the work to the
+affected sections and packs.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import fitz
+
+from . import compendium, profiling, transform, transformers
+from . import manifest as manifest_module
+from .build_state import BuildState, file_fingerprint, fingerprint, source_fingerprint
+from .extract import extract_sections
+from .manifest import generate_manifest, load_manifest
+from .models import Manifest
+from .page_cache import PageCache
+
+# (mtime, size) for each watched file
+Snapshot = Dict[Path, Tuple[int, int]]
+
+TRANSFORMERS_DIR = Path(transformers.__file__).resolve().parent
+
+
+def snapshot(roots: Iterable[Path]) -> Snapshot:
+    """Stat every file under ``roots``, which may be files or directories."""
+
+    stamps: Snapshot = {}
+    for root in roots:
+        if root.is_dir():
+            paths: Iterable[Path] = (path for path in root.rglob("*") if "__pycache__" not in path.parts)
+        else:
+            paths = [root]
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if not path.is_dir():
+                stamps[path] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+
+def changed_paths(previous: Snapshot, current: Snapshot) -> List[Path]:
+    """Return files added, removed or modified between two snapshots."""
+
+    return sorted(path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path))
+
+
+def reload_transformers(changed: Iterable[Path]) -> List[str]:
+    """Reload edited transformer modules and return their names.
+
+    The package is reloaded after its modules so ``REGISTRY`` and ``FEATURES``
+    point at the new functions, and then :mod:`.transform`, which imports those
+    dicts by name. A module with a syntax error raises and keeps its old code.
+    """
+
+    reloaded = []
+    package_changed = False
+    for path in changed:
+        if path.suffix != ".py" or path.parent != TRANSFORMERS_DIR:
+            continue
+        if path.stem == "__init__":
+            package_changed = True
+            continue
+        module = sys.modules.get(f"{transformers.__name__}.{path.stem}")
+        if module is not None:
+            importlib.reload(module)
+            reloaded.append(module.__name__)
+    if reloaded or package_changed:
+        importlib.reload(transformers)
+        importlib.reload(transform)
+    return reloaded
+
+
+class RebuildReport(NamedTuple):
+    changed: Tuple[Path, ...]
+    seconds: float
+    reloaded: Tuple[str, ...]
+    processed: Tuple[Path, ...]
+    packs: Tuple[Path, ...]
+    issues: Dict[str, List[str]]
+    error: str | None = None
+
+
+class WatchSession:
+    """Pipeline state kept warm between rebuilds.
+
+    Paths and options mirror ``extract_pdf.py``, ``transform_data.py`` and
+    ``build_compendia.py``. When the PDF is missing, extraction is skipped and
+    the existing raw sections are transformed.
+    """
+
+    def __init__(
+        self,
+        *,
+        pdf_path: Path,
+        manifest_path: Path,
+        sections_dir: Path,
+        profiles: Path,
+        processed_dir: Path,
+        packs_dir: Path,
+        mappings_dir: Path,
+        build_state: BuildState,
+        min_level: int = 2,
+        page_cache_mb: int = 64,
+        pack_format: str = "nedb",
+        group_chapters: bool = False,
+        cross_links: bool = False,
+    ) -> None:
+        self.pdf_path = pdf_path.resolve()
+        self.manifest_path = manifest_path
+        self.sections_dir = sections_dir
+        self.profiles = profiles.resolve()
+        self.processed_dir = processed_dir
+        self.packs_dir = packs_dir
+        self.mappings_dir = mappings_dir.resolve()
+        self.build_state = build_state
+        self.min_level = min_level
+        self.pack_format = pack_format
+        self.group_chapters = group_chapters
+        self.cross_links = cross_links
+        self.page_cache = PageCache(max_bytes=page_cache_mb * 1024 * 1024)
+        self._doc: fitz.Document | None = None
+        self._pdf_fingerprint: str | None = None
+        self._manifest: Manifest | None = None
+        self._rebuilds = 0
+        compendium.cache_payloads()
+
+    @property
+    def roots(self) -> List[Path]:
+        """Files and directories whose changes trigger a rebuild."""
+
+        return [self.mappings_dir, self.profiles, TRANSFORMERS_DIR, self.pdf_path]
+
+    def close(self) -> None:
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+        compendium.cache_payloads(False)
+
+    def _open_pdf(self) -> None:
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+        self.page_cache = PageCache(max_bytes=self.page_cache.max_bytes)
+        if not self.pdf_path.exists():
+            self._manifest = None
+            return
+
+        self._pdf_fingerprint = file_fingerprint(self.pdf_path)
+        manifest_key = str(self.manifest_path.resolve())
+        manifest_fingerprint = fingerprint(self._pdf_fingerprint, source_fingerprint(manifest_module))
+        if self.manifest_path.exists() and self.build_state.is_fresh("manifest", manifest_key, manifest_fingerprint):
+            self._manifest = load_manifest(self.manifest_path)
+        else:
+            self._manifest = generate_manifest(self.pdf_path, self.manifest_path)
+            self.build_state.record("manifest", manifest_key, manifest_fingerprint, [self.manifest_path.resolve()])
+        self._doc = fitz.open(self.pdf_path)
+
+    def _extract(self) -> None:
+        if self._manifest is None or self._doc is None:
+            return
+        features = transform.feature_resolver(self.profiles) if self.profiles.exists() else None
+        extract_sections(
+            self._manifest,
+            output_dir=self.sections_dir,
+            min_level=self.min_level,
+            features=features,
+            page_cache=self.page_cache,
+            build_state=self.build_state,
+            doc=self._doc,
+            pdf_fingerprint=self._pdf_fingerprint,
+        )
+
+    def _build_packs(self) -> None:
+        suffix = ".db" if self.pack_format == "nedb" else ""
+        journals_dir = self.processed_dir / "journals"
+        linker = None
+        if self.cross_links:
+            linker = compendium.build_cross_linker(self.mappings_dir, journals_dir, group_chapters=self.group_chapters)
+
+        ancestries = self.processed_dir / "ancestries.json"
+        if ancestries.exists():
+            compendium.build_ancestry_pack(
+                ancestries,
+                self.packs_dir / f"dark-sun-ancestries{suffix}",
+                build_state=self.build_state,
+                pack_format=self.pack_format,
+                linker=linker,
+            )
+        if journals_dir.exists():
+            compendium.build_journal_pack(
+                journals_dir,
+                self.packs_dir / f"dark-sun-rules{suffix}",
+                build_state=self.build_state,
+                pack_format=self.pack_format,
+                group_chapters=self.group_chapters,
+                linker=linker,
+            )
+        for name, pack_name, builder in (
+            ("bestiary.json", "dark-sun-bestiary", compendium.build_bestiary_pack),
+            ("spells.json", "dark-sun-spells", compendium.build_spell_pack),
+        ):
+            if (self.processed_dir / name).exists():
+                builder(
+                    self.processed_dir / name,
+                    self.packs_dir / f"{pack_name}{suffix}",
+                    build_state=self.build_state,
+                    pack_format=self.pack_format,
+                    linker=linker,
+                )
+        compendium.build_search_index(
+            self.packs_dir / "search",
+            ancestries_path=ancestries,
+            journals_dir=journals_dir,
+            group_chapters=self.group_chapters,
+            build_state=self.build_state,
+            linker=linker,
+        )
+
+    def rebuild(self, changed: Sequence[Path]) -> RebuildReport:
+        """Bring every stage up to date after ``changed`` files were edited.
+
+        The first call should pass every watched file; the transformer modules
+        it imported are already current, so reloading starts with the second.
+        Extraction only runs when the PDF, the section
+        profiles or a transformer changed, since those decide which page features
+        are extracted.
+        """
+
+        started = time.perf_counter()
+        changed_set = set(changed)
+        processed_before = snapshot([self.processed_dir])
+        packs_before = snapshot([self.packs_dir])
+        issues: Dict[str, List[str]] = {}
+        reloaded: List[str] = []
+        error = None
+        try:
+            with profiling.span("watch.rebuild", "stage", files=len(changed_set)):
+                transformer_changes = [path for path in changed_set if path.parent == TRANSFORMERS_DIR]
+                if transformer_changes and self._rebuilds:
+                    reloaded = reload_transformers(transformer_changes)
+                if self.pdf_path in changed_set:
+                    self._open_pdf()
+                if self.pdf_path in changed_set or self.profiles in changed_set or transformer_changes:
+                    self._extract()
+                transform.transform_all(
+                    section_profiles=self.profiles,
+                    raw_sections_dir=self.sections_dir,
+                    output_dir=self.processed_dir,
+                    build_state=self.build_state,
+                    issues=issues,
+                )
+                self._build_packs()
+        except Exception as exc:  # reported and retried on the next change
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self._rebuilds += 1
+            self.build_state.save()
+
+        # Packs are reported by their top-level file or directory (LevelDB, search).
+        packs = {
+            self.packs_dir / path.relative_to(self.packs_dir).parts[0]
+            for path in changed_paths(packs_before, snapshot([self.packs_dir]))
+        }
+        return RebuildReport(
+            changed=tuple(sorted(changed_set)),
+            seconds=time.perf_counter() - started,
+            reloaded=tuple(reloaded),
+            processed=tuple(changed_paths(processed_before, snapshot([self.processed_dir]))),
+            packs=tuple(sorted(packs)),
+            issues=issues,
+            error=error,
+        )
+
+
+def watch(
+    session: WatchSession,
+    on_rebuild: Callable[[RebuildReport], None],
+    *,
+    interval: float = 0.5,
+    settle: float = 0.05,
+    stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """Rebuild once, then poll ``session.roots`` every ``interval`` seconds.
+
+    After a change is seen the files are polled again every ``settle`` seconds
+    until they stop changing, so an editor's multi-step save triggers one rebuild.
+    """
+
+    previous = snapshot(session.roots)
+    on_rebuild(session.rebuild(sorted(previous)))
+    while not stop():
+        time.sleep(interval)
+        current = snapshot(session.roots)
+        if current == previous:
+            continue
+        while True:
+            time.sleep(settle)
+            later = snapshot(session.roots)
+            if later == current:
+                break
+            current = later
+        changed = changed_paths(previous, current)
+        previous = current
+        on_rebuild(session.rebuild(changed))